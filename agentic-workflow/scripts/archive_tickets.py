@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Move old solved and closed tickets into the compressed ticket archive."""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from typhoon_it_support.tools.ticket_storage import get_storage
+
+
+def main():
+    """Archive tickets resolved more than --days days ago."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=90,
+        help="archive tickets resolved at least this many days ago (default: 90)",
+    )
+    args = parser.parse_args()
+
+    archived = get_storage().archive_tickets(args.days)
+    print(f"Archived {archived} tickets resolved more than {args.days} days ago")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,41 @@
 from datetime import datetime, timedelta
 
 from ..config.user_context import get_current_user
+from ..tools.ticket_storage import BaseTicketStorage, get_storage
 from ..tools.ticket_tools import (
     AVAILABLE_AGENTS,
     _calculate_sla_targets,
     _check_sla_breach,
-    _mock_tickets,
-    _ticket_counter,
 )
 
 
-def initialize_demo_tickets():
-    """Add sample tickets for demo purposes."""
-    global _ticket_counter
+def initialize_demo_tickets(only_if_empty: bool = False) -> int:
+    """Replace all tickets with sample tickets for demo purposes.
 
+    Runs under the storage's exclusive lock, so API workers starting at
+    the same time seed the demo once instead of racing each other.
+
+    Args:
+        only_if_empty: Keep existing tickets and skip seeding if there are
+            any, as done at server startup.
+
+    Returns:
+        Number of tickets in the storage.
+    """
+    storage = get_storage()
+    with storage.exclusive():
+        if only_if_empty and storage.count():
+            return storage.count()
+        return _seed_demo_tickets(storage)
+
+
+def _seed_demo_tickets(storage: BaseTicketStorage) -> int:
+    """Clear the storage and add the sample tickets.
+
+    Must be called inside storage.exclusive().
+    """
     # Clear existing tickets
-    _mock_tickets.clear()
+    storage.clear()
 
     # Get current user for realistic demo data
     current_user = get_current_user()
@@ -243,9 +263,10 @@ def initialize_demo_tickets():
     ]
 
     # Add tickets to the system
+    first_id = storage.reserve_ids(len(sample_tickets))
+    tickets = []
     for idx, ticket_data in enumerate(sample_tickets):
-        ticket_id = _ticket_counter["value"]
-        _ticket_counter["value"] += 1
+        ticket_id = first_id + idx
 
         created_at = ticket_data["created_at"]
 
@@ -383,6 +404,8 @@ def initialize_demo_tickets():
                 }
             )
 
-        _mock_tickets[ticket_id] = ticket
+        tickets.append(ticket)
 
-    return len(_mock_tickets)
+    # Save all tickets in a single write
+    storage.save_tickets(tickets)
+    return storage.count()
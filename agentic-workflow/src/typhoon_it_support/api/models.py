@@ -1,5 +1,6 @@
 """API request and response models."""
 
+from datetime import datetime
 from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field
@@ -97,6 +98,9 @@ class TicketUpdateRequest(BaseModel):
     status: Optional[str] = Field(None, description="New status")
     priority: Optional[str] = Field(None, description="New priority")
     comment: Optional[str] = Field(None, description="Comment to add")
+    version: Optional[int] = Field(
+        None, description="Expected ticket version, rejects stale updates if set"
+    )
 
 
 class AssignTicketRequest(BaseModel):
@@ -127,3 +131,33 @@ class BulkUpdateRequest(BaseModel):
         None, description="Agent ID to assign tickets to"
     )
     tags: Optional[list[str]] = Field(None, description="Tags to add to all tickets")
+
+
+class TicketImportRecord(BaseModel):
+    """One ticket of a bulk import, a line of the NDJSON request body."""
+
+    subject: str = Field(..., description="Brief summary of the issue")
+    description: str = Field(..., description="Detailed description of the problem")
+    requester_email: str = Field(..., description="Email of the requester")
+    requester_name: str = Field(..., description="Name of the requester")
+    priority: str = Field(
+        "normal", description="Ticket priority (low, normal, high, urgent)"
+    )
+    status: str = Field("new", description="Ticket status")
+    category: str = Field("other", description="Ticket category")
+    assignee_id: Optional[str] = Field(None, description="ID of the assigned agent")
+    tags: list[str] = Field(default_factory=list, description="Ticket tags")
+    comments: list[Dict[str, Any]] = Field(
+        default_factory=list, description="Comments, stored as given"
+    )
+    created_at: Optional[datetime] = Field(
+        None, description="Creation time, defaults to the time of the import"
+    )
+    updated_at: Optional[datetime] = Field(
+        None, description="Last update time, defaults to created_at"
+    )
+    due_date: Optional[datetime] = Field(None, description="Due date")
+    first_response_at: Optional[datetime] = Field(
+        None, description="Time of the first response"
+    )
+    resolved_at: Optional[datetime] = Field(None, description="Resolution time")
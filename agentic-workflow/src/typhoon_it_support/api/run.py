@@ -14,6 +14,8 @@ def main() -> None:
         host="0.0.0.0",
         port=8000,
         reload=settings.debug,
+        # Reload mode only supports a single worker
+        workers=1 if settings.debug else settings.api_workers,
         log_level="info" if not settings.debug else "debug",
     )
 
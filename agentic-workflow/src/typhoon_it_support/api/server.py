@@ -6,7 +6,11 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from ..config import get_settings
 from ..config.user_context import get_company_info, get_current_user
+from ..tools.async_ticket_storage import get_async_storage
+from ..tools.sla_scheduler import SLAScheduler
+from ..tools.ticket_storage import get_storage
 from .chat_endpoints import router as chat_router
 from .models import HealthResponse, UserInfo, UserSessionResponse
 from .ticket_advanced_endpoints import router as ticket_advanced_router
@@ -26,13 +30,23 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     from .init_demo_tickets import initialize_demo_tickets
 
-    count = initialize_demo_tickets()
+    # Workers share the storage, only seed it if no worker did already
+    count = await get_async_storage().run(initialize_demo_tickets, True)
     print(f"✅ Initialized {count} demo tickets")
 
+    # Flag SLA breaches as deadlines pass, not just when tickets change. Each
+    # worker starts a scheduler, the lock file makes only one of them run.
+    scheduler = None
+    if get_settings().sla_scheduler:
+        scheduler = SLAScheduler(lock_path=get_storage().lock_file("sla"))
+        scheduler.start()
+
     yield
 
-    # Shutdown (if needed)
-    pass
+    # Shutdown
+    if scheduler is not None:
+        scheduler.stop()
+    get_async_storage().close()
 
 
 def create_app() -> FastAPI:
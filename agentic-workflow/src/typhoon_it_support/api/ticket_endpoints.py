@@ -1,12 +1,25 @@
 """Basic ticket CRUD API endpoints."""
 
+import json
+import time
+import zlib
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncGenerator, Dict, Optional, Sequence
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
 from ..config.user_context import get_current_user
-from ..tools.ticket_storage import get_storage
+from ..tools.async_ticket_storage import get_async_storage
+from ..tools.ticket_changes import TicketChangeFeed
+from ..tools.ticket_columns import get_sla_snapshot
+from ..tools.ticket_record import TICKET_FIELDS
+from ..tools.ticket_storage import (
+    SUMMARY_FIELDS,
+    TicketVersionConflictError,
+    next_cursor,
+    ticket_version,
+)
 from ..tools.ticket_tools import (
     AVAILABLE_AGENTS,
     TicketPriority,
@@ -18,58 +31,314 @@ from .models import TicketCreateRequest, TicketUpdateRequest
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
 
+# Seconds between checks for changes made by other processes while streaming
+CHANGE_POLL_INTERVAL = 1.0
+# Seconds without events after which the change stream sends a keepalive
+CHANGE_KEEPALIVE_INTERVAL = 15.0
+# Maximum number of changes read from the feed at once
+CHANGE_BATCH_SIZE = 500
+
+# Ticket views of list endpoints -> fields returned, None for whole tickets
+TICKET_VIEWS: Dict[str, Optional[Sequence[str]]] = {
+    "full": None,
+    "summary": SUMMARY_FIELDS,
+}
+
+
+def parse_fields(fields: Optional[str], view: str) -> Optional[Sequence[str]]:
+    """Get the ticket fields a list endpoint should return.
+
+    Args:
+        fields: Comma-separated ticket fields, takes precedence over view.
+        view: Name of a view in TICKET_VIEWS.
+
+    Returns:
+        Fields to return, None for whole tickets.
+
+    Raises:
+        HTTPException: If a field or the view is unknown.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in TICKET_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Valid options: {', '.join(TICKET_FIELDS)}",
+            )
+        return requested
+
+    if view not in TICKET_VIEWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid view. Valid options: {', '.join(TICKET_VIEWS)}",
+        )
+    return TICKET_VIEWS[view]
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from version tokens.
+
+    Responses are generated, so equal versions only promise equal content,
+    not byte-identical bodies.
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check an If-None-Match header against an ETag by weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Send an ETag and have clients revalidate it before reusing a response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    """Build a 304 Not Modified response for an ETag."""
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
+
+
+# The agents never change while the server runs
+AGENTS_ETAG = make_etag(
+    "agents", f"{zlib.crc32(json.dumps(AVAILABLE_AGENTS).encode('utf-8')):08x}"
+)
+
 
 @router.get("")
-async def list_tickets(status: Optional[str] = None, limit: int = 50) -> dict:
+async def list_tickets(
+    response: Response,
+    status: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
+    if_none_match: Optional[str] = Header(default=None),
+) -> dict:
     """List all tickets with optional status filter.
 
+    Answers 304 Not Modified if no ticket changed since the client's copy,
+    without loading any ticket.
+
     Args:
+        response: Response to set the ETag on.
         status: Optional status filter (new, open, pending, solved, closed).
         limit: Maximum number of tickets to return.
+        cursor: Cursor from a previous page's next_cursor.
+        fields: Comma-separated ticket fields to return, id and created_at
+            are always included.
+        view: "full" for whole tickets or "summary" for the fields needed
+            to list them. Ignored if fields is given.
+        if_none_match: ETags of the client's cached copies.
 
     Returns:
-        List of tickets.
+        List of tickets and the cursor of the next page, if any.
     """
-    tickets = list(get_storage().load_all_tickets().values())
-
-    # Filter by status if provided
+    # Validate status filter if provided
     if status:
         if status not in [s.value for s in TicketStatus]:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid status. Valid options: {', '.join([s.value for s in TicketStatus])}",
             )
-        tickets = [t for t in tickets if t["status"] == status]
-
-    # Sort by creation date (newest first)
-    tickets.sort(key=lambda t: t["created_at"], reverse=True)
-
-    # Limit results
-    tickets = tickets[:limit]
+    projected = parse_fields(fields, view)
+
+    # Read the version first, so the tickets are at least as new as the ETag
+    etag = make_etag("tickets", await get_async_storage().get_version())
+    if etag_matches(etag, if_none_match):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # Newest first, limited by the storage backend
+    try:
+        tickets = await get_async_storage().query_tickets(
+            status=status, limit=limit, cursor=cursor, fields=projected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "tickets": tickets,
         "total": len(tickets),
         "status_filter": status,
+        "next_cursor": next_cursor(tickets, limit),
     }
 
 
 @router.get("/agents")
-async def get_agents() -> dict:
+async def get_agents(
+    response: Response, if_none_match: Optional[str] = Header(default=None)
+) -> dict:
     """Get list of available agents for assignment.
 
+    Args:
+        response: Response to set the ETag on.
+        if_none_match: ETags of the client's cached copies.
+
     Returns:
         List of available agents.
     """
+    if etag_matches(AGENTS_ETAG, if_none_match):
+        return not_modified(AGENTS_ETAG)
+    set_etag(response, AGENTS_ETAG)
     return {"agents": AVAILABLE_AGENTS}
 
 
+def change_event(feed: TicketChangeFeed, change: Dict) -> Dict:
+    """Get a change as sent to clients, with its version as a token.
+
+    Args:
+        feed: Feed the change was read from.
+        change: Change as returned by TicketChangeFeed.since().
+
+    Returns:
+        Copy of the change with the version replaced by feed.token().
+    """
+    return {**change, "version": feed.token(change["version"])}
+
+
+@router.get("/changes")
+async def list_changes(
+    since: Optional[str] = None, limit: int = CHANGE_BATCH_SIZE
+) -> dict:
+    """Get the ticket changes after a version of the changes feed.
+
+    Versions are tokens of the feed of the worker process that answers. A
+    token from another worker, or from before a restart, makes the client
+    reload.
+
+    Args:
+        since: Latest version token the client has seen, None if none.
+        limit: Maximum number of changes to return.
+
+    Returns:
+        Changes as {"version", "ticket_id", "op"} in version order, the
+        version token to pass as since next time and whether the client
+        has to reload all tickets because the changes since its version
+        are not known.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    storage = get_async_storage()
+    feed = storage.changes
+    version = 0 if since is None else feed.parse(since)
+    if version is None:
+        version, _ = await storage.get_changes(0, limit=0)
+        return {"changes": [], "version": feed.token(version), "reset": True}
+
+    version, changes = await storage.get_changes(version, limit=limit)
+    if changes:
+        version = changes[-1]["version"]
+
+    return {
+        "changes": [change_event(feed, change) for change in changes or []],
+        "version": feed.token(version),
+        "reset": changes is None,
+    }
+
+
+@router.get("/changes/stream")
+async def stream_changes(
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """Stream ticket changes as Server-Sent Events.
+
+    Each change is sent as a "change" event with the feed version token as
+    event ID, so a reconnecting EventSource resumes where it left off. A
+    "reset" event tells the client to reload all tickets, also when it
+    reconnects to another worker process than the one that sent the ID.
+
+    Args:
+        since: Version token to stream changes after. Defaults to the
+            Last-Event-ID header, or the current version.
+        last_event_id: Last event ID received before reconnecting.
+
+    Returns:
+        Streaming response with Server-Sent Events.
+    """
+    storage = get_async_storage()
+    feed = storage.changes
+
+    def reset_event(version: int) -> str:
+        """Format a reset event at a version."""
+        token = feed.token(version)
+        data = json.dumps({"type": "reset", "version": token})
+        return f"id: {token}\ndata: {data}\n\n"
+
+    async def generate() -> AsyncGenerator[str, None]:
+        """Generate change events until the client disconnects."""
+        token = since if since is not None else last_event_id
+        version = None if token is None else feed.parse(token)
+        if version is None:
+            version, _ = await storage.get_changes(0, limit=0)
+            if token is not None:
+                yield reset_event(version)
+
+        last_sent = time.monotonic()
+        while True:
+            current, changes = await storage.get_changes(
+                version, limit=CHANGE_BATCH_SIZE
+            )
+            if changes is None:
+                version = current
+                yield reset_event(version)
+                last_sent = time.monotonic()
+                continue
+
+            for change in changes:
+                version = change["version"]
+                event = change_event(feed, change)
+                data = json.dumps({"type": "change", **event})
+                yield f"id: {event['version']}\ndata: {data}\n\n"
+            if changes:
+                last_sent = time.monotonic()
+                continue
+
+            # Woken by changes in this process, polls for other processes
+            if not await storage.wait_for_changes(version, CHANGE_POLL_INTERVAL):
+                if time.monotonic() - last_sent >= CHANGE_KEEPALIVE_INTERVAL:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @router.get("/{ticket_id}")
-async def get_ticket_detail(ticket_id: int) -> dict:
+async def get_ticket_detail(
+    ticket_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+) -> dict:
     """Get detailed information about a specific ticket.
 
+    Answers 304 Not Modified if the ticket didn't change since the client's
+    copy, checking its version before reading the ticket.
+
     Args:
         ticket_id: The ID of the ticket.
+        response: Response to set the ETag on.
+        if_none_match: ETags of the client's cached copies.
 
     Returns:
         Ticket details.
@@ -77,10 +346,22 @@ async def get_ticket_detail(ticket_id: int) -> dict:
     Raises:
         HTTPException: If ticket not found.
     """
-    ticket = get_storage().get_ticket(ticket_id)
+    storage = get_async_storage()
+    if if_none_match:
+        version = await storage.get_ticket_version(ticket_id)
+        if version is not None:
+            etag = make_etag(ticket_id, version)
+            if etag_matches(etag, if_none_match):
+                return not_modified(etag)
+
+    ticket = await storage.get_ticket(ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail=f"Ticket #{ticket_id} not found")
 
+    etag = make_etag(ticket_id, ticket_version(ticket))
+    if etag_matches(etag, if_none_match):
+        return not_modified(etag)
+    set_etag(response, etag)
     return {"ticket": ticket}
 
 
@@ -111,7 +392,7 @@ async def create_new_ticket(request: TicketCreateRequest) -> dict:
         )
 
     # Create ticket
-    ticket_id = get_storage().get_next_id()
+    ticket_id = await get_async_storage().reserve_ids()
     created_at = datetime.now().isoformat()
 
     # Calculate SLA targets
@@ -148,7 +429,7 @@ async def create_new_ticket(request: TicketCreateRequest) -> dict:
         ],
     }
 
-    get_storage().save_ticket(ticket)
+    await get_async_storage().save_ticket(ticket)
 
     return {"ticket": ticket, "message": f"Ticket #{ticket_id} created successfully"}
 
@@ -165,110 +446,122 @@ async def update_ticket(ticket_id: int, request: TicketUpdateRequest) -> dict:
         Updated ticket information.
 
     Raises:
-        HTTPException: If ticket not found or invalid parameters.
+        HTTPException: If ticket not found, invalid parameters or the
+            ticket changed since the version given in the request.
     """
-    if not get_storage().get_ticket(ticket_id):
-        raise HTTPException(status_code=404, detail=f"Ticket #{ticket_id} not found")
-
-    ticket = get_storage().get_ticket(ticket_id)
     changes = []
 
-    # Update status
-    if request.status:
-        if request.status not in [s.value for s in TicketStatus]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid status. Valid options: {', '.join([s.value for s in TicketStatus])}",
+    def apply_update(ticket: Dict) -> None:
+        # Update status
+        if request.status:
+            if request.status not in [s.value for s in TicketStatus]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid status. Valid options: {', '.join([s.value for s in TicketStatus])}",
+                )
+            old_status = ticket["status"]
+            ticket["status"] = request.status
+            changes.append(f"Status changed from {old_status} to {request.status}")
+
+            # Track SLA milestones
+            now_str = datetime.now().isoformat()
+            # First response is when ticket moves from "new" to any active status
+            if request.status in ["open", "pending"] and not ticket.get(
+                "first_response_at"
+            ):
+                ticket["first_response_at"] = now_str
+            # Resolution is when ticket is marked as solved or closed
+            elif request.status in ["solved", "closed"] and not ticket.get(
+                "resolved_at"
+            ):
+                ticket["resolved_at"] = now_str
+
+            # Check for SLA breach
+            created_at_str = ticket["created_at"]
+            created_at = (
+                datetime.fromisoformat(created_at_str)
+                if isinstance(created_at_str, str)
+                else created_at_str
             )
-        old_status = ticket["status"]
-        ticket["status"] = request.status
-        changes.append(f"Status changed from {old_status} to {request.status}")
-
-        # Track SLA milestones
-        now_str = datetime.now().isoformat()
-        # First response is when ticket moves from "new" to any active status
-        if request.status in ["open", "pending"] and not ticket.get(
-            "first_response_at"
-        ):
-            ticket["first_response_at"] = now_str
-        # Resolution is when ticket is marked as solved or closed
-        elif request.status in ["solved", "closed"] and not ticket.get("resolved_at"):
-            ticket["resolved_at"] = now_str
-
-        # Check for SLA breach
-        created_at_str = ticket["created_at"]
-        created_at = (
-            datetime.fromisoformat(created_at_str)
-            if isinstance(created_at_str, str)
-            else created_at_str
-        )
-
-        first_response_str = ticket.get("first_response_at")
-        first_response = (
-            datetime.fromisoformat(first_response_str)
-            if first_response_str and isinstance(first_response_str, str)
-            else first_response_str
-        )
-
-        resolved_str = ticket.get("resolved_at")
-        resolved = (
-            datetime.fromisoformat(resolved_str)
-            if resolved_str and isinstance(resolved_str, str)
-            else resolved_str
-        )
-
-        ticket["sla_breach"] = _check_sla_breach(
-            created_at, ticket["priority"], first_response, resolved
-        )
 
-    # Update priority
-    if request.priority:
-        if request.priority not in [p.value for p in TicketPriority]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid priority. Valid options: {', '.join([p.value for p in TicketPriority])}",
+            first_response_str = ticket.get("first_response_at")
+            first_response = (
+                datetime.fromisoformat(first_response_str)
+                if first_response_str and isinstance(first_response_str, str)
+                else first_response_str
             )
-        old_priority = ticket["priority"]
-        ticket["priority"] = request.priority
-        changes.append(f"Priority changed from {old_priority} to {request.priority}")
 
-    # Add comment
-    if request.comment:
-        ticket["comments"].append(
-            {
-                "author": "IT Support Agent",
-                "body": request.comment,
-                "public": True,
-                "created_at": datetime.now().isoformat(),
-            }
-        )
-        changes.append("Comment added")
+            resolved_str = ticket.get("resolved_at")
+            resolved = (
+                datetime.fromisoformat(resolved_str)
+                if resolved_str and isinstance(resolved_str, str)
+                else resolved_str
+            )
 
-    # Update timestamp
-    now = datetime.now().isoformat()
-    ticket["updated_at"] = now
+            ticket["sla_breach"] = _check_sla_breach(
+                created_at, ticket["priority"], first_response, resolved
+            )
 
-    # Add to history if any changes were made
-    if request.status or request.priority or request.comment:
-        history_changes = {}
-        if request.status:
-            history_changes["status"] = {"old": old_status, "new": request.status}
+        # Update priority
         if request.priority:
-            history_changes["priority"] = {"old": old_priority, "new": request.priority}
+            if request.priority not in [p.value for p in TicketPriority]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid priority. Valid options: {', '.join([p.value for p in TicketPriority])}",
+                )
+            old_priority = ticket["priority"]
+            ticket["priority"] = request.priority
+            changes.append(
+                f"Priority changed from {old_priority} to {request.priority}"
+            )
+
+        # Add comment
         if request.comment:
-            history_changes["comment_added"] = True
+            ticket["comments"].append(
+                {
+                    "author": "IT Support Agent",
+                    "body": request.comment,
+                    "public": True,
+                    "created_at": datetime.now().isoformat(),
+                }
+            )
+            changes.append("Comment added")
+
+        # Update timestamp
+        now = datetime.now().isoformat()
+        ticket["updated_at"] = now
+
+        # Add to history if any changes were made
+        if request.status or request.priority or request.comment:
+            history_changes = {}
+            if request.status:
+                history_changes["status"] = {"old": old_status, "new": request.status}
+            if request.priority:
+                history_changes["priority"] = {
+                    "old": old_priority,
+                    "new": request.priority,
+                }
+            if request.comment:
+                history_changes["comment_added"] = True
+
+            ticket["history"].append(
+                {
+                    "timestamp": now,
+                    "action": "updated",
+                    "actor": "IT Support Agent",
+                    "changes": history_changes,
+                }
+            )
 
-        ticket["history"].append(
-            {
-                "timestamp": now,
-                "action": "updated",
-                "actor": "IT Support Agent",
-                "changes": history_changes,
-            }
+    # Load, update and save the ticket in one step
+    try:
+        ticket = await get_async_storage().update_ticket(
+            ticket_id, apply_update, expected_version=request.version
         )
-
-    # Save changes to storage
-    get_storage().save_ticket(ticket)
+    except TicketVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not ticket:
+        raise HTTPException(status_code=404, detail=f"Ticket #{ticket_id} not found")
 
     return {
         "ticket": ticket,
@@ -290,38 +583,50 @@ async def delete_ticket(ticket_id: int) -> dict:
     Raises:
         HTTPException: If ticket not found.
     """
-    if not get_storage().get_ticket(ticket_id):
+    if not await get_async_storage().delete_ticket(ticket_id):
         raise HTTPException(status_code=404, detail=f"Ticket #{ticket_id} not found")
 
-    get_storage().delete_ticket(ticket_id)
-
     return {"message": f"Ticket #{ticket_id} deleted successfully"}
 
 
 @router.get("/stats/summary")
-async def get_ticket_stats() -> dict:
+async def get_ticket_stats(
+    response: Response, if_none_match: Optional[str] = Header(default=None)
+) -> dict:
     """Get summary statistics about tickets.
 
+    Answers 304 Not Modified if no ticket changed since the client's copy.
+
+    Args:
+        response: Response to set the ETag on.
+        if_none_match: ETags of the client's cached copies.
+
     Returns:
         Ticket statistics grouped by status and priority.
     """
-    from collections import defaultdict
+    # Read the version first, so the stats are at least as new as the ETag
+    etag = make_etag("stats", await get_async_storage().get_version())
+    if etag_matches(etag, if_none_match):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await get_async_storage().get_stats()
 
-    stats = {
-        "total": len(get_storage().load_all_tickets()),
-        "by_status": defaultdict(int),
-        "by_priority": defaultdict(int),
-    }
 
-    for ticket in get_storage().load_all_tickets().values():
-        stats["by_status"][ticket["status"]] += 1
-        stats["by_priority"][ticket["priority"]] += 1
+@router.get("/stats/sla")
+async def get_sla_stats() -> dict:
+    """Get SLA performance over all tickets.
 
-    return {
-        "total": stats["total"],
-        "by_status": dict(stats["by_status"]),
-        "by_priority": dict(stats["by_priority"]),
-    }
+    Computed from a columnar snapshot of ticket timestamps, which only
+    rereads tickets changed since the last call. Deadlines are recomputed
+    from the current SLA targets and unmet ones checked against the current
+    time, so the result changes as time passes and has no ETag.
+
+    Returns:
+        Breach rates, first response time percentiles and mean time to
+        resolve, overall and by priority.
+    """
+    storage = get_async_storage()
+    return await storage.run(get_sla_snapshot().sla_stats)
 
 
 @router.post("/demo/initialize")
@@ -333,6 +638,6 @@ async def initialize_demo_data() -> dict:
     """
     from .init_demo_tickets import initialize_demo_tickets
 
-    count = initialize_demo_tickets()
+    count = await get_async_storage().run(initialize_demo_tickets)
 
     return {"message": "Demo tickets initialized successfully", "count": count}
@@ -20,8 +20,18 @@ class Settings:
     max_tokens: int = 8192
     max_iterations: int = 30
     debug: bool = False
+    api_workers: int = 1
     checkpointer_type: str = "memory"
     sqlite_checkpoint_path: str = "./checkpoints.db"
+    ticket_storage_type: str = "jsonl"
+    sqlite_ticket_path: str = "./tickets.db"
+    ticket_write_mode: str = "full"
+    ticket_snapshot_interval: int = 20
+    ticket_compact_dead_ratio: float = 0.5
+    ticket_compact_max_bytes: int = 64 * 1024 * 1024
+    ticket_fsync: str = "none"
+    ticket_io_threads: int = 4
+    sla_scheduler: bool = True
 
     def __post_init__(self) -> None:
         """Load settings from environment variables."""
@@ -31,10 +41,35 @@ class Settings:
         self.temperature = float(os.getenv("TEMPERATURE", str(self.temperature)))
         self.max_tokens = int(os.getenv("MAX_TOKENS", str(self.max_tokens)))
         self.max_iterations = int(os.getenv("MAX_ITERATIONS", str(self.max_iterations)))
+        self.api_workers = int(os.getenv("API_WORKERS", str(self.api_workers)))
         self.checkpointer_type = os.getenv("CHECKPOINTER_TYPE", self.checkpointer_type)
         self.sqlite_checkpoint_path = os.getenv(
             "SQLITE_CHECKPOINT_PATH", self.sqlite_checkpoint_path
         )
+        self.ticket_storage_type = os.getenv(
+            "TICKET_STORAGE_TYPE", self.ticket_storage_type
+        )
+        self.sqlite_ticket_path = os.getenv(
+            "SQLITE_TICKET_PATH", self.sqlite_ticket_path
+        )
+        self.ticket_write_mode = os.getenv("TICKET_WRITE_MODE", self.ticket_write_mode)
+        self.ticket_snapshot_interval = int(
+            os.getenv("TICKET_SNAPSHOT_INTERVAL", str(self.ticket_snapshot_interval))
+        )
+        self.ticket_compact_dead_ratio = float(
+            os.getenv("TICKET_COMPACT_DEAD_RATIO", str(self.ticket_compact_dead_ratio))
+        )
+        self.ticket_compact_max_bytes = int(
+            os.getenv("TICKET_COMPACT_MAX_BYTES", str(self.ticket_compact_max_bytes))
+        )
+        self.ticket_fsync = os.getenv("TICKET_FSYNC", self.ticket_fsync).lower()
+        self.ticket_io_threads = int(
+            os.getenv("TICKET_IO_THREADS", str(self.ticket_io_threads))
+        )
+
+        sla_scheduler_env = os.getenv("SLA_SCHEDULER")
+        if sla_scheduler_env is not None:
+            self.sla_scheduler = sla_scheduler_env.lower() == "true"
 
         # Only override debug from env if explicitly set
         debug_env = os.getenv("DEBUG")
@@ -0,0 +1,240 @@
+"""Async access to the ticket storage for the API.
+
+The storage backends are synchronous: they read and write files or SQLite
+and wait on a process-wide lock. Called directly from an async endpoint,
+one slow disk access or a long wait for the lock blocks the event loop and
+with it every other request and stream the process is serving.
+
+AsyncTicketStorage runs each storage call on a small, dedicated thread
+pool instead. The pool is bounded, so a burst of ticket requests queues up
+for a few storage threads rather than taking over the default executor
+that the chat workflow also runs on.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from ..config.settings import get_settings
+from .ticket_changes import TicketChangeFeed
+from .ticket_storage import BaseTicketStorage, get_storage, next_cursor
+
+T = TypeVar("T")
+
+# Tickets fetched per storage call when paging through large results
+PAGE_SIZE = 500
+
+
+class AsyncTicketStorage:
+    """Awaitable wrapper around the global ticket storage.
+
+    Methods mirror BaseTicketStorage. The storage is looked up with
+    get_storage() on every call, so reset_storage() takes effect here too.
+    Update callbacks run on a storage thread, not on the event loop.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize the facade.
+
+        Args:
+            max_workers: Number of storage threads. Defaults to the
+                ticket_io_threads setting.
+        """
+        self.max_workers = max_workers or get_settings().ticket_io_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the thread pool, starting it on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ticket-io"
+                )
+            return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking function on a storage thread.
+
+        Args:
+            func: Function to call.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Return value of func. Exceptions it raises are re-raised.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+    async def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a storage method on a storage thread."""
+
+        def call() -> Any:
+            storage: BaseTicketStorage = get_storage()
+            return getattr(storage, method)(*args, **kwargs)
+
+        return await self.run(call)
+
+    async def load_all_tickets(self) -> Dict[int, Dict]:
+        """See BaseTicketStorage.load_all_tickets()."""
+        return await self._call("load_all_tickets")
+
+    async def save_ticket(self, ticket: Dict) -> None:
+        """See BaseTicketStorage.save_ticket()."""
+        await self._call("save_ticket", ticket)
+
+    async def update_ticket(
+        self,
+        ticket_id: int,
+        update: Callable[[Dict], Optional[bool]],
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict]:
+        """See BaseTicketStorage.update_ticket()."""
+        return await self._call(
+            "update_ticket", ticket_id, update, expected_version=expected_version
+        )
+
+    async def save_tickets(self, tickets: List[Dict]) -> None:
+        """See BaseTicketStorage.save_tickets()."""
+        await self._call("save_tickets", tickets)
+
+    async def update_tickets(
+        self, ticket_ids: List[int], update: Callable[[Dict], Optional[bool]]
+    ) -> List[Optional[Dict]]:
+        """See BaseTicketStorage.update_tickets()."""
+        return await self._call("update_tickets", ticket_ids, update)
+
+    async def delete_ticket(self, ticket_id: int) -> bool:
+        """See BaseTicketStorage.delete_ticket()."""
+        return await self._call("delete_ticket", ticket_id)
+
+    async def get_ticket(self, ticket_id: int) -> Optional[Dict]:
+        """See BaseTicketStorage.get_ticket()."""
+        return await self._call("get_ticket", ticket_id)
+
+    async def count(self) -> int:
+        """See BaseTicketStorage.count()."""
+        return await self._call("count")
+
+    async def reserve_ids(self, count: int = 1) -> int:
+        """See BaseTicketStorage.reserve_ids()."""
+        return await self._call("reserve_ids", count)
+
+    async def query_tickets(self, **filters: Any) -> List[Dict]:
+        """See BaseTicketStorage.query_tickets(), takes keyword arguments."""
+        return await self._call("query_tickets", **filters)
+
+    async def iter_tickets(
+        self, page_size: int = PAGE_SIZE, **filters: Any
+    ) -> AsyncIterator[List[Dict]]:
+        """Page through query_tickets() results with cursors.
+
+        Only one page is held at a time, so callers can stream any number
+        of tickets with flat memory use.
+
+        Args:
+            page_size: Maximum number of tickets per page.
+            **filters: Filters for query_tickets(), except limit and cursor.
+
+        Yields:
+            Non-empty pages of tickets, newest first.
+        """
+        cursor = None
+        while True:
+            page = await self.query_tickets(limit=page_size, cursor=cursor, **filters)
+            if page:
+                yield page
+            cursor = next_cursor(page, page_size)
+            if cursor is None:
+                return
+
+    async def search_tickets(
+        self, query: str, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """See BaseTicketStorage.search_tickets()."""
+        return await self._call("search_tickets", query, limit=limit)
+
+    async def get_stats(self) -> Dict:
+        """See BaseTicketStorage.get_stats()."""
+        return await self._call("get_stats")
+
+    async def get_changes(
+        self, since: int, limit: Optional[int] = None
+    ) -> Tuple[int, Optional[List[Dict]]]:
+        """See BaseTicketStorage.get_changes()."""
+        return await self._call("get_changes", since, limit=limit)
+
+    async def get_version(self) -> str:
+        """See BaseTicketStorage.get_version()."""
+        return await self._call("get_version")
+
+    async def get_ticket_version(self, ticket_id: int) -> Optional[str]:
+        """See BaseTicketStorage.get_ticket_version()."""
+        return await self._call("get_ticket_version", ticket_id)
+
+    @property
+    def changes(self) -> TicketChangeFeed:
+        """Get the changes feed of the global storage."""
+        return get_storage().changes
+
+    async def wait_for_changes(self, version: int, timeout: float) -> bool:
+        """Wait on the event loop until the changes feed moves past a version.
+
+        Only changes this process has seen wake the waiter, call
+        get_changes() periodically to pick up other processes' writes.
+
+        Args:
+            version: Latest feed version the caller has seen.
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            True if there are newer changes, False on timeout.
+        """
+        return await self.changes.wait(version, timeout)
+
+    async def archive_tickets(self, older_than_days: int) -> int:
+        """See BaseTicketStorage.archive_tickets()."""
+        return await self._call("archive_tickets", older_than_days)
+
+    async def search_archive(
+        self, query: str, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """See BaseTicketStorage.search_archive()."""
+        return await self._call("search_archive", query, limit=limit)
+
+    def close(self) -> None:
+        """Stop the storage threads after pending calls finish.
+
+        The pool is started again by the next call.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Global async storage instance
+_async_storage = AsyncTicketStorage()
+
+
+def get_async_storage() -> AsyncTicketStorage:
+    """Get the global async ticket storage.
+
+    Returns:
+        Global AsyncTicketStorage instance.
+    """
+    return _async_storage
@@ -0,0 +1,262 @@
+"""Background scheduler that flags SLA breaches when deadlines pass.
+
+A ticket's sla_breach flags are computed when it is created or changes
+status. A ticket nobody touches never gets flagged, so the stored flags go
+stale and filtering on them misses overdue tickets.
+
+SLAScheduler keeps the first response and resolution deadlines of all
+unfinished tickets in a heap ordered by due time. It sleeps until the
+earliest one, flips that ticket's breach flag through the storage and
+moves on. The write shows up as an "update" in the storage's changes feed,
+so live clients see the breach as it happens. New and changed tickets are
+picked up from the changes feed as well, so the whole dataset is only
+scanned once, at startup or when the feed asks for a reload.
+
+When several API workers share the storage, each starts a scheduler but
+only the one holding the lock file does the work. If its process exits,
+another takes over within a poll interval.
+"""
+
+import heapq
+import logging
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Thread
+from typing import IO, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows, every process runs its own scheduler
+    fcntl = None
+
+from .ticket_storage import BaseTicketStorage, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of seconds between checks of the changes feed
+SLA_POLL_INTERVAL = 1.0
+
+# SLA kind -> (due date field, field set once the SLA is met)
+SLA_DEADLINES = {
+    "first_response": ("sla_first_response_due", "first_response_at"),
+    "resolution": ("sla_resolution_due", "resolved_at"),
+}
+
+# Statuses that stop every SLA clock
+_DONE_STATUSES = ("solved", "closed")
+
+
+class SLAScheduler:
+    """Flags SLA breaches at their due time.
+
+    Entries in the heap are never removed early. When a ticket's deadline
+    changes or is met, the entry is just left behind and skipped once it
+    comes up, because it no longer matches the ticket's current deadline.
+
+    Safe to run in several processes sharing one storage file, a breach is
+    re-checked under the storage's write lock before it is written.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[BaseTicketStorage] = None,
+        clock: Callable[[], datetime] = datetime.now,
+        poll_interval: float = SLA_POLL_INTERVAL,
+        lock_path: Optional[Path] = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            storage: Storage to watch. Defaults to the global storage at
+                the time of each check.
+            clock: Returns the current time, like datetime.now().
+            poll_interval: Maximum number of seconds between checks for
+                new and changed tickets.
+            lock_path: Lock file shared with the schedulers of other
+                processes, only the one holding it runs the background
+                thread's checks. Defaults to no coordination.
+        """
+        self._storage = storage
+        self._clock = clock
+        self.poll_interval = poll_interval
+        self.lock_path = lock_path
+        self._lock_file: Optional[IO[bytes]] = None
+        self._heap: List[Tuple[datetime, int, str]] = []
+        # (ticket_id, kind) -> due time of the live heap entry
+        self._scheduled: Dict[Tuple[int, str], datetime] = {}
+        self._version: Optional[int] = None
+        self._watched: Optional[BaseTicketStorage] = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def __len__(self) -> int:
+        """Get the number of deadlines being watched."""
+        return len(self._scheduled)
+
+    def _schedule(self, ticket: Dict) -> None:
+        """Add the ticket's pending deadlines to the heap."""
+        ticket_id = ticket["id"]
+        breach = ticket.get("sla_breach") or {}
+        for kind, (due_field, met_field) in SLA_DEADLINES.items():
+            due = None
+            if (
+                ticket.get("status") not in _DONE_STATUSES
+                and not ticket.get(met_field)
+                and not breach.get(f"{kind}_breached")
+            ):
+                try:
+                    due = datetime.fromisoformat(ticket[due_field])
+                except (KeyError, TypeError, ValueError):
+                    pass
+
+            key = (ticket_id, kind)
+            if due is None:
+                self._scheduled.pop(key, None)
+            elif self._scheduled.get(key) != due:
+                self._scheduled[key] = due
+                heapq.heappush(self._heap, (due, ticket_id, kind))
+
+    def _sync(self, storage: BaseTicketStorage) -> None:
+        """Pick up new and changed tickets from the changes feed."""
+        changes = None
+        if storage is self._watched and self._version is not None:
+            version, changes = storage.get_changes(self._version)
+
+        if changes is None:
+            # First run or the feed lost track, rebuild from all tickets
+            version, _ = storage.get_changes(0, limit=0)
+            self._heap = []
+            self._scheduled = {}
+            for ticket in storage.load_all_tickets().values():
+                self._schedule(ticket)
+            self._watched = storage
+        else:
+            for ticket_id in dict.fromkeys(c["ticket_id"] for c in changes):
+                ticket = storage.get_ticket(ticket_id)
+                if ticket is None:
+                    for kind in SLA_DEADLINES:
+                        self._scheduled.pop((ticket_id, kind), None)
+                else:
+                    self._schedule(ticket)
+        self._version = version
+
+    def _flag(self, storage: BaseTicketStorage, ticket_id: int, kind: str) -> bool:
+        """Set a ticket's breach flag if the SLA is still unmet.
+
+        Returns:
+            True if the ticket was flagged.
+        """
+        due_field, met_field = SLA_DEADLINES[kind]
+        flag = f"{kind}_breached"
+        flagged = False
+
+        def mark_breached(ticket: Dict) -> bool:
+            nonlocal flagged
+            breach = ticket.get("sla_breach") or {}
+            due = ticket.get(due_field)
+            if (
+                ticket.get("status") in _DONE_STATUSES
+                or ticket.get(met_field)
+                or breach.get(flag)
+                or not due
+                or datetime.fromisoformat(due) > self._clock()
+            ):
+                return False
+
+            now = self._clock().isoformat()
+            ticket["sla_breach"] = {**breach, flag: True}
+            ticket["updated_at"] = now
+            ticket.setdefault("history", []).append(
+                {
+                    "timestamp": now,
+                    "action": "sla_breached",
+                    "actor": "IT Support System",
+                    "changes": {flag: True},
+                }
+            )
+            flagged = True
+            return True
+
+        storage.update_ticket(ticket_id, mark_breached)
+        return flagged
+
+    def run_pending(self) -> int:
+        """Pick up ticket changes and flag every deadline that has passed.
+
+        Returns:
+            Number of breach flags set.
+        """
+        storage = self._storage or get_storage()
+        self._sync(storage)
+
+        flagged = 0
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            due, ticket_id, kind = heapq.heappop(self._heap)
+            if self._scheduled.get((ticket_id, kind)) != due:
+                continue  # Superseded or met since it was scheduled
+            del self._scheduled[(ticket_id, kind)]
+            if self._flag(storage, ticket_id, kind):
+                logger.info("Ticket #%d breached its %s SLA", ticket_id, kind)
+                flagged += 1
+        return flagged
+
+    def seconds_until_next(self) -> float:
+        """Get how long to sleep before the next check."""
+        if not self._heap:
+            return self.poll_interval
+        wait = (self._heap[0][0] - self._clock()).total_seconds()
+        return max(0.0, min(wait, self.poll_interval))
+
+    def is_leader(self) -> bool:
+        """Check whether this scheduler should run the checks.
+
+        Tries to take the lock file if another process holds it.
+
+        Returns:
+            True if there is no lock file or this scheduler holds it.
+        """
+        if self.lock_path is None or fcntl is None:
+            return True
+        if self._lock_file is None:
+            lock_file = open(self.lock_path, "a+b")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            logger.info("Running SLA checks in this process")
+        return True
+
+    def _release(self) -> None:
+        """Let another process's scheduler take over."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _run(self) -> None:
+        """Check deadlines until stopped."""
+        while not self._stop.is_set():
+            try:
+                if self.is_leader():
+                    self.run_pending()
+            except Exception:
+                logger.exception("SLA check failed")
+            self._stop.wait(self.seconds_until_next())
+        self._release()
+
+    def start(self) -> None:
+        """Start checking deadlines in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="sla-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and wait for it to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,242 @@
+"""Compressed, read-only segments for archived tickets.
+
+Tickets that were closed long ago are moved out of the hot JSONL file into
+segment files, so loading and refreshing the hot file only pays for the
+active working set. Each segment is a gzip file made of independently
+compressed members of a few dozen tickets. Concatenated gzip members are
+still a valid gzip file, so segments can be inspected with zcat, while a
+single ticket is read by decompressing just its member.
+
+Next to every segment, an index file maps ticket IDs to the offset and
+length of their member and the ticket's line within it. The index file is
+written last, so a segment without one is incomplete and ignored.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .ticket_record import decode, encode
+from .ticket_search_index import TicketSearchIndex, ticket_text
+
+# Tickets per compressed member, trades random access cost for ratio
+BLOCK_SIZE = 64
+
+_SEGMENT_PATTERN = re.compile(r"segment-(\d+)\.idx$")
+
+# Directory mtimes younger than this may not reflect every rename yet
+_MTIME_SETTLE_NS = 1_000_000_000
+
+
+class TicketArchive:
+    """Thread-safe store of archived tickets in compressed segments.
+
+    Segments are only ever added, never modified. A ticket archived more
+    than once resolves to its copy in the newest segment. Segments written
+    by other processes are picked up when a lookup misses and the
+    directory's mtime has changed since it was last listed.
+
+    Writers in different processes must be serialized by the caller.
+    """
+
+    def __init__(self, directory: Path, block_size: int = BLOCK_SIZE):
+        """Initialize the archive.
+
+        Args:
+            directory: Directory holding the segment files. Created on the
+                first write.
+            block_size: Number of tickets per compressed member.
+        """
+        self.directory = directory
+        self.block_size = block_size
+        self._lock = RLock()
+        # ticket_id -> (segment, member offset, member length, line)
+        self._locations: Dict[int, Tuple[int, int, int, int]] = {}
+        self._segments: List[int] = []
+        # Directory mtime at the last listing that saw every segment
+        self._listed_mtime: Optional[int] = None
+        self._load_new_segments()
+
+    def __len__(self) -> int:
+        """Get the number of archived tickets."""
+        with self._lock:
+            return len(self._locations)
+
+    def _segment_path(self, segment: int) -> Path:
+        """Get the path of a segment's compressed tickets."""
+        return self.directory / f"segment-{segment:06d}.jsonl.gz"
+
+    def _index_path(self, segment: int) -> Path:
+        """Get the path of a segment's index."""
+        return self.directory / f"segment-{segment:06d}.idx"
+
+    def _load_new_segments(self) -> None:
+        """Load the indexes of complete segments not seen yet.
+
+        Only lists the directory if its mtime changed. Must be called with
+        the lock held.
+        """
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+            if mtime == self._listed_mtime:
+                return
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        # Renames within the mtime's granularity leave it unchanged, so a
+        # recent mtime is listed again next time
+        if time.time_ns() - mtime > _MTIME_SETTLE_NS:
+            self._listed_mtime = mtime
+
+        loaded = set(self._segments)
+        new_segments = sorted(
+            int(match.group(1))
+            for match in map(_SEGMENT_PATTERN.match, names)
+            if match and int(match.group(1)) not in loaded
+        )
+        for segment in new_segments:
+            with open(self._index_path(segment), "rb") as f:
+                entries = decode(f.read())
+            for ticket_id, offset, length, line in entries:
+                self._locations[ticket_id] = (segment, offset, length, line)
+            self._segments.append(segment)
+
+    def write_segment(self, tickets: List[Dict]) -> int:
+        """Write tickets to a new segment.
+
+        The segment and its index are fsynced and renamed into place, so
+        the tickets are durable once this returns.
+
+        Args:
+            tickets: Ticket dictionaries to archive.
+
+        Returns:
+            Number of the new segment.
+        """
+        with self._lock:
+            self._load_new_segments()
+            segment = max(self._segments, default=0) + 1
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            entries = []
+            data_path = self._segment_path(segment)
+            tmp_path = data_path.with_name(data_path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(tickets), self.block_size):
+                    block = tickets[start : start + self.block_size]
+                    member = gzip.compress(
+                        b"".join(encode(ticket) + b"\n" for ticket in block)
+                    )
+                    offset = f.tell()
+                    f.write(member)
+                    entries.extend(
+                        (ticket["id"], offset, len(member), line)
+                        for line, ticket in enumerate(block)
+                    )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, data_path)
+
+            index_path = self._index_path(segment)
+            tmp_path = index_path.with_name(index_path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(encode(entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, index_path)
+
+            for ticket_id, offset, length, line in entries:
+                self._locations[ticket_id] = (segment, offset, length, line)
+            self._segments.append(segment)
+            return segment
+
+    def get(self, ticket_id: int) -> Optional[Dict]:
+        """Read an archived ticket.
+
+        Args:
+            ticket_id: ID of the ticket.
+
+        Returns:
+            Ticket dictionary or None if not archived.
+        """
+        with self._lock:
+            location = self._locations.get(ticket_id)
+            if location is None:
+                self._load_new_segments()
+                location = self._locations.get(ticket_id)
+            if location is None:
+                return None
+
+        segment, offset, length, line = location
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            member = f.read(length)
+        return decode(gzip.decompress(member).splitlines()[line])
+
+    def iter_tickets(self) -> Iterator[Dict]:
+        """Iterate over the current version of every archived ticket.
+
+        Segments are decompressed as a stream, so memory use does not grow
+        with the size of the archive.
+        """
+        with self._lock:
+            self._load_new_segments()
+            locations = dict(self._locations)
+            segments = list(self._segments)
+
+        for segment in segments:
+            with gzip.open(self._segment_path(segment), "rb") as f:
+                for raw in f:
+                    ticket = decode(raw)
+                    location = locations.get(ticket["id"])
+                    # Skip copies superseded by a newer segment
+                    if location is not None and location[0] == segment:
+                        yield ticket
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        exclude: Optional[Set[int]] = None,
+    ) -> List[Dict]:
+        """Find archived tickets matching a text query, most relevant first.
+
+        Builds a temporary index over the whole archive, so this is meant
+        for occasional lookups rather than interactive search.
+
+        Args:
+            query: Search text, matched like TicketSearchIndex.search().
+            limit: Maximum number of tickets to return.
+            exclude: IDs of tickets to leave out.
+
+        Returns:
+            List of matching tickets.
+        """
+        index = TicketSearchIndex()
+        for ticket in self.iter_tickets():
+            if exclude is None or ticket["id"] not in exclude:
+                index.add(ticket["id"], ticket_text(ticket))
+
+        ticket_ids = [ticket_id for ticket_id, _ in index.search(query, limit=limit)]
+        return [self.get(ticket_id) for ticket_id in ticket_ids]
+
+    def reload(self) -> None:
+        """Forget loaded segments and read the directory again."""
+        with self._lock:
+            self._locations = {}
+            self._segments = []
+            self._listed_mtime = None
+            self._load_new_segments()
+
+    def clear(self) -> None:
+        """Delete all segments."""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._locations = {}
+            self._segments = []
+            self._listed_mtime = None
@@ -0,0 +1,159 @@
+"""In-memory feed of ticket changes for live updates.
+
+Every change a storage backend applies, whether made by this process or
+picked up from another one, is published as a (version, ticket_id, op)
+entry with a monotonic version. Clients remember the last version they saw
+and ask for what came after it, so they only download what changed instead
+of polling the full ticket list.
+
+The feed keeps the most recent changes in a bounded ring buffer. When a
+client falls further behind than that, or the storage had to rebuild its
+state from scratch, the feed can't tell what changed and the client is told
+to reload instead.
+"""
+
+import asyncio
+import uuid
+from collections import deque
+from itertools import islice
+from threading import Lock
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+# Number of most recent changes kept for clients catching up
+CHANGE_FEED_CAPACITY = 10000
+
+
+class TicketChangeFeed:
+    """Thread-safe, bounded log of ticket changes.
+
+    Ops are "create", "update", "delete" and "archive". Versions are local
+    to the feed, so clients get them as tokens prefixed with the feed's
+    random ID. A token from another worker process or from before a restart
+    doesn't parse, and the client is told to reload instead of being served
+    the wrong changes.
+    """
+
+    def __init__(self, capacity: int = CHANGE_FEED_CAPACITY):
+        """Initialize an empty feed.
+
+        Args:
+            capacity: Number of most recent changes to keep.
+        """
+        self.feed_id = uuid.uuid4().hex[:12]
+        self._lock = Lock()
+        self._changes: Deque[Dict] = deque(maxlen=capacity)
+        self._version = 0
+        # Clients at an older version missed changes that are not kept
+        self._floor = 0
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def version(self) -> int:
+        """Get the version of the latest change."""
+        return self._version
+
+    def token(self, version: int) -> str:
+        """Get the token clients pass back for a version.
+
+        Args:
+            version: Feed version.
+
+        Returns:
+            Version prefixed with the feed ID, like "3f9c1a2b7d4e.42".
+        """
+        return f"{self.feed_id}.{version}"
+
+    def parse(self, token: str) -> Optional[int]:
+        """Get the version of a token created by token().
+
+        Args:
+            token: Token received from a client.
+
+        Returns:
+            The version, or None if the token is malformed or belongs to
+            another feed.
+        """
+        feed_id, _, version = token.rpartition(".")
+        if feed_id != self.feed_id or not version.isdigit():
+            return None
+        return int(version)
+
+    def publish(self, changes: Iterable[Tuple[int, str]]) -> None:
+        """Append changes to the feed and wake up waiting clients.
+
+        Args:
+            changes: (ticket_id, op) pairs in the order they were applied.
+        """
+        with self._lock:
+            for ticket_id, op in changes:
+                if len(self._changes) == self._changes.maxlen:
+                    self._floor = self._changes[0]["version"]
+                self._version += 1
+                self._changes.append(
+                    {"version": self._version, "ticket_id": ticket_id, "op": op}
+                )
+            self._notify()
+
+    def reset(self) -> None:
+        """Drop all changes, clients have to reload all tickets."""
+        with self._lock:
+            self._version += 1
+            self._floor = self._version
+            self._changes.clear()
+            self._notify()
+
+    def since(
+        self, version: int, limit: Optional[int] = None
+    ) -> Tuple[int, Optional[List[Dict]]]:
+        """Get the changes after a version.
+
+        Args:
+            version: Latest version the client has seen, 0 if none.
+            limit: Maximum number of changes to return. The client continues
+                from the version of the last one.
+
+        Returns:
+            The feed's current version and the changes in version order, or
+            None instead of the changes if the client must reload because
+            they are no longer known.
+        """
+        with self._lock:
+            if version < self._floor or version > self._version:
+                return self._version, None
+
+            start = version - self._version + len(self._changes)
+            stop = None if limit is None else start + limit
+            return self._version, list(islice(self._changes, start, stop))
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        """Wait until the feed moves past a version.
+
+        Args:
+            version: Latest version the client has seen.
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            True if there are newer changes, False on timeout.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._version != version:
+                return True
+            self._waiters.add(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def _notify(self) -> None:
+        """Wake up all waiters. Must be called with the lock held."""
+        for loop, event in self._waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # Loop closed, the waiter is gone
+                pass
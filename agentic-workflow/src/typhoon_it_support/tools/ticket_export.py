@@ -0,0 +1,210 @@
+"""Encoding of ticket exports, written one page of tickets at a time.
+
+Exports are produced incrementally so the API can stream them while it
+pages through the storage: memory use depends on the page size, not on the
+number of tickets exported.
+
+Besides CSV, tickets can be exported as an Arrow IPC stream with typed
+columns, which BI tools read directly without parsing text. The Arrow
+export needs pyarrow, installed with the "arrow" extra.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional, only needed for the Arrow export
+    pa = None
+
+CSV_HEADER = [
+    "ID",
+    "Subject",
+    "Status",
+    "Priority",
+    "Category",
+    "Assignee",
+    "Requester Name",
+    "Requester Email",
+    "Created At",
+    "Updated At",
+    "Due Date",
+    "First Response At",
+    "Resolved At",
+    "SLA First Response Breached",
+    "SLA Resolution Breached",
+    "Tags",
+    "Description",
+]
+
+# Ticket fields exported as Arrow timestamps
+_TIMESTAMP_FIELDS = (
+    "created_at",
+    "updated_at",
+    "due_date",
+    "first_response_at",
+    "resolved_at",
+    "sla_first_response_due",
+    "sla_resolution_due",
+)
+
+
+def csv_row(ticket: Dict) -> List[Any]:
+    """Get the CSV_HEADER columns of a ticket."""
+    return [
+        ticket["id"],
+        ticket["subject"],
+        ticket["status"],
+        ticket["priority"],
+        ticket.get("category", "other"),
+        ticket.get("assignee_name", "Unassigned"),
+        ticket["requester_name"],
+        ticket["requester_email"],
+        ticket["created_at"],
+        ticket["updated_at"],
+        ticket.get("due_date", ""),
+        ticket.get("first_response_at", ""),
+        ticket.get("resolved_at", ""),
+        ticket.get("sla_breach", {}).get("first_response_breached", False),
+        ticket.get("sla_breach", {}).get("resolution_breached", False),
+        ", ".join(ticket.get("tags", [])),
+        ticket["description"],
+    ]
+
+
+def csv_chunk(tickets: List[Dict], header: bool = False) -> str:
+    """Encode tickets as CSV lines.
+
+    Args:
+        tickets: Tickets to encode.
+        header: Start with the header line.
+
+    Returns:
+        CSV text of the tickets.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    if header:
+        writer.writerow(CSV_HEADER)
+    writer.writerows(csv_row(ticket) for ticket in tickets)
+    return output.getvalue()
+
+
+def arrow_available() -> bool:
+    """Check whether pyarrow is installed."""
+    return pa is not None
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an ISO timestamp, None for missing or malformed values."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _ChunkSink:
+    """Write-only file that hands out what was written since the last call."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        """Get and forget the bytes written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ArrowStreamEncoder:
+    """Encodes pages of tickets as record batches of an Arrow IPC stream.
+
+    The output of write() calls followed by close() concatenates to one
+    stream, readable with pyarrow.ipc.open_stream().
+    """
+
+    def __init__(self) -> None:
+        """Initialize the encoder.
+
+        Raises:
+            RuntimeError: If pyarrow is not installed.
+        """
+        if pa is None:
+            raise RuntimeError("Arrow export requires pyarrow to be installed")
+
+        self.schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("subject", pa.string()),
+                ("status", pa.dictionary(pa.int8(), pa.string())),
+                ("priority", pa.dictionary(pa.int8(), pa.string())),
+                ("category", pa.dictionary(pa.int8(), pa.string())),
+                ("assignee_id", pa.string()),
+                ("assignee_name", pa.string()),
+                ("requester_name", pa.string()),
+                ("requester_email", pa.string()),
+                *((field, pa.timestamp("us")) for field in _TIMESTAMP_FIELDS),
+                ("sla_first_response_breached", pa.bool_()),
+                ("sla_resolution_breached", pa.bool_()),
+                ("tags", pa.list_(pa.string())),
+                ("description", pa.string()),
+                ("version", pa.int64()),
+            ]
+        )
+        self._sink = _ChunkSink()
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, tickets: List[Dict]) -> bytes:
+        """Encode tickets as one record batch.
+
+        Args:
+            tickets: Tickets to encode.
+
+        Returns:
+            Stream bytes, starting with the schema on the first call.
+        """
+        columns: Dict[str, List[Any]] = {name: [] for name in self.schema.names}
+        for ticket in tickets:
+            breach = ticket.get("sla_breach") or {}
+            for name, values in columns.items():
+                if name in _TIMESTAMP_FIELDS:
+                    values.append(_parse_timestamp(ticket.get(name)))
+                elif name == "sla_first_response_breached":
+                    values.append(bool(breach.get("first_response_breached")))
+                elif name == "sla_resolution_breached":
+                    values.append(bool(breach.get("resolution_breached")))
+                else:
+                    values.append(ticket.get(name))
+
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Finish the stream.
+
+        Returns:
+            Remaining stream bytes, the schema if nothing was written.
+        """
+        self._writer.close()
+        return self._sink.drain()
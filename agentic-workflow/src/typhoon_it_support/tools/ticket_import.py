@@ -0,0 +1,228 @@
+"""Creation of tickets imported in bulk, one batch of records at a time.
+
+Creating tickets one by one costs an ID reservation, an SLA computation and
+a locked, flushed write per ticket, which adds up when tens of thousands of
+tickets are migrated from another helpdesk. Here a whole batch of validated
+records becomes tickets at once: SLA due dates and breach flags are computed
+as numpy arrays over the batch, one block of IDs is reserved and all
+tickets are written with a single save_tickets() call.
+"""
+
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .ticket_columns import priority_codes, sla_breaches, sla_deadlines
+from .ticket_storage import BaseTicketStorage, get_storage
+from .ticket_tools import (
+    AVAILABLE_AGENTS,
+    TicketCategory,
+    TicketPriority,
+    TicketStatus,
+)
+
+# Records validated and written together
+IMPORT_BATCH_SIZE = 1000
+
+_AGENTS = {agent["id"]: agent for agent in AVAILABLE_AGENTS}
+
+# Record field -> valid values
+_CHOICES = {
+    "priority": [p.value for p in TicketPriority],
+    "status": [s.value for s in TicketStatus],
+    "category": [c.value for c in TicketCategory],
+}
+
+
+async def ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of bytes into lines.
+
+    Args:
+        chunks: Body chunks, split anywhere.
+
+    Yields:
+        Every line without its line ending, including blank lines, so
+        callers can count line numbers.
+    """
+    pending = b""
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
+
+def record_error(record: Dict) -> Optional[str]:
+    """Check the values of a parsed import record.
+
+    Args:
+        record: Record with the fields of TicketImportRecord.
+
+    Returns:
+        Error message, None if the record is valid.
+    """
+    for field, choices in _CHOICES.items():
+        if record[field] not in choices:
+            return f"Invalid {field}. Valid options: {', '.join(choices)}"
+    if record["assignee_id"] is not None and record["assignee_id"] not in _AGENTS:
+        return f"Invalid assignee. Valid options: {', '.join(_AGENTS)}"
+    return None
+
+
+def _local(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a timestamp to naive local time, as stored in tickets."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _isoformat(values: np.ndarray) -> List[str]:
+    """Format datetime64[us] values like datetime.isoformat()."""
+    whole_seconds = values.astype(np.int64) % 1_000_000 == 0
+    return np.where(
+        whole_seconds,
+        np.datetime_as_string(values, unit="s"),
+        np.datetime_as_string(values, unit="us"),
+    ).tolist()
+
+
+def sla_fields(
+    priorities: Sequence[str],
+    created_at: Sequence[datetime],
+    first_response_at: Sequence[Optional[datetime]],
+    resolved_at: Sequence[Optional[datetime]],
+    now: Optional[datetime] = None,
+) -> List[Dict]:
+    """Compute the SLA fields of many tickets at once.
+
+    Gives the same results as _calculate_sla_targets() and
+    _check_sla_breach() called for each ticket.
+
+    Args:
+        priorities: Ticket priorities.
+        created_at: Creation times.
+        first_response_at: First response times, None if not responded.
+        resolved_at: Resolution times, None if not resolved.
+        now: Time to check unmet SLAs against. Defaults to datetime.now().
+
+    Returns:
+        Per ticket, its sla_first_response_due, sla_resolution_due and
+        sla_breach fields.
+    """
+    created = np.array(created_at, dtype="datetime64[us]")
+    current = np.datetime64(now or datetime.now(), "us")
+    first_response, resolution = sla_deadlines(created, priority_codes(priorities))
+
+    first_response_due = _isoformat(first_response)
+    resolution_due = _isoformat(resolution)
+    first_response_breached = sla_breaches(
+        first_response, np.array(first_response_at, dtype="datetime64[us]"), current
+    ).tolist()
+    resolution_breached = sla_breaches(
+        resolution, np.array(resolved_at, dtype="datetime64[us]"), current
+    ).tolist()
+    return [
+        {
+            "sla_first_response_due": first_response_due[i],
+            "sla_resolution_due": resolution_due[i],
+            "sla_breach": {
+                "first_response_breached": first_response_breached[i],
+                "resolution_breached": resolution_breached[i],
+            },
+        }
+        for i in range(len(priorities))
+    ]
+
+
+def build_tickets(
+    records: List[Dict], first_id: int, now: Optional[datetime] = None
+) -> List[Dict]:
+    """Turn import records into tickets.
+
+    Args:
+        records: Records accepted by record_error().
+        first_id: ID of the first ticket, the others follow consecutively.
+        now: Time of the import. Defaults to datetime.now().
+
+    Returns:
+        Tickets in record order.
+    """
+    now = now or datetime.now()
+    imported_at = now.isoformat()
+    created = [_local(r["created_at"]) or now for r in records]
+    first_response = [_local(r["first_response_at"]) for r in records]
+    resolved = [_local(r["resolved_at"]) for r in records]
+    sla = sla_fields(
+        [r["priority"] for r in records], created, first_response, resolved, now
+    )
+
+    tickets = []
+    for offset, record in enumerate(records):
+        created_at = created[offset].isoformat()
+        updated_at = _local(record["updated_at"])
+        due_date = _local(record["due_date"])
+        agent = _AGENTS.get(record["assignee_id"])
+        tickets.append(
+            {
+                "id": first_id + offset,
+                "subject": record["subject"],
+                "description": record["description"],
+                "priority": record["priority"],
+                "status": record["status"],
+                "requester_email": record["requester_email"],
+                "requester_name": record["requester_name"],
+                "created_at": created_at,
+                "updated_at": updated_at.isoformat() if updated_at else created_at,
+                "comments": record["comments"],
+                "assignee_id": agent["id"] if agent else None,
+                "assignee_name": agent["name"] if agent else None,
+                "tags": list(dict.fromkeys(tag.lower() for tag in record["tags"])),
+                "category": record["category"],
+                "due_date": due_date.isoformat() if due_date else None,
+                "first_response_at": (
+                    first_response[offset].isoformat()
+                    if first_response[offset]
+                    else None
+                ),
+                "resolved_at": (
+                    resolved[offset].isoformat() if resolved[offset] else None
+                ),
+                **sla[offset],
+                "history": [
+                    {
+                        "timestamp": imported_at,
+                        "action": "imported",
+                        "actor": "IT Support System",
+                        "changes": {
+                            "status": record["status"],
+                            "priority": record["priority"],
+                        },
+                    }
+                ],
+            }
+        )
+    return tickets
+
+
+def import_tickets(
+    records: List[Dict], storage: Optional[BaseTicketStorage] = None
+) -> List[int]:
+    """Create tickets from a batch of import records in a single write.
+
+    Args:
+        records: Records accepted by record_error().
+        storage: Storage to write to. Defaults to the global storage.
+
+    Returns:
+        IDs of the created tickets, in record order.
+    """
+    if not records:
+        return []
+    storage = storage or get_storage()
+    first_id = storage.reserve_ids(len(records))
+    tickets = build_tickets(records, first_id)
+    storage.save_tickets(tickets)
+    return [ticket["id"] for ticket in tickets]
@@ -0,0 +1,97 @@
+"""Array-backed index of where ticket records are in the JSONL file."""
+
+from array import array
+from typing import Optional, Tuple
+
+# IDs further than this past the highest indexed ID are not indexed, so a
+# stray huge ID can't blow up the arrays
+MAX_ID_GAP = 1 << 20
+
+
+class TicketOffsetIndex:
+    """Maps ticket IDs to the byte offset and length of a record.
+
+    Ticket IDs are small consecutive integers, so locations are kept in two
+    flat arrays indexed by ID. That costs 12 bytes per ticket, where a dict
+    of tuples would need well over 100.
+
+    Not thread-safe, callers must serialize access.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._offsets = array("q")
+        self._lengths = array("i")
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Get the number of indexed tickets."""
+        return self._count
+
+    def get(self, ticket_id: int) -> Optional[Tuple[int, int]]:
+        """Look up a ticket's record.
+
+        Args:
+            ticket_id: ID of the ticket.
+
+        Returns:
+            (offset, length) of the record, or None if not indexed.
+        """
+        if 0 <= ticket_id < len(self._offsets):
+            offset = self._offsets[ticket_id]
+            if offset >= 0:
+                return offset, self._lengths[ticket_id]
+        return None
+
+    def set(self, ticket_id: int, offset: int, length: int) -> bool:
+        """Record where a ticket's record is.
+
+        Args:
+            ticket_id: ID of the ticket.
+            offset: Byte offset of the record.
+            length: Length of the record in bytes.
+
+        Returns:
+            False if the ID is out of range and was not indexed.
+        """
+        size = len(self._offsets)
+        if ticket_id < 0 or ticket_id >= size + MAX_ID_GAP:
+            return False
+
+        if ticket_id >= size:
+            # Grow geometrically so appending new IDs is amortized O(1)
+            grow = max(ticket_id + 1 - size, size, 1024)
+            self._offsets.extend(array("q", [-1]) * grow)
+            self._lengths.extend(array("i", [0]) * grow)
+
+        if self._offsets[ticket_id] < 0:
+            self._count += 1
+        self._offsets[ticket_id] = offset
+        self._lengths[ticket_id] = length
+        return True
+
+    def discard(self, ticket_id: int) -> None:
+        """Forget a ticket's record, if indexed.
+
+        Args:
+            ticket_id: ID of the ticket.
+        """
+        if 0 <= ticket_id < len(self._offsets) and self._offsets[ticket_id] >= 0:
+            self._offsets[ticket_id] = -1
+            self._count -= 1
+
+    def shift(self, start: int, delta: int) -> None:
+        """Move all records at or after an offset by delta bytes.
+
+        Args:
+            start: First offset to move.
+            delta: Number of bytes to add to the offsets.
+        """
+        offsets = self._offsets
+        for i, offset in enumerate(offsets):
+            if offset >= start:
+                offsets[i] = offset + delta
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.__init__()
@@ -0,0 +1,290 @@
+"""Full-text inverted index for ticket search.
+
+Thai is written without spaces between words, so Thai text is indexed as
+overlapping character bigrams while other scripts are split into words.
+Results are ranked with BM25.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Ticket fields that make up the searchable text
+TEXT_FIELDS = ("subject", "description", "comments")
+
+# Runs of Thai characters, or words in any other script
+_TOKEN_PATTERN = re.compile(r"[\u0e00-\u0e7f]+|[^\W_\u0e00-\u0e7f]+")
+
+
+def words(text: str) -> List[str]:
+    """Split text into lowercased words, keeping runs of Thai whole.
+
+    Args:
+        text: Text to split.
+
+    Returns:
+        Words in order of appearance.
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into index terms.
+
+    Args:
+        text: Text to tokenize.
+
+    Returns:
+        Lowercased words for non-Thai text and character bigrams for Thai.
+    """
+    tokens = []
+    for run in words(text):
+        if "\u0e00" <= run[0] <= "\u0e7f" and len(run) > 1:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def ticket_text(ticket: Dict) -> str:
+    """Get the searchable text of a ticket.
+
+    Args:
+        ticket: Ticket dictionary.
+
+    Returns:
+        Subject, description and comment bodies joined by newlines.
+    """
+    parts = [ticket.get("subject", ""), ticket.get("description", "")]
+    parts.extend(
+        comment.get("body", "")
+        for comment in ticket.get("comments") or []
+        if isinstance(comment, dict)
+    )
+    return "\n".join(parts)
+
+
+class TicketSearchIndex:
+    """Incrementally updated inverted index with BM25 ranking.
+
+    Query terms must all match (AND). A query term also matches index terms
+    it is a prefix of, so "print" finds "printer". Candidates are found by
+    intersecting postings smallest first, so finding them costs in
+    proportion to the rarest term rather than to the number of indexed
+    tickets. With a limit, matches are scored shortest first and scoring
+    stops as soon as an upper bound on the remaining scores, from each
+    term's highest frequency, can't beat the best `limit` found so far.
+
+    Not thread-safe, callers must serialize access.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index.
+
+        Args:
+            k1: BM25 term frequency saturation.
+            b: BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+        # Highest frequency of each term. Not lowered on removal, it only
+        # has to be an upper bound.
+        self._max_tf: Dict[str, int] = {}
+        # Sorted vocabulary for prefix lookups
+        self._terms: List[str] = []
+
+    def __len__(self) -> int:
+        """Get the number of indexed tickets."""
+        return len(self._doc_lengths)
+
+    def add(self, ticket_id: int, text: str) -> None:
+        """Index a ticket's text, replacing any previous version.
+
+        Args:
+            ticket_id: ID of the ticket.
+            text: Searchable text, see ticket_text().
+        """
+        self.remove(ticket_id)
+
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[ticket_id] = count
+            if count > self._max_tf.get(term, 0):
+                self._max_tf[term] = count
+
+        self._doc_terms[ticket_id] = counts
+        self._doc_lengths[ticket_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, ticket_id: int) -> None:
+        """Remove a ticket from the index.
+
+        Args:
+            ticket_id: ID of the ticket.
+        """
+        counts = self._doc_terms.pop(ticket_id, None)
+        if counts is None:
+            return
+
+        for term in counts:
+            postings = self._postings[term]
+            del postings[ticket_id]
+            if not postings:
+                del self._postings[term]
+                del self._max_tf[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+        self._total_length -= self._doc_lengths.pop(ticket_id)
+
+    def clear(self) -> None:
+        """Remove all tickets from the index."""
+        self.__init__(self.k1, self.b)
+
+    def _expand(self, term: str) -> List[str]:
+        """Get the index terms starting with a query term."""
+        start = bisect_left(self._terms, term)
+        end = start
+        while end < len(self._terms) and self._terms[end].startswith(term):
+            end += 1
+        return self._terms[start:end]
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        candidates: Optional[Set[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Find tickets containing all query terms, best matches first.
+
+        Args:
+            query: Search text.
+            limit: Maximum number of results to return.
+            candidates: If given, only consider these ticket IDs.
+
+        Returns:
+            (ticket_id, score) pairs sorted by descending score.
+        """
+        matched, groups = self._match(query, candidates)
+        if not matched:
+            return []
+        return self._rank(matched, groups, limit)
+
+    def match(self, query: str, candidates: Optional[Set[int]] = None) -> Set[int]:
+        """Find tickets containing all query terms, without ranking them.
+
+        Args:
+            query: Search text.
+            candidates: If given, only consider these ticket IDs.
+
+        Returns:
+            IDs of the matching tickets.
+        """
+        return self._match(query, candidates)[0]
+
+    def _match(
+        self, query: str, candidates: Optional[Set[int]]
+    ) -> Tuple[Set[int], List[List[str]]]:
+        """Intersect the postings of all query terms.
+
+        Returns:
+            Matching ticket IDs and the index terms of each query term, for
+            ranking.
+        """
+        groups: List[List[str]] = []
+        for term in dict.fromkeys(tokenize(query)):
+            terms = self._expand(term)
+            if not terms:
+                return set(), []
+            groups.append(terms)
+
+        if not groups:
+            return set(), []
+
+        # Start from the rarest term and only probe the survivors afterwards
+        groups.sort(key=lambda terms: sum(len(self._postings[t]) for t in terms))
+        matched = set().union(*(self._postings[t] for t in groups[0]))
+        if candidates is not None:
+            matched &= candidates
+        for terms in groups[1:]:
+            if not matched:
+                break
+            postings = [self._postings[t] for t in terms]
+            matched = {doc for doc in matched if any(doc in p for p in postings)}
+        return matched, groups
+
+    def _rank(
+        self,
+        docs: Iterable[int],
+        groups: List[List[str]],
+        limit: Optional[int],
+    ) -> List[Tuple[int, float]]:
+        """Score matched tickets with BM25 and keep the top ones.
+
+        A term adds at most idf * T * (k1 + 1) / (T + norm) to a ticket's
+        score, T being its highest frequency. norm grows with the ticket's
+        length, so the shortest unscored ticket has the highest bound and
+        no ticket after it can make the top `limit` once its bound is
+        below the lowest score kept.
+        """
+        doc_count = len(self._doc_lengths)
+        avg_length = self._total_length / doc_count if doc_count else 1.0
+        weighted = []
+        for terms in groups:
+            for term in terms:
+                postings = self._postings[term]
+                idf = math.log(
+                    1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                weighted.append((postings, idf, self._max_tf[term]))
+
+        def norm(length: int) -> float:
+            return self.k1 * (1 - self.b + self.b * length / avg_length)
+
+        def score(doc: int) -> float:
+            doc_norm = norm(self._doc_lengths[doc])
+            total = 0.0
+            for postings, idf, _ in weighted:
+                tf = postings.get(doc)
+                if tf:
+                    total += idf * tf * (self.k1 + 1) / (tf + doc_norm)
+            return total
+
+        def bound(length: int) -> float:
+            length_norm = norm(length)
+            return sum(
+                idf * max_tf * (self.k1 + 1) / (max_tf + length_norm)
+                for _, idf, max_tf in weighted
+            )
+
+        # Ties go to the newer (higher) ticket ID
+        if limit is None:
+            best = sorted(((score(doc), doc) for doc in docs), reverse=True)
+            return [(doc, value) for value, doc in best]
+
+        queue = [(self._doc_lengths[doc], doc) for doc in docs]
+        heapq.heapify(queue)
+        top: List[Tuple[float, int]] = []
+        while queue and limit > 0:
+            length, doc = heapq.heappop(queue)
+            if len(top) == limit and bound(length) < top[0][0]:
+                break
+            scored = (score(doc), doc)
+            if len(top) < limit:
+                heapq.heappush(top, scored)
+            elif scored > top[0]:
+                heapq.heapreplace(top, scored)
+        return [(doc, value) for value, doc in sorted(top, reverse=True)]
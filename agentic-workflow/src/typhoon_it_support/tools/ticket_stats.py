@@ -0,0 +1,125 @@
+"""Ticket counters for the statistics dashboard."""
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, Mapping, Optional
+
+# Statuses of tickets still waiting for the support team
+OPEN_STATUSES = frozenset(("new", "open", "pending"))
+
+# Key used for tickets without an assignee
+UNASSIGNED = "unassigned"
+
+
+class TicketStats:
+    """Ticket counts broken down by status, priority, category and assignee.
+
+    Counters are updated ticket by ticket with add() and remove(), so a
+    storage backend can keep them current on every write and answer
+    to_dict() without looking at any ticket.
+
+    Not thread-safe, callers must serialize access.
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counters to zero."""
+        self.total = 0
+        self.sla_breached = 0
+        self.by_status: Counter = Counter()
+        self.by_priority: Counter = Counter()
+        self.by_category: Counter = Counter()
+        self.by_assignee: Counter = Counter()
+        self.open_by_assignee: Counter = Counter()
+        self.status_by_priority: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, ticket: Mapping[str, Any], count: int = 1) -> None:
+        """Count a ticket.
+
+        Args:
+            ticket: Ticket, only the counted fields are read.
+            count: Number of tickets like it to add, negative to remove.
+        """
+        breach = ticket.get("sla_breach") or {}
+        self.add_group(
+            ticket.get("status"),
+            ticket.get("priority"),
+            ticket.get("category"),
+            ticket.get("assignee_id"),
+            bool(breach.get("resolution_breached")),
+            count,
+        )
+
+    def remove(self, ticket: Mapping[str, Any]) -> None:
+        """Stop counting a ticket previously passed to add().
+
+        Args:
+            ticket: Ticket as it was when it was added.
+        """
+        self.add(ticket, -1)
+
+    def add_group(
+        self,
+        status: Optional[str],
+        priority: Optional[str],
+        category: Optional[str],
+        assignee_id: Optional[str],
+        sla_breached: bool,
+        count: int,
+    ) -> None:
+        """Count tickets sharing the same counted field values.
+
+        Args:
+            status: Status of the tickets.
+            priority: Priority of the tickets.
+            category: Category of the tickets.
+            assignee_id: Assignee of the tickets, None if unassigned.
+            sla_breached: Whether their resolution SLA is breached.
+            count: Number of tickets, negative to remove them.
+        """
+        self.total += count
+        if sla_breached:
+            self.sla_breached += count
+        assignee = assignee_id or UNASSIGNED
+        self._count(self.by_assignee, assignee, count)
+        if status is not None:
+            self._count(self.by_status, status, count)
+            if status in OPEN_STATUSES:
+                self._count(self.open_by_assignee, assignee, count)
+        if priority is not None:
+            self._count(self.by_priority, priority, count)
+        if status is not None and priority is not None:
+            self._count(self.status_by_priority[status], priority, count)
+            if not self.status_by_priority[status]:
+                del self.status_by_priority[status]
+        if category is not None:
+            self._count(self.by_category, category, count)
+
+    @staticmethod
+    def _count(counter: Counter, key: str, count: int) -> None:
+        """Adjust one counter, dropping keys that reach zero."""
+        value = counter[key] + count
+        if value:
+            counter[key] = value
+        else:
+            del counter[key]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the counters as plain dictionaries.
+
+        Returns:
+            Dictionary with the total, the number of tickets with a breached
+            resolution SLA and counts by status, priority, category,
+            assignee, open tickets by assignee and status by priority.
+        """
+        return {
+            "total": self.total,
+            "by_status": dict(self.by_status),
+            "by_priority": dict(self.by_priority),
+            "by_category": dict(self.by_category),
+            "by_assignee": dict(self.by_assignee),
+            "open_by_assignee": dict(self.open_by_assignee),
+            "status_by_priority": {
+                status: dict(counts)
+                for status, counts in self.status_by_priority.items()
+            },
+            "sla_breached": self.sla_breached,
+        }
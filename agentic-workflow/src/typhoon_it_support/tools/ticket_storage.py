@@ -1,54 +1,1567 @@
-"""JSONL-based ticket storage system."""
+"""Ticket storage backends.
 
+The default backend appends tickets to a JSONL file. A SQLite backend is
+available for larger deployments, see ticket_storage_sqlite.py.
+"""
+
+import base64
+import copy
 import json
+import logging
+import mmap
+import os
+import tempfile
+import zlib
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from threading import Lock
-from typing import Dict, Optional
+from threading import RLock, Thread
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows, writers are only serialized within one process
+    fcntl = None
+
+from ..config import get_settings
+from .ticket_archive import TicketArchive
+from .ticket_changes import TicketChangeFeed
+from .ticket_offset_index import TicketOffsetIndex
+from .ticket_record import Ticket, decode, encode
+from .ticket_search_index import TEXT_FIELDS, TicketSearchIndex, ticket_text
+from .ticket_stats import TicketStats
 
 TICKETS_FILE = Path(__file__).parent.parent.parent.parent / "tickets.jsonl"
-_storage_lock = Lock()
+FIRST_TICKET_ID = 1000
+_storage_lock = RLock()
+
+logger = logging.getLogger(__name__)
+
+# When appended records are flushed to disk: never, once per batch or per record
+FSYNC_POLICIES = ("none", "batch", "write")
+
+# Mutates a ticket in place, returning False skips saving it
+TicketMutator = Callable[[Dict], Optional[bool]]
+
+# Ticket fields with an exact-match secondary index, "tags" is indexed per tag
+INDEXED_FIELDS = ("status", "priority", "assignee_id", "category")
+
+# Fields of the summary view of a ticket, enough to show it in a list
+SUMMARY_FIELDS = (
+    "id",
+    "subject",
+    "status",
+    "priority",
+    "category",
+    "assignee_id",
+    "assignee_name",
+    "tags",
+    "created_at",
+    "updated_at",
+    "first_response_at",
+    "resolved_at",
+    "sla_breach",
+    "version",
+)
+
+# Fields kept in memory for tickets that can be re-read from their record
+RESIDENT_FIELDS = tuple(dict.fromkeys((*SUMMARY_FIELDS, *INDEXED_FIELDS)))
+_RESIDENT_FIELD_SET = frozenset(RESIDENT_FIELDS)
+
+# Windows can't replace a file that is held open, so records aren't re-read
+_KEEP_FILE_OPEN = os.name != "nt"
+
+# Statuses of tickets the retention job moves to the archive
+ARCHIVED_STATUSES = ("solved", "closed")
+
+
+# Lines end with a CRC32 of the rest of the record: {..., "_crc": "1a2b3c4d"}
+_CRC_PREFIX = b', "_crc": "'
+_CRC_SUFFIX_LENGTH = len(_CRC_PREFIX) + len(b'00000000"}')
+
+
+def _seal(data: bytes) -> bytes:
+    """Turn an encoded JSON object into a file line with a checksum."""
+    return data[:-1] + _CRC_PREFIX + b'%08x"}\n' % zlib.crc32(data)
+
+
+def _unseal(line: bytes) -> Optional[bytes]:
+    """Verify and strip the checksum of a file line.
+
+    Lines written before checksums were added are returned unchanged.
+
+    Returns:
+        The serialized JSON object, or None if the checksum doesn't match.
+    """
+    if line[-_CRC_SUFFIX_LENGTH:-10] != _CRC_PREFIX or not line.endswith(b'"}'):
+        return line
+
+    data = line[:-_CRC_SUFFIX_LENGTH] + b"}"
+    try:
+        crc = int(line[-10:-2], 16)
+    except ValueError:
+        return None
+    return data if zlib.crc32(data) == crc else None
+
+
+def _sort_key(ticket: Dict) -> Tuple[str, int]:
+    """Get the key tickets are listed by, newest first."""
+    return ticket.get("created_at", ""), ticket["id"]
+
+
+def ticket_version(ticket: Mapping[str, Any]) -> str:
+    """Get a token that changes whenever a ticket changes.
+
+    Besides the ticket's version it holds a checksum of its creation time,
+    because clear() starts IDs over and a new ticket can get the ID and
+    version of a deleted one.
+
+    Args:
+        ticket: Ticket, only "version" and "created_at" are read.
+
+    Returns:
+        Version token.
+    """
+    created_at = str(ticket.get("created_at", "")).encode("utf-8")
+    return f"{ticket.get('version', 0)}-{zlib.crc32(created_at):08x}"
+
+
+def encode_cursor(ticket: Dict) -> str:
+    """Encode the position after a ticket as an opaque pagination cursor.
+
+    Args:
+        ticket: Last ticket of the current page.
+
+    Returns:
+        URL-safe cursor string.
+    """
+    raw = json.dumps(list(_sort_key(ticket)), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def next_cursor(tickets: List[Dict], limit: Optional[int]) -> Optional[str]:
+    """Get the cursor of the page following a page of query results.
+
+    Args:
+        tickets: Tickets returned by query_tickets().
+        limit: Limit the page was fetched with.
+
+    Returns:
+        Cursor after the last ticket, or None if the page was not full.
+    """
+    if not tickets or limit is None or len(tickets) < limit:
+        return None
+    return encode_cursor(tickets[-1])
+
+
+def status_values(status: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+    """Get the statuses matched by a status filter.
+
+    Args:
+        status: One status or several.
+
+    Returns:
+        Statuses, without duplicates.
+    """
+    if isinstance(status, str):
+        return (status,)
+    return tuple(dict.fromkeys(status))
+
+
+def projection(fields: Sequence[str]) -> Tuple[str, ...]:
+    """Get the fields to return for a requested projection.
+
+    "id" and "created_at" are always included, cursors are made from them.
+
+    Args:
+        fields: Requested ticket fields.
+
+    Returns:
+        Fields to return, without duplicates.
+    """
+    return tuple(dict.fromkeys(("id", "created_at", *fields)))
+
+
+def project_ticket(ticket: Mapping[str, Any], fields: Sequence[str]) -> Dict:
+    """Get only some fields of a ticket.
+
+    Args:
+        ticket: Ticket to project.
+        fields: Fields to keep, from projection().
+
+    Returns:
+        Dictionary with exactly these fields, None for ones the ticket
+        doesn't have.
+    """
+    return {field: ticket.get(field) for field in fields}
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a pagination cursor created by encode_cursor().
+
+    Args:
+        cursor: Cursor string.
+
+    Returns:
+        (created_at, id) sort key of the last ticket seen.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, ticket_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+    if not isinstance(created_at, str) or not isinstance(ticket_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, ticket_id
+
+
+class TicketVersionConflictError(Exception):
+    """Raised when a ticket changed since the version the caller read."""
+
+    def __init__(self, ticket_id: int, expected_version: int, actual_version: int):
+        """Initialize the error.
+
+        Args:
+            ticket_id: ID of the ticket being updated.
+            expected_version: Version the caller based its changes on.
+            actual_version: Version currently stored.
+        """
+        super().__init__(
+            f"Ticket #{ticket_id} is at version {actual_version}, "
+            f"expected {expected_version}"
+        )
+        self.ticket_id = ticket_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+
+
+class BaseTicketStorage(ABC):
+    """Interface shared by all ticket storage backends.
+
+    Backends must implement the basic CRUD operations. Queries and statistics
+    have generic implementations on top of load_all_tickets() which backends
+    can override to push the work down to their storage engine.
+
+    Backends publish every change they apply to their changes feed.
+    """
+
+    changes: TicketChangeFeed
+
+    @abstractmethod
+    def load_all_tickets(self) -> Dict[int, Dict]:
+        """Load all tickets.
+
+        Returns:
+            Dictionary mapping ticket_id to ticket data.
+        """
+
+    @abstractmethod
+    def save_ticket(self, ticket: Dict) -> None:
+        """Save or update a ticket.
+
+        The ticket's "version" field is set to one more than the stored version.
+
+        Args:
+            ticket: Ticket dictionary to save.
+        """
+
+    @abstractmethod
+    def update_ticket(
+        self,
+        ticket_id: int,
+        mutator: TicketMutator,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict]:
+        """Atomically load, mutate and save a ticket.
+
+        The mutator receives a private copy of the ticket and runs while the
+        storage is locked, so no other update can be lost in between. If it
+        raises, nothing is saved.
+
+        Args:
+            ticket_id: ID of ticket to update.
+            mutator: Function mutating the ticket in place. Returning False
+                leaves the stored ticket unchanged.
+            expected_version: If given, only update the ticket if it is still
+                at this version.
+
+        Returns:
+            The updated ticket, or None if not found.
+
+        Raises:
+            TicketVersionConflictError: If expected_version doesn't match.
+        """
+
+    @abstractmethod
+    def save_tickets(self, tickets: List[Dict]) -> None:
+        """Save or update many tickets in a single write.
+
+        Args:
+            tickets: Ticket dictionaries to save.
+        """
+
+    @abstractmethod
+    def update_tickets(
+        self, ticket_ids: List[int], mutator: TicketMutator
+    ) -> List[Optional[Dict]]:
+        """Atomically apply a mutator to many tickets and save them together.
+
+        Like update_ticket(), but all changes are written at once. If the
+        mutator raises for any ticket, none of the tickets are saved.
+
+        Args:
+            ticket_ids: IDs of tickets to update.
+            mutator: Function mutating a ticket in place. Returning False
+                leaves that ticket unchanged.
+
+        Returns:
+            The updated tickets in the order of ticket_ids, None for IDs
+            that were not found.
+        """
+
+    @abstractmethod
+    def delete_ticket(self, ticket_id: int) -> bool:
+        """Delete a ticket from storage.
+
+        Args:
+            ticket_id: ID of ticket to delete.
+
+        Returns:
+            True if ticket was deleted, False if not found.
+        """
+
+    @abstractmethod
+    def get_ticket(self, ticket_id: int) -> Optional[Dict]:
+        """Get a specific ticket.
+
+        Args:
+            ticket_id: ID of ticket to retrieve.
+
+        Returns:
+            Copy of the ticket dictionary or None if not found.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Get the number of stored tickets.
+
+        Returns:
+            Number of tickets.
+        """
+
+    @abstractmethod
+    def compact(self) -> int:
+        """Reclaim space used by superseded ticket versions.
+
+        Returns:
+            Number of stale entries removed.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all tickets from storage."""
+
+    @abstractmethod
+    def get_next_id(self) -> int:
+        """Get the next available ticket ID without reserving it.
+
+        Returns:
+            Next ticket ID to use.
+        """
+
+    @abstractmethod
+    def reserve_ids(self, count: int = 1) -> int:
+        """Atomically reserve a block of new ticket IDs.
+
+        IDs come from a persistent monotonic counter, so concurrent creates
+        never get the same ID.
+
+        Args:
+            count: Number of consecutive IDs to reserve.
+
+        Returns:
+            First ID of the reserved block.
+        """
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Keep other writers out while several calls run as one step.
+
+        Writes by other threads and processes wait until the block ends,
+        the storage's own methods can be called inside it. The default
+        takes no lock, for backends with a single writer.
+        """
+        yield
+
+    def lock_file(self, name: str) -> Path:
+        """Get the path of a lock file shared by all users of this storage.
+
+        Lets processes working on the same tickets coordinate, for example
+        to run a background job in only one of them.
+
+        Args:
+            name: Name of the lock.
+
+        Returns:
+            Path of the lock file.
+        """
+        return TICKETS_FILE.with_name(f"{TICKETS_FILE.name}.{name}.lock")
+
+    def query_tickets(
+        self,
+        query: Optional[str] = None,
+        status: Optional[Union[str, Sequence[str]]] = None,
+        priority: Optional[str] = None,
+        assignee_id: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        sla_breached: Optional[bool] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict]:
+        """Find tickets matching all given filters, newest first.
+
+        Tickets are ordered by (created_at, id), so pages fetched with
+        cursors never skip or repeat tickets created at the same time.
+
+        Args:
+            query: Keywords to look for in subject or description.
+            status: Filter by status, or by any of several statuses.
+            priority: Filter by priority.
+            assignee_id: Filter by assignee.
+            category: Filter by category.
+            tags: Match tickets having any of these tags.
+            sla_breached: Filter by resolution SLA breach status.
+            created_after: Only tickets created at or after this ISO timestamp.
+            created_before: Only tickets created at or before this ISO timestamp.
+            limit: Maximum number of tickets to return.
+            cursor: Only return tickets after this cursor, see encode_cursor().
+            fields: Only return these fields of each ticket, see projection().
+                Defaults to whole tickets.
+
+        Returns:
+            List of matching tickets, to be treated as read-only.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        tickets = list(self.load_all_tickets().values())
+
+        if query:
+            query_lower = query.lower()
+            tickets = [
+                t
+                for t in tickets
+                if query_lower in t["subject"].lower()
+                or query_lower in t["description"].lower()
+            ]
+
+        if status:
+            statuses = status_values(status)
+            tickets = [t for t in tickets if t["status"] in statuses]
+
+        if priority:
+            tickets = [t for t in tickets if t["priority"] == priority]
+
+        if assignee_id:
+            tickets = [t for t in tickets if t.get("assignee_id") == assignee_id]
+
+        if category:
+            tickets = [t for t in tickets if t.get("category") == category]
+
+        if tags:
+            tickets = [
+                t for t in tickets if any(tag in t.get("tags", []) for tag in tags)
+            ]
+
+        if sla_breached is not None:
+            tickets = [
+                t
+                for t in tickets
+                if t.get("sla_breach", {}).get("resolution_breached") == sla_breached
+            ]
+
+        if created_after:
+            tickets = [t for t in tickets if t["created_at"] >= created_after]
+
+        if created_before:
+            tickets = [t for t in tickets if t["created_at"] <= created_before]
+
+        if cursor:
+            after = decode_cursor(cursor)
+            tickets = [t for t in tickets if _sort_key(t) < after]
+
+        # Sort by creation date (newest first)
+        tickets.sort(key=_sort_key, reverse=True)
+
+        if limit is not None:
+            tickets = tickets[:limit]
+        if fields is not None:
+            fields = projection(fields)
+            tickets = [project_ticket(t, fields) for t in tickets]
+        return tickets
+
+    def search_tickets(
+        self, query: str, status: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Find tickets matching a text query, most relevant first.
+
+        The default ranks like query_tickets(), newest first.
+
+        Args:
+            query: Search text.
+            status: Filter by status.
+            limit: Maximum number of tickets to return.
+
+        Returns:
+            List of matching tickets, to be treated as read-only.
+        """
+        return self.query_tickets(query=query, status=status, limit=limit)
+
+    def get_stats(self) -> Dict:
+        """Get ticket counts for the statistics dashboard.
+
+        Returns:
+            Counts as returned by TicketStats.to_dict().
+        """
+        stats = TicketStats()
+        for ticket in self.load_all_tickets().values():
+            stats.add(ticket)
+        return stats.to_dict()
+
+    def get_changes(
+        self, since: int, limit: Optional[int] = None
+    ) -> Tuple[int, Optional[List[Dict]]]:
+        """Get the ticket changes after a version of the changes feed.
+
+        Args:
+            since: Latest feed version the client has seen, 0 if none.
+            limit: Maximum number of changes to return.
+
+        Returns:
+            The current feed version and the changes, or None instead of
+            the changes if the client must reload all tickets. See
+            TicketChangeFeed.since().
+        """
+        return self.changes.since(since, limit)
+
+    def get_version(self) -> str:
+        """Get a token that changes whenever any ticket changes.
+
+        Lets clients tell whether anything changed without loading any
+        ticket. The default is the changes feed version, which only
+        reflects this process's own writes.
+
+        Returns:
+            Version token of all tickets.
+        """
+        return str(self.changes.version)
+
+    def get_ticket_version(self, ticket_id: int) -> Optional[str]:
+        """Get the version token of a ticket, see ticket_version().
+
+        Args:
+            ticket_id: ID of the ticket.
+
+        Returns:
+            Version token, or None if the ticket wasn't found.
+        """
+        ticket = self.get_ticket(ticket_id)
+        return ticket_version(ticket) if ticket is not None else None
+
+    def archive_tickets(self, older_than_days: int) -> int:
+        """Move old solved and closed tickets out of the active working set.
+
+        Backends without cold storage keep every ticket active.
+
+        Args:
+            older_than_days: Archive tickets resolved at least this many
+                days ago.
+
+        Returns:
+            Number of tickets archived.
+        """
+        return 0
+
+    def search_archive(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Find archived tickets matching a text query, most relevant first.
+
+        Args:
+            query: Search text.
+            limit: Maximum number of tickets to return.
+
+        Returns:
+            List of matching archived tickets.
+        """
+        return []
+
+
+class TicketStorage(BaseTicketStorage):
+    """Thread-safe JSONL-based ticket storage.
+
+    Tickets are kept in a resident id -> ticket map that is loaded once and
+    then kept current from this instance's own writes. Because the file is
+    only ever appended to, the storage remembers the byte offset it last
+    consumed and parses just the lines appended since then, e.g. by another
+    process. A full rescan only happens when the file shrinks or is replaced.
+
+    Deletes append a tombstone record. Once enough of the file is made of
+    superseded or deleted lines, it is compacted in a background thread.
+
+    New ticket IDs come from a monotonic counter persisted in a small
+    sidecar file next to the JSONL file.
+
+    The cache maintains secondary indexes (value -> set of ticket IDs) on
+    the INDEXED_FIELDS and on tags, so filtered queries intersect ID sets
+    instead of scanning every ticket. Text queries are answered by a BM25
+    ranked inverted index over subject, description and comments, and a
+    sorted (created_at, id) list serves date ranges and cursor pagination.
+    TicketStats counters are kept alongside the indexes, so statistics
+    don't look at any ticket.
+
+    Several processes, e.g. uvicorn workers, can share one file. Writers
+    hold an exclusive flock() on a lock file next to it, and every rewrite
+    of the file bumps a generation counter in the sidecar file so other
+    processes know to rescan instead of tail-reading.
 
+    Every line carries a CRC32 checksum. Lines that fail it or don't parse
+    are skipped with a warning, and a partial last line left behind by a
+    crashed writer is truncated once the write lock is held, so a damaged
+    file never stops the storage from loading.
 
-class TicketStorage:
-    """Thread-safe JSONL-based ticket storage."""
+    To bound memory, a ticket whose latest version is a single record in
+    the file is cached with just its RESIDENT_FIELDS, which is all that
+    filtering, sorting and indexing need. A TicketOffsetIndex remembers
+    where its record is, and reading the whole ticket decodes exactly that
+    record through a memory map of the file. Tickets with pending delta
+    patches are cached in full until the next snapshot or compaction.
 
-    def __init__(self, file_path: Optional[Path] = None):
+    archive_tickets() moves old solved and closed tickets into compressed
+    segments in a directory next to the file, see TicketArchive. They can
+    still be read with get_ticket() and found with search_archive(), but
+    are read-only and left out of listings, queries and counts.
+
+    Every record applied to the cache, including records appended by other
+    processes, is published to the changes feed once it is in the file.
+    When the cache has to be rebuilt from scratch, the feed is reset
+    instead of reporting every ticket in the file as new.
+    """
+
+    def __init__(
+        self,
+        file_path: Optional[Path] = None,
+        write_mode: str = "full",
+        snapshot_interval: int = 20,
+        compact_dead_ratio: float = 0.5,
+        compact_max_bytes: int = 64 * 1024 * 1024,
+        compact_min_lines: int = 100,
+        fsync: str = "none",
+        archive_dir: Optional[Path] = None,
+    ):
         """Initialize ticket storage.
 
         Args:
             file_path: Path to JSONL file. Defaults to tickets.jsonl in project root.
+            write_mode: "full" appends the whole ticket on every save, "delta"
+                appends only the changed fields as a patch record.
+            snapshot_interval: In delta mode, number of patches after which
+                the whole ticket is written again to bound replay cost.
+            compact_dead_ratio: Compact once this fraction of the lines in the
+                file are superseded versions, patches or tombstones.
+            compact_max_bytes: Also compact once the file is larger than this
+                and has doubled in size since it was last compacted.
+            compact_min_lines: Never compact automatically below this many lines.
+            fsync: When to fsync appended records: "none" leaves it to the
+                OS, "batch" syncs once per save or batch of saves and
+                "write" syncs after every single record.
+            archive_dir: Directory for archived tickets. Defaults to the
+                file path with an ".archive" suffix.
+
+        Raises:
+            ValueError: If fsync is not a known policy.
         """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}"
+            )
+
         self.file_path = file_path or TICKETS_FILE
+        self.counter_path = self.file_path.with_name(self.file_path.name + ".meta")
+        self.lock_path = self.file_path.with_name(self.file_path.name + ".lock")
+        self.write_mode = write_mode
+        self.snapshot_interval = snapshot_interval
+        self.compact_dead_ratio = compact_dead_ratio
+        self.compact_max_bytes = compact_max_bytes
+        self.compact_min_lines = compact_min_lines
+        self.fsync = fsync
         self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._archive = TicketArchive(
+            archive_dir or self.file_path.with_name(self.file_path.name + ".archive")
+        )
 
         # Initialize file if it doesn't exist
         if not self.file_path.exists():
             self.file_path.touch()
 
+        self._tickets: Dict[int, Ticket] = {}
+        self._patch_counts: Dict[int, int] = {}
+        self._indexes = self._empty_indexes()
+        self._search_index = TicketSearchIndex()
+        self._stats = TicketStats()
+        self._by_created: List[Tuple[str, int]] = []
+        self._locations = TicketOffsetIndex()
+        self._staged: Dict[int, int] = {}
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._line_count = 0
+        self._offset = 0
+        self._tail_bytes = 0
+        self._inode: Optional[int] = None
+        self._compacted_size = 0
+        self.skipped_records = 0
+        self.changes = TicketChangeFeed()
+        self._pending_changes: List[Tuple[int, str]] = []
+        self._rescan = True
+        self._compaction_thread: Optional[Thread] = None
+
+        # Cross-process state: the lock file and the last seen sidecar file
+        self._lock_file = None
+        self._lock_pid: Optional[int] = None
+        self._lock_depth = 0
+        self._meta_stat: Optional[Tuple[int, int, int]] = None
+        meta = self._read_meta()
+        self._next_id = meta["next_id"]
+        self._seen_next_id = meta["next_id"]
+        self._generation = meta["generation"]
+
+        # Load now so a torn record from a crash is repaired at startup
+        with self._write_lock():
+            self._refresh()
+
+    def _reset_cache(self) -> None:
+        """Forget everything read from the file so far."""
+        self._tickets = {}
+        self._patch_counts = {}
+        self._indexes = self._empty_indexes()
+        self._search_index = TicketSearchIndex()
+        self._stats = TicketStats()
+        self._by_created = []
+        self._locations.clear()
+        self._close_file()
+        self._line_count = 0
+        self._offset = 0
+        self._tail_bytes = 0
+        self._inode = None
+        # Clients can't tell what changed across a rebuild, have them reload
+        self._pending_changes = []
+        self._rescan = True
+        self.changes.reset()
+
+    def _close_file(self) -> None:
+        """Close the file handle and memory map used to read records."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_record(self, offset: int, length: int) -> Dict:
+        """Decode the record at a location of the cached file.
+
+        Must be called with the storage lock held.
+        """
+        if self._map is None or offset + length > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            # Map the handle, not the path, the path may point to a newer file
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data = _unseal(self._map[offset : offset + length].strip())
+        if data is None:
+            raise ValueError(f"Corrupt record at byte {offset} of {self.file_path}")
+        return decode(data)
+
+    def _materialize(self, ticket: Ticket, private: bool = False) -> Dict:
+        """Get the complete dictionary of a cached ticket.
+
+        Must be called with the storage lock held.
+
+        Args:
+            ticket: Cached ticket, possibly holding only RESIDENT_FIELDS.
+            private: Deep copy nested values shared with the cache.
+
+        Returns:
+            Ticket dictionary.
+        """
+        location = self._locations.get(ticket.id)
+        if location is not None:
+            return self._read_record(*location)
+        data = ticket.to_dict()
+        return copy.deepcopy(data) if private else data
+
+    @staticmethod
+    def _empty_indexes() -> Dict[str, Dict[Any, Set[int]]]:
+        """Create empty secondary indexes for the indexed fields and tags."""
+        return {field: defaultdict(set) for field in (*INDEXED_FIELDS, "tags")}
+
+    def _index(self, ticket: Ticket) -> None:
+        """Add a cached ticket to the secondary indexes and statistics."""
+        self._stats.add(ticket)
+        ticket_id = ticket["id"]
+        for field in INDEXED_FIELDS:
+            value = ticket.get(field)
+            if value is not None:
+                self._indexes[field][value].add(ticket_id)
+        for tag in ticket.get("tags") or []:
+            self._indexes["tags"][tag].add(ticket_id)
+
+    def _unindex(self, ticket: Ticket) -> None:
+        """Remove a cached ticket from the secondary indexes and statistics."""
+        self._stats.remove(ticket)
+        ticket_id = ticket["id"]
+        for field in INDEXED_FIELDS:
+            self._discard(field, ticket.get(field), ticket_id)
+        for tag in ticket.get("tags") or []:
+            self._discard("tags", tag, ticket_id)
+
+    def _discard(self, field: str, value: Any, ticket_id: int) -> None:
+        """Remove a ticket ID from one index entry, dropping empty entries."""
+        ids = self._indexes[field].get(value)
+        if ids is None:
+            return
+        ids.discard(ticket_id)
+        if not ids:
+            del self._indexes[field][value]
+
+    def _remove_sorted(self, key: Tuple[str, int]) -> None:
+        """Remove a key from the sorted (created_at, id) index."""
+        i = bisect_left(self._by_created, key)
+        if i < len(self._by_created) and self._by_created[i] == key:
+            del self._by_created[i]
+
+    def _refresh(self) -> None:
+        """Bring the cache up to date with the file.
+
+        Only the bytes appended since the last call are parsed. If the file
+        was truncated, swapped for a new one or rewritten by another process,
+        it is rescanned from the start.
+
+        Must be called with the storage lock held.
+        """
+        self._sync_meta()
+        try:
+            f = open(self.file_path, "rb")
+        except FileNotFoundError:
+            self._reset_cache()
+            return
+
+        # Stat the open file, the path may be replaced at any moment
+        stat = os.fstat(f.fileno())
+        if (
+            stat.st_ino != self._inode
+            or stat.st_size < self._offset
+            or (_KEEP_FILE_OPEN and self._file is None)
+        ):
+            self._reset_cache()
+            self._inode = stat.st_ino
+            if _KEEP_FILE_OPEN:
+                # Cached locations refer to this file, even once it's replaced
+                self._file = f
+
+        try:
+            if stat.st_size == self._offset:
+                self._tail_bytes = 0
+                self._rescan = False
+                return
+
+            f.seek(self._offset)
+            data = f.read(stat.st_size - self._offset)
+        finally:
+            if f is not self._file:
+                f.close()
+
+        # Leave a trailing partial line for the next call, its writer may
+        # still be in the middle of appending it
+        end = data.rfind(b"\n") + 1
+        start = 0
+        while start < end:
+            stop = data.index(b"\n", start)
+            line = data[start:stop].strip()
+            if line:
+                self._line_count += 1
+                record = self._decode(line)
+                if record is not None:
+                    location = None
+                    if self._file is not None:
+                        location = (self._offset + start, stop - start)
+                    self._apply(record, location)
+            start = stop + 1
+
+        self._offset += end
+        self._tail_bytes = len(data) - end
+        self._rescan = False
+        self._publish_changes()
+
+        # With the write lock held no writer can be mid-append, so a partial
+        # line is what a crashed writer left behind
+        if self._tail_bytes and self._lock_depth > 0 and fcntl is not None:
+            logger.warning(
+                "Truncating %d bytes of torn record at the end of %s",
+                self._tail_bytes,
+                self.file_path,
+            )
+            os.truncate(self.file_path, self._offset)
+            self._tail_bytes = 0
+
+    def _decode(self, line: bytes) -> Optional[Dict]:
+        """Parse a file line, returning None for damaged records."""
+        data = _unseal(line)
+        if data is not None:
+            try:
+                return decode(data)
+            except ValueError:
+                pass
+
+        self.skipped_records += 1
+        logger.warning(
+            "Skipping corrupt record at line %d of %s", self._line_count, self.file_path
+        )
+        return None
+
+    def _apply(self, record: Dict, location: Optional[Tuple[int, int]] = None) -> None:
+        """Apply a record read from or written to the file.
+
+        A record is either a full ticket snapshot, a {"id", "op": "delete"}
+        tombstone, an {"id", "op": "archive"} tombstone for a ticket moved
+        to the archive or, in delta mode, a patch of the form
+        {"id", "op": "patch", "changes", "append", "unset", "ts"} that is
+        folded into the current version of the ticket.
+
+        Args:
+            record: Decoded record.
+            location: (offset, length) of the record in the cached file, if
+                known. Snapshots with a location are cached lean.
+        """
+        ticket_id = record.get("id")
+        if ticket_id is None:
+            return
+
+        # IDs written without a reservation, e.g. by older versions
+        if ticket_id >= self._next_id:
+            self._next_id = ticket_id + 1
+
+        op = record.get("op")
+        current = self._tickets.get(ticket_id)
+        if op in ("delete", "archive"):
+            if current is not None:
+                self._unindex(current)
+                self._search_index.remove(ticket_id)
+                self._remove_sorted(_sort_key(current))
+                del self._tickets[ticket_id]
+                self._record_change(ticket_id, op)
+            self._patch_counts.pop(ticket_id, None)
+            self._locations.discard(ticket_id)
+            return
+
+        # Lean tickets don't have their text at hand to compare
+        text_known = current is not None and self._locations.get(ticket_id) is None
+        if op == "patch":
+            if current is None:
+                return
+
+            # Copy on write, nested values of returned tickets must not change
+            data = self._materialize(current)
+            data.update(record.get("changes", {}))
+            for key, items in record.get("append", {}).items():
+                data[key] = data.get(key, []) + items
+            for key in record.get("unset", []):
+                data.pop(key, None)
+            self._patch_counts[ticket_id] = self._patch_counts.get(ticket_id, 0) + 1
+        else:
+            data = record
+            self._patch_counts.pop(ticket_id, None)
+
+        if op != "patch" and location and self._locations.set(ticket_id, *location):
+            ticket = self._lean(data)
+        else:
+            self._locations.discard(ticket_id)
+            ticket = Ticket.from_dict(data)
+
+        if current is not None:
+            self._unindex(current)
+        self._index(ticket)
+        key = _sort_key(ticket)
+        if current is None or _sort_key(current) != key:
+            if current is not None:
+                self._remove_sorted(_sort_key(current))
+            insort(self._by_created, key)
+        if not text_known or any(
+            current.get(field) != data.get(field) for field in TEXT_FIELDS
+        ):
+            self._search_index.add(ticket_id, ticket_text(data))
+        self._tickets[ticket_id] = ticket
+        self._record_change(ticket_id, "create" if current is None else "update")
+
+    def _record_change(self, ticket_id: int, op: str) -> None:
+        """Queue a change for the feed, unless the cache is being rebuilt."""
+        if not self._rescan:
+            self._pending_changes.append((ticket_id, op))
+
+    def _publish_changes(self) -> None:
+        """Publish queued changes once their records are in the file.
+
+        Must be called with the storage lock held.
+        """
+        if self._pending_changes:
+            changes, self._pending_changes = self._pending_changes, []
+            self.changes.publish(changes)
+
+    @staticmethod
+    def _lean(data: Mapping[str, Any]) -> Ticket:
+        """Build a cache entry holding only the RESIDENT_FIELDS of a ticket."""
+        return Ticket.from_dict({k: data[k] for k in RESIDENT_FIELDS if k in data})
+
+    def _read_meta(self) -> Dict[str, int]:
+        """Read the ID counter and file generation from the sidecar file."""
+        meta = {"next_id": FIRST_TICKET_ID, "generation": 0}
+        try:
+            with open(self.counter_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            meta["next_id"] = int(stored["next_id"])
+            meta["generation"] = int(stored.get("generation", 0))
+        except (FileNotFoundError, KeyError, ValueError):
+            pass
+        return meta
+
+    def _write_meta(self) -> None:
+        """Persist the ID counter and file generation to the sidecar file.
+
+        Must be called with the write lock held.
+        """
+        tmp_path = self.counter_path.with_name(self.counter_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"next_id": self._next_id, "generation": self._generation}, f)
+        os.replace(tmp_path, self.counter_path)
+
+        self._seen_next_id = self._next_id
+        self._meta_stat = self._stat_meta()
+
+    def _stat_meta(self) -> Optional[Tuple[int, int, int]]:
+        """Get a cheap fingerprint of the sidecar file to detect changes."""
+        try:
+            stat = self.counter_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _sync_meta(self) -> None:
+        """Pick up sidecar changes made by other processes.
+
+        A new generation means the file was compacted or cleared, so the
+        cache is rebuilt. A new ID counter is adopted unless this process
+        is already ahead of it.
+
+        Must be called with the storage lock held.
+        """
+        meta_stat = self._stat_meta()
+        if meta_stat == self._meta_stat:
+            return
+        self._meta_stat = meta_stat
+
+        meta = self._read_meta()
+        if meta["generation"] != self._generation:
+            self._generation = meta["generation"]
+            self._reset_cache()
+            # The archive may have been cleared along with the file
+            self._archive.reload()
+        if meta["next_id"] != self._seen_next_id:
+            self._seen_next_id = meta["next_id"]
+            self._next_id = max(self._next_id, meta["next_id"])
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the storage lock and an exclusive lock across processes.
+
+        Re-entrant within a process. The file lock is taken on a descriptor
+        opened by this process, so it also excludes forked workers.
+        """
+        with _storage_lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                if self._lock_pid != os.getpid():
+                    self._lock_file = open(self.lock_path, "a+b")
+                    self._lock_pid = os.getpid()
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the write lock across several calls.
+
+        See BaseTicketStorage.exclusive(). Other processes sharing the file
+        wait too.
+        """
+        with self._write_lock():
+            yield
+
+    def lock_file(self, name: str) -> Path:
+        """Get the path of a lock file next to the ticket file.
+
+        See BaseTicketStorage.lock_file().
+        """
+        return self.file_path.with_name(f"{self.file_path.name}.{name}.lock")
+
+    def _make_patch(self, old: Dict, new: Dict) -> Optional[Dict[str, Any]]:
+        """Build a patch record turning old into new.
+
+        Lists that only grew, like history and comments, are stored as the
+        appended items instead of the whole list.
+
+        Returns:
+            Patch record, or None if nothing changed.
+        """
+        changes = {}
+        append = {}
+        for key, value in new.items():
+            old_value = old.get(key)
+            if key in old and old_value == value:
+                continue
+            if (
+                isinstance(old_value, list)
+                and isinstance(value, list)
+                and len(value) > len(old_value)
+                and value[: len(old_value)] == old_value
+            ):
+                append[key] = value[len(old_value) :]
+            else:
+                changes[key] = value
+        unset = [key for key in old if key not in new]
+
+        if not (changes or append or unset):
+            return None
+
+        patch: Dict[str, Any] = {"id": new["id"], "op": "patch"}
+        if changes:
+            patch["changes"] = changes
+        if append:
+            patch["append"] = append
+        if unset:
+            patch["unset"] = unset
+        patch["ts"] = datetime.now().isoformat()
+        return patch
+
+    def _append(self, lines: List[bytes]) -> Optional[List[Tuple[int, int]]]:
+        """Append lines to the file and advance the consumed offset.
+
+        Must be called with the write lock held, after _refresh().
+
+        Returns:
+            (offset, length) of each appended line, or None if another
+            writer interleaved. The cache is then reset, so the next refresh
+            rebuilds it from the file instead of applying our records twice.
+        """
+        chunks = [_seal(line) for line in lines]
+        with open(self.file_path, "ab") as f:
+            if self.fsync == "write":
+                for chunk in chunks:
+                    f.write(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+            else:
+                f.write(b"".join(chunks))
+                if self.fsync == "batch":
+                    f.flush()
+                    os.fsync(f.fileno())
+            end = f.tell()
+
+        size = sum(len(chunk) for chunk in chunks)
+        # If another writer slipped in between, our records are already in
+        # the cache but theirs are not. Replaying both from the offset would
+        # apply delta patches twice, so start over from the file.
+        if end != self._offset + size:
+            self._reset_cache()
+            return None
+
+        self._line_count += len(lines)
+        locations = []
+        for chunk in chunks:
+            locations.append((self._offset, len(chunk) - 1))
+            self._offset += len(chunk)
+        return locations
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction if the file has too many dead lines.
+
+        Must be called with the storage lock held.
+        """
+        dead_lines = self._line_count - len(self._tickets)
+        if dead_lines <= 0 or self._line_count < self.compact_min_lines:
+            return
+
+        too_dead = dead_lines / self._line_count >= self.compact_dead_ratio
+        too_big = self._offset >= max(self.compact_max_bytes, 2 * self._compacted_size)
+        if not (too_dead or too_big):
+            return
+
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = Thread(
+            target=self._compact, name="ticket-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def _compact(self) -> int:
+        """Rewrite the file with one line per live ticket.
+
+        The live tickets are written to a temporary file without holding the
+        storage lock. Lines appended in the meantime are then copied over and
+        the temporary file is swapped in with an atomic rename, so readers
+        and writers are never blocked for the length of a full rewrite.
+
+        Returns:
+            Number of dead lines removed.
+        """
+        with _storage_lock:
+            self._refresh()
+            tickets = list(self._tickets.values())
+            old_locations = [self._locations.get(ticket.id) for ticket in tickets]
+            inode, offset, line_count = self._inode, self._offset, self._line_count
+            # A private map, the cached file may be closed or replaced meanwhile
+            source = None
+            if self._file is not None and offset:
+                source = mmap.mmap(self._file.fileno(), offset, access=mmap.ACCESS_READ)
+
+        # Unique name, other processes may be compacting at the same time
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=self.file_path.name + ".compact.", dir=self.file_path.parent
+        )
+        tmp_path = Path(tmp_name)
+        new_locations = []
+        with os.fdopen(fd, "wb") as f:
+            position = 0
+            for ticket, location in zip(tickets, old_locations):
+                if location is not None:
+                    # Lean tickets are copied as is, without decoding them
+                    start, length = location
+                    line = source[start : start + length].strip() + b"\n"
+                else:
+                    line = _seal(encode(ticket.to_dict()))
+                f.write(line)
+                new_locations.append((position, len(line) - 1))
+                position += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        if source is not None:
+            source.close()
+
+        with self._write_lock():
+            self._refresh()
+            if self._inode != inode or self._offset < offset:
+                # The file was cleared or replaced meanwhile, nothing to swap
+                tmp_path.unlink(missing_ok=True)
+                return 0
+
+            with open(self.file_path, "rb") as src, open(tmp_path, "ab") as dst:
+                src.seek(offset)
+                dst.write(src.read(self._offset - offset))
+                dst.flush()
+                os.fsync(dst.fileno())
+                new_offset = dst.tell()
+
+            os.chmod(tmp_path, self.file_path.stat().st_mode & 0o777)
+            os.replace(tmp_path, self.file_path)
+            self._line_count = len(tickets) + self._line_count - line_count
+            self._offset = new_offset
+            self._compacted_size = new_offset
+            self._inode = self.file_path.stat().st_ino
+            self._generation += 1
+            self._write_meta()
+
+            if self._file is not None:
+                self._close_file()
+                self._file = open(self.file_path, "rb")
+                # Records copied from the tail moved, unchanged tickets are
+                # now at their snapshot line and can all be cached lean
+                self._locations.shift(offset, position - offset)
+                for ticket, location, new_location in zip(
+                    tickets, old_locations, new_locations
+                ):
+                    if self._tickets.get(ticket.id) is ticket:
+                        self._locations.set(ticket.id, *new_location)
+                        if location is None:
+                            self._tickets[ticket.id] = self._lean(ticket)
+
+        return line_count - len(tickets)
+
     def load_all_tickets(self) -> Dict[int, Dict]:
-        """Load all tickets from JSONL file.
+        """Load all tickets.
+
+        Nested values of the returned tickets are shared with the cache and
+        must be treated as read-only. Use get_ticket() for a copy that can be
+        modified.
 
         Returns:
             Dictionary mapping ticket_id to ticket data.
         """
-        tickets = {}
+        with _storage_lock:
+            self._refresh()
+            return {
+                ticket_id: self._materialize(ticket)
+                for ticket_id, ticket in self._tickets.items()
+            }
+
+    def query_tickets(
+        self,
+        query: Optional[str] = None,
+        status: Optional[Union[str, Sequence[str]]] = None,
+        priority: Optional[str] = None,
+        assignee_id: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        sla_breached: Optional[bool] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict]:
+        """Find tickets matching all given filters, newest first.
+
+        The ID sets of all exact-match filters are intersected, smallest
+        first, and a text query is matched against the full-text index. The
+        created_at range and cursor are located by bisecting the sorted
+        (created_at, id) index, which is then walked backwards until the
+        page is full. If the filters leave fewer tickets than the range
+        holds, only those are sorted instead.
+
+        Projections of the SUMMARY_FIELDS, or any other RESIDENT_FIELDS,
+        are served from the cache without reading records from the file.
+
+        See BaseTicketStorage.query_tickets() for the meaning of each filter.
+
+        Returns:
+            List of matching tickets, to be treated as read-only.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if fields is not None:
+            fields = projection(fields)
+            resident = set(fields) <= _RESIDENT_FIELD_SET
 
         with _storage_lock:
-            if not self.file_path.exists() or self.file_path.stat().st_size == 0:
-                return tickets
+            self._refresh()
+            ids = self._filter_ids(status, priority, assignee_id, category, tags)
+            if query:
+                ids = self._search_index.match(query, candidates=ids)
 
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
+            # Bounds of the requested range in the sorted index
+            by_created = self._by_created
+            lo = bisect_left(by_created, (created_after,)) if created_after else 0
+            hi = len(by_created)
+            if created_before:
+                # Compare on the timestamp alone, any ID sorts below infinity
+                hi = bisect_right(by_created, (created_before, float("inf")))
+            if after is not None:
+                hi = min(hi, bisect_left(by_created, after))
 
-                    ticket = json.loads(line)
-                    ticket_id = ticket.get("id")
-                    if ticket_id is not None:
-                        tickets[ticket_id] = ticket
+            if lo >= hi:
+                return []
 
-        return tickets
+            if ids is None or len(ids) >= hi - lo:
+                keys = (by_created[i] for i in range(hi - 1, lo - 1, -1))
+            else:
+                low_key, high_key = by_created[lo], by_created[hi - 1]
+                keys = sorted(
+                    (
+                        key
+                        for key in (_sort_key(self._tickets[i]) for i in ids)
+                        if low_key <= key <= high_key
+                    ),
+                    reverse=True,
+                )
+
+            results = []
+            for _, ticket_id in keys:
+                if limit is not None and len(results) >= limit:
+                    break
+                if ids is not None and ticket_id not in ids:
+                    continue
+
+                ticket = self._tickets[ticket_id]
+                if (
+                    sla_breached is not None
+                    and ticket.get("sla_breach", {}).get("resolution_breached")
+                    != sla_breached
+                ):
+                    continue
+                if fields is None:
+                    results.append(self._materialize(ticket))
+                elif resident or self._locations.get(ticket_id) is None:
+                    results.append(project_ticket(ticket, fields))
+                else:
+                    results.append(project_ticket(self._materialize(ticket), fields))
+            return results
+
+    def search_tickets(
+        self, query: str, status: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Find tickets matching a text query, most relevant first.
+
+        All query terms must occur in the subject, description or comments.
+        Thai text is matched by character bigrams and results are ranked
+        with BM25.
+
+        Args:
+            query: Search text.
+            status: Filter by status.
+            limit: Maximum number of tickets to return.
+
+        Returns:
+            List of matching tickets, to be treated as read-only.
+        """
+        with _storage_lock:
+            self._refresh()
+            ids = self._filter_ids(status, None, None, None, None)
+            results = self._search_index.search(query, limit=limit, candidates=ids)
+            return [
+                self._materialize(self._tickets[ticket_id]) for ticket_id, _ in results
+            ]
+
+    def _filter_ids(
+        self,
+        status: Optional[Union[str, Sequence[str]]],
+        priority: Optional[str],
+        assignee_id: Optional[str],
+        category: Optional[str],
+        tags: Optional[List[str]],
+    ) -> Optional[Set[int]]:
+        """Intersect the secondary index entries of the given filters.
+
+        Must be called with the storage lock held.
+
+        Returns:
+            Matching ticket IDs, or None if no filter was given.
+        """
+        id_sets = []
+        if status:
+            status_index = self._indexes["status"]
+            id_sets.append(
+                set().union(*(status_index.get(s, ()) for s in status_values(status)))
+            )
+        for field, value in (
+            ("priority", priority),
+            ("assignee_id", assignee_id),
+            ("category", category),
+        ):
+            if value:
+                id_sets.append(self._indexes[field].get(value, set()))
+
+        if tags:
+            tag_index = self._indexes["tags"]
+            id_sets.append(set().union(*(tag_index.get(tag, ()) for tag in tags)))
+
+        if not id_sets:
+            return None
+
+        id_sets.sort(key=len)
+        return id_sets[0].intersection(*id_sets[1:])
+
+    def _stage_ticket(self, ticket: Dict, lines: List[bytes]) -> None:
+        """Bump a ticket's version, cache it and queue its record for writing.
+
+        Must be called inside _write_batch().
+        """
+        current = self._tickets.get(ticket["id"])
+        version = current.get("version", 0) if current is not None else 0
+        ticket["version"] = version
+
+        record = ticket
+        if (
+            self.write_mode == "delta"
+            and current is not None
+            and self._patch_counts.get(ticket["id"], 0) < self.snapshot_interval
+        ):
+            record = self._make_patch(self._materialize(current), ticket)
+            if record is None:
+                return
+            record.setdefault("changes", {})["version"] = version + 1
+        ticket["version"] = version + 1
+
+        line = encode(record)
+        lines.append(line)
+        if record is ticket:
+            self._staged[ticket["id"]] = len(lines) - 1
+        else:
+            self._staged.pop(ticket["id"], None)
+
+        # Cache the serialized form so later edits by the caller don't leak in
+        self._apply(decode(line))
+
+    @contextmanager
+    def _write_batch(self) -> Iterator[List[bytes]]:
+        """Collect staged records and append them to the file in one write.
+
+        Staged tickets are visible in the cache right away, so a batch can
+        update the same ticket twice. If the batch fails before its records
+        reach the file, the cache is rebuilt from the file instead.
+
+        Once written, tickets saved as snapshots are cached lean, like
+        tickets read from the file.
+
+        Must be called with the write lock held, after _refresh().
+        """
+        lines: List[bytes] = []
+        self._staged = {}
+        try:
+            yield lines
+            if lines:
+                locations = self._append(lines)
+                self._publish_changes()
+                if locations is not None and self._file is not None:
+                    for ticket_id, i in self._staged.items():
+                        if self._locations.set(ticket_id, *locations[i]):
+                            self._tickets[ticket_id] = self._lean(
+                                self._tickets[ticket_id]
+                            )
+        except BaseException:
+            if lines:
+                self._reset_cache()
+            raise
+
+        if lines:
+            self._maybe_compact()
 
     def save_ticket(self, ticket: Dict) -> None:
         """Save or update a ticket.
@@ -56,17 +1569,101 @@ class TicketStorage:
         This appends the ticket to the file. For updates, the most recent
         entry takes precedence when loading.
 
+        In delta mode only the changes against the stored version are
+        appended, with a full snapshot every snapshot_interval patches.
+
         Args:
             ticket: Ticket dictionary to save.
         """
-        with _storage_lock:
-            with open(self.file_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(ticket, ensure_ascii=False) + "\n")
+        self.save_tickets([ticket])
+
+    def save_tickets(self, tickets: List[Dict]) -> None:
+        """Save or update many tickets in a single write.
+
+        All records are appended with one open and one lock acquisition, and
+        flushed with a single fsync under the "batch" policy.
+
+        Args:
+            tickets: Ticket dictionaries to save.
+        """
+        with self._write_lock():
+            self._refresh()
+            with self._write_batch() as lines:
+                for ticket in tickets:
+                    self._stage_ticket(ticket, lines)
+
+    def update_ticket(
+        self,
+        ticket_id: int,
+        mutator: TicketMutator,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict]:
+        """Atomically load, mutate and save a ticket.
+
+        Args:
+            ticket_id: ID of ticket to update.
+            mutator: Function mutating the ticket in place. Returning False
+                leaves the stored ticket unchanged.
+            expected_version: If given, only update the ticket if it is still
+                at this version.
+
+        Returns:
+            The updated ticket, or None if not found.
+
+        Raises:
+            TicketVersionConflictError: If expected_version doesn't match.
+        """
+        with self._write_lock():
+            self._refresh()
+            current = self._tickets.get(ticket_id)
+            if current is None:
+                return None
+
+            version = current.get("version", 0)
+            if expected_version is not None and expected_version != version:
+                raise TicketVersionConflictError(ticket_id, expected_version, version)
+
+            ticket = self._materialize(current, private=True)
+            if mutator(ticket) is not False:
+                with self._write_batch() as lines:
+                    self._stage_ticket(ticket, lines)
+            return ticket
+
+    def update_tickets(
+        self, ticket_ids: List[int], mutator: TicketMutator
+    ) -> List[Optional[Dict]]:
+        """Atomically apply a mutator to many tickets and save them together.
+
+        Args:
+            ticket_ids: IDs of tickets to update.
+            mutator: Function mutating a ticket in place. Returning False
+                leaves that ticket unchanged.
+
+        Returns:
+            The updated tickets in the order of ticket_ids, None for IDs
+            that were not found.
+        """
+        results: List[Optional[Dict]] = []
+        with self._write_lock():
+            self._refresh()
+            with self._write_batch() as lines:
+                for ticket_id in ticket_ids:
+                    current = self._tickets.get(ticket_id)
+                    if current is None:
+                        results.append(None)
+                        continue
+
+                    ticket = self._materialize(current, private=True)
+                    if mutator(ticket) is not False:
+                        self._stage_ticket(ticket, lines)
+                    results.append(ticket)
+        return results
 
     def delete_ticket(self, ticket_id: int) -> bool:
         """Delete a ticket from storage.
 
-        This rewrites the entire file without the deleted ticket.
+        This appends a tombstone record, the ticket's lines are dropped by
+        the next compaction.
 
         Args:
             ticket_id: ID of ticket to delete.
@@ -74,18 +1671,16 @@ class TicketStorage:
         Returns:
             True if ticket was deleted, False if not found.
         """
-        tickets = self.load_all_tickets()
-
-        if ticket_id not in tickets:
-            return False
+        with self._write_lock():
+            self._refresh()
+            if ticket_id not in self._tickets:
+                return False
 
-        del tickets[ticket_id]
-
-        # Rewrite file
-        with _storage_lock:
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                for ticket in tickets.values():
-                    f.write(json.dumps(ticket, ensure_ascii=False) + "\n")
+            record = {"id": ticket_id, "op": "delete", "ts": datetime.now().isoformat()}
+            self._append([encode(record)])
+            self._apply(record)
+            self._publish_changes()
+            self._maybe_compact()
 
         return True
 
@@ -96,63 +1691,234 @@ class TicketStorage:
             ticket_id: ID of ticket to retrieve.
 
         Returns:
-            Ticket dictionary or None if not found.
+            Copy of the ticket dictionary or None if not found.
         """
-        tickets = self.load_all_tickets()
-        return tickets.get(ticket_id)
-
-    def compact(self) -> int:
-        """Compact the JSONL file by removing duplicate entries.
+        with _storage_lock:
+            self._refresh()
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None:
+                return self._materialize(ticket, private=True)
+        return self._archive.get(ticket_id)
 
-        Keeps only the most recent version of each ticket.
+    def count(self) -> int:
+        """Get the number of stored tickets.
 
         Returns:
-            Number of duplicate entries removed.
+            Number of tickets.
         """
-        tickets = self.load_all_tickets()
-        original_lines = 0
-
-        # Count original lines
         with _storage_lock:
-            if self.file_path.exists():
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    original_lines = sum(1 for line in f if line.strip())
+            self._refresh()
+            return len(self._tickets)
 
-            # Rewrite with unique entries
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                for ticket in tickets.values():
-                    f.write(json.dumps(ticket, ensure_ascii=False) + "\n")
+    def compact(self) -> int:
+        """Compact the JSONL file by removing dead entries.
+
+        Keeps only the most recent version of each live ticket, dropping
+        superseded versions, folded patches and tombstones.
 
-        removed = original_lines - len(tickets)
-        return removed
+        Returns:
+            Number of dead entries removed.
+        """
+        return self._compact()
 
     def clear(self) -> None:
         """Clear all tickets from storage."""
-        with _storage_lock:
+        with self._write_lock():
+            self._sync_meta()
             with open(self.file_path, "w", encoding="utf-8"):
                 pass  # Truncate file
 
+            self._reset_cache()
+            self._archive.clear()
+            self._inode = self.file_path.stat().st_ino
+            self._next_id = FIRST_TICKET_ID
+            self._generation += 1
+            self._write_meta()
+
+    def archive_tickets(self, older_than_days: int) -> int:
+        """Move old solved and closed tickets into a compressed segment.
+
+        The tickets are written to a new archive segment first, then removed
+        from the file with archive tombstones and the file is compacted. If
+        the process dies in between, a ticket can end up in both places and
+        the copy in the file wins.
+
+        Args:
+            older_than_days: Archive tickets resolved at least this many
+                days ago, or last updated if they have no resolution time.
+
+        Returns:
+            Number of tickets archived.
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        with self._write_lock():
+            self._refresh()
+            tickets = [
+                self._materialize(ticket)
+                for ticket in self._tickets.values()
+                if ticket.get("status") in ARCHIVED_STATUSES
+                and (
+                    ticket.get("resolved_at")
+                    or ticket.get("updated_at")
+                    or ticket["created_at"]
+                )
+                <= cutoff
+            ]
+            if not tickets:
+                return 0
+
+            self._archive.write_segment(tickets)
+            now = datetime.now().isoformat()
+            lines = [
+                encode({"id": ticket["id"], "op": "archive", "ts": now})
+                for ticket in tickets
+            ]
+            self._append(lines)
+            for line in lines:
+                self._apply(decode(line))
+            self._publish_changes()
+
+        self._compact()
+        return len(tickets)
+
+    def get_stats(self) -> Dict:
+        """Get ticket counts for the statistics dashboard.
+
+        Answered from counters maintained on every write.
+
+        Returns:
+            Counts as returned by TicketStats.to_dict().
+        """
+        with _storage_lock:
+            self._refresh()
+            return self._stats.to_dict()
+
+    def get_changes(
+        self, since: int, limit: Optional[int] = None
+    ) -> Tuple[int, Optional[List[Dict]]]:
+        """Get the ticket changes after a version of the changes feed.
+
+        Picks up records appended by other processes first.
+
+        Args:
+            since: Latest feed version the client has seen, 0 if none.
+            limit: Maximum number of changes to return.
+
+        Returns:
+            The current feed version and the changes, or None instead of
+            the changes if the client must reload all tickets.
+        """
+        with _storage_lock:
+            self._refresh()
+        return self.changes.since(since, limit)
+
+    def get_version(self) -> str:
+        """Get a token that changes whenever any ticket changes.
+
+        The file is only appended to, except when it is rewritten under a
+        new generation, so the generation and the number of bytes read
+        identify the tickets. Every process sharing the file gets the same
+        token for the same tickets.
+
+        Returns:
+            Version token of all tickets.
+        """
+        with _storage_lock:
+            self._refresh()
+            return f"{self._generation}-{self._offset}"
+
+    def get_ticket_version(self, ticket_id: int) -> Optional[str]:
+        """Get the version token of a ticket, see ticket_version().
+
+        Active tickets are answered from the cache without reading them.
+
+        Args:
+            ticket_id: ID of the ticket.
+
+        Returns:
+            Version token, or None if the ticket wasn't found.
+        """
+        with _storage_lock:
+            self._refresh()
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None:
+                return ticket_version(ticket)
+        return super().get_ticket_version(ticket_id)
+
+    def search_archive(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Find archived tickets matching a text query, most relevant first.
+
+        Scans every archive segment, see TicketArchive.search().
+
+        Args:
+            query: Search text.
+            limit: Maximum number of tickets to return.
+
+        Returns:
+            List of matching archived tickets.
+        """
+        with _storage_lock:
+            self._refresh()
+            active = set(self._tickets)
+        return self._archive.search(query, limit=limit, exclude=active)
+
     def get_next_id(self) -> int:
-        """Get the next available ticket ID.
+        """Get the next available ticket ID without reserving it.
 
         Returns:
             Next ticket ID to use.
         """
-        tickets = self.load_all_tickets()
-        if not tickets:
-            return 1000
-        return max(tickets.keys()) + 1
+        with _storage_lock:
+            self._refresh()
+            return self._next_id
+
+    def reserve_ids(self, count: int = 1) -> int:
+        """Atomically reserve a block of new ticket IDs.
+
+        Args:
+            count: Number of consecutive IDs to reserve.
+
+        Returns:
+            First ID of the reserved block.
+        """
+        with self._write_lock():
+            self._refresh()
+            first_id = self._next_id
+            self._next_id += count
+            self._write_meta()
+            return first_id
+
+
+def create_storage() -> BaseTicketStorage:
+    """Create a ticket storage backend based on configuration.
+
+    Returns:
+        SQLiteTicketStorage if ticket_storage_type is "sqlite",
+        otherwise the JSONL-based TicketStorage.
+    """
+    settings = get_settings()
+    if settings.ticket_storage_type == "sqlite":
+        from .ticket_storage_sqlite import SQLiteTicketStorage
+
+        return SQLiteTicketStorage(Path(settings.sqlite_ticket_path))
+    return TicketStorage(
+        write_mode=settings.ticket_write_mode,
+        snapshot_interval=settings.ticket_snapshot_interval,
+        compact_dead_ratio=settings.ticket_compact_dead_ratio,
+        compact_max_bytes=settings.ticket_compact_max_bytes,
+        fsync=settings.ticket_fsync,
+    )
 
 
 # Global storage instance
-_storage = TicketStorage()
+_storage: BaseTicketStorage = create_storage()
 
 
-def get_storage() -> TicketStorage:
+def get_storage() -> BaseTicketStorage:
     """Get the global ticket storage instance.
 
     Returns:
-        Global TicketStorage instance.
+        Global ticket storage instance.
     """
     return _storage
 
@@ -0,0 +1,665 @@
+"""SQLite-based ticket storage backend."""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .ticket_changes import TicketChangeFeed
+from .ticket_search_index import ticket_text, words
+from .ticket_stats import TicketStats
+from .ticket_storage import (
+    FIRST_TICKET_ID,
+    BaseTicketStorage,
+    TicketMutator,
+    TicketVersionConflictError,
+    decode_cursor,
+    projection,
+    status_values,
+    ticket_version,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    assignee_id TEXT,
+    category TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status);
+CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets (priority);
+CREATE INDEX IF NOT EXISTS idx_tickets_assignee_id ON tickets (assignee_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_category ON tickets (category);
+CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets (created_at);
+CREATE TABLE IF NOT EXISTS ticket_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO ticket_meta (key, value) VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS tickets_version_insert AFTER INSERT ON tickets
+BEGIN
+    UPDATE ticket_meta SET value = value + 1 WHERE key = 'version';
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_version_update AFTER UPDATE ON tickets
+BEGIN
+    UPDATE ticket_meta SET value = value + 1 WHERE key = 'version';
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_version_delete AFTER DELETE ON tickets
+BEGIN
+    UPDATE ticket_meta SET value = value + 1 WHERE key = 'version';
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5 (
+    text, tokenize = 'trigram'
+);
+CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets
+BEGIN
+    DELETE FROM tickets_fts WHERE rowid = new.id;
+    INSERT INTO tickets_fts (rowid, text) VALUES (new.id, ticket_text(new.data));
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_fts_update AFTER UPDATE ON tickets
+BEGIN
+    UPDATE tickets_fts SET text = ticket_text(new.data) WHERE rowid = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets
+BEGIN
+    DELETE FROM tickets_fts WHERE rowid = old.id;
+END;
+"""
+
+
+def _text_filter(query: str) -> Tuple[str, List[str], bool]:
+    """Build the condition on tickets_fts for a text query.
+
+    Every word must occur in the ticket's text. Words of three or more
+    characters are looked up in the trigram index, shorter ones have no
+    trigram and are matched with LIKE.
+
+    Args:
+        query: Search text.
+
+    Returns:
+        SQL condition, its parameters and whether it uses the index, which
+        bm25() ranking requires.
+    """
+    terms = list(dict.fromkeys(words(query)))
+    if not terms:
+        return "0", [], False
+
+    long_terms = [term for term in terms if len(term) >= 3]
+    clauses = []
+    params = []
+    if long_terms:
+        clauses.append("tickets_fts MATCH ?")
+        params.append(
+            " AND ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+        )
+    for term in terms:
+        if len(term) < 3:
+            # Words never contain LIKE wildcards, see words()
+            clauses.append("tickets_fts.text LIKE ?")
+            params.append(f"%{term}%")
+    return " AND ".join(clauses), params, bool(long_terms)
+
+
+class SQLiteTicketStorage(BaseTicketStorage):
+    """Thread-safe SQLite-based ticket storage.
+
+    Each ticket is stored as a JSON document alongside indexed columns for
+    the fields used in filters, so queries, sorting and limits are answered
+    by SQLite instead of materializing every ticket in Python.
+
+    Text search goes through an FTS5 trigram index over the same text the
+    JSONL backend indexes, subject, description and comments, and is
+    ranked with bm25(). Trigrams match query words anywhere in a word,
+    while the JSONL index matches them as word prefixes, so this backend
+    can find a few more tickets for the same query.
+
+    Only changes made through this instance are published to the changes
+    feed, SQLite has no way to report which tickets other processes wrote.
+    The version returned by get_version() does count every write, it is
+    bumped by triggers on the tickets table. When it moved by more than
+    this instance's own writes, get_changes() resets the feed so that
+    clients reload instead of missing those writes.
+    """
+
+    def __init__(self, db_path: Path):
+        """Initialize ticket storage.
+
+        Args:
+            db_path: Path to the SQLite database file.
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Used by the triggers that keep the search index current
+        self._conn.create_function(
+            "ticket_text",
+            1,
+            lambda data: ticket_text(json.loads(data)),
+            deterministic=True,
+        )
+        has_search_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tickets_fts'"
+        ).fetchone()
+        self._conn.executescript(_SCHEMA)
+        if not has_search_index:
+            # Index tickets stored before the search index existed
+            self._conn.execute(
+                "INSERT INTO tickets_fts (rowid, text) "
+                "SELECT id, ticket_text(data) FROM tickets"
+            )
+        self.changes = TicketChangeFeed()
+        self._pending_changes: List[Tuple[int, str]] = []
+        # Whether the open transaction cleared all tickets
+        self._pending_reset = False
+        self._transaction_depth = 0
+        # Table version after the last write seen through this instance, and
+        # whether other connections wrote since
+        self._seen_version = self._table_version()
+        self._foreign_writes = False
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a single write transaction under the lock.
+
+        Transactions started inside another one join it and are committed
+        or rolled back with it.
+        """
+        with self._lock:
+            if self._transaction_depth:
+                self._transaction_depth += 1
+                try:
+                    yield self._conn
+                finally:
+                    self._transaction_depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._table_version() != self._seen_version:
+                self._foreign_writes = True
+            self._pending_changes = []
+            self._pending_reset = False
+            self._transaction_depth = 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._transaction_depth = 0
+            version = self._table_version()
+            self._conn.execute("COMMIT")
+            self._seen_version = version
+            # Publish only what was committed
+            if self._pending_reset:
+                self.changes.reset()
+            if self._pending_changes:
+                self.changes.publish(self._pending_changes)
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Run several calls in one write transaction.
+
+        See BaseTicketStorage.exclusive(). Other connections to the
+        database can't write until it ends.
+        """
+        with self._transaction():
+            yield
+
+    def lock_file(self, name: str) -> Path:
+        """Get the path of a lock file next to the database.
+
+        See BaseTicketStorage.lock_file().
+        """
+        return self.db_path.with_name(f"{self.db_path.name}.{name}.lock")
+
+    def load_all_tickets(self) -> Dict[int, Dict]:
+        """Load all tickets.
+
+        Returns:
+            Dictionary mapping ticket_id to ticket data.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM tickets").fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def _write_ticket(self, conn: sqlite3.Connection, ticket: Dict) -> None:
+        """Insert or replace a ticket row, bumping its version.
+
+        Must be called inside a transaction.
+        """
+        row = conn.execute(
+            "SELECT json_extract(data, '$.version') FROM tickets WHERE id = ?",
+            (ticket["id"],),
+        ).fetchone()
+        ticket["version"] = (row[0] or 0) + 1 if row else 1
+        self._pending_changes.append((ticket["id"], "update" if row else "create"))
+
+        conn.execute(
+            "INSERT OR REPLACE INTO tickets "
+            "(id, status, priority, assignee_id, category, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                ticket["id"],
+                ticket["status"],
+                ticket["priority"],
+                ticket.get("assignee_id"),
+                ticket.get("category"),
+                ticket["created_at"],
+                json.dumps(ticket, ensure_ascii=False),
+            ),
+        )
+        # Keep the counter ahead of IDs saved without a reservation
+        conn.execute(
+            "INSERT INTO ticket_meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = max(value, excluded.value)",
+            (ticket["id"] + 1,),
+        )
+
+    def save_ticket(self, ticket: Dict) -> None:
+        """Save or update a ticket.
+
+        Args:
+            ticket: Ticket dictionary to save.
+        """
+        with self._transaction() as conn:
+            self._write_ticket(conn, ticket)
+
+    def save_tickets(self, tickets: List[Dict]) -> None:
+        """Save or update many tickets in a single transaction.
+
+        Args:
+            tickets: Ticket dictionaries to save.
+        """
+        with self._transaction() as conn:
+            for ticket in tickets:
+                self._write_ticket(conn, ticket)
+
+    def update_ticket(
+        self,
+        ticket_id: int,
+        mutator: TicketMutator,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Dict]:
+        """Atomically load, mutate and save a ticket.
+
+        Args:
+            ticket_id: ID of ticket to update.
+            mutator: Function mutating the ticket in place. Returning False
+                leaves the stored ticket unchanged.
+            expected_version: If given, only update the ticket if it is still
+                at this version.
+
+        Returns:
+            The updated ticket, or None if not found.
+
+        Raises:
+            TicketVersionConflictError: If expected_version doesn't match.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM tickets WHERE id = ?", (ticket_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            ticket = json.loads(row[0])
+            version = ticket.get("version", 0)
+            if expected_version is not None and expected_version != version:
+                raise TicketVersionConflictError(ticket_id, expected_version, version)
+
+            if mutator(ticket) is not False:
+                self._write_ticket(conn, ticket)
+            return ticket
+
+    def update_tickets(
+        self, ticket_ids: List[int], mutator: TicketMutator
+    ) -> List[Optional[Dict]]:
+        """Atomically apply a mutator to many tickets in a single transaction.
+
+        Args:
+            ticket_ids: IDs of tickets to update.
+            mutator: Function mutating a ticket in place. Returning False
+                leaves that ticket unchanged.
+
+        Returns:
+            The updated tickets in the order of ticket_ids, None for IDs
+            that were not found.
+        """
+        results: List[Optional[Dict]] = []
+        with self._transaction() as conn:
+            for ticket_id in ticket_ids:
+                row = conn.execute(
+                    "SELECT data FROM tickets WHERE id = ?", (ticket_id,)
+                ).fetchone()
+                if row is None:
+                    results.append(None)
+                    continue
+
+                ticket = json.loads(row[0])
+                if mutator(ticket) is not False:
+                    self._write_ticket(conn, ticket)
+                results.append(ticket)
+        return results
+
+    def delete_ticket(self, ticket_id: int) -> bool:
+        """Delete a ticket from storage.
+
+        Args:
+            ticket_id: ID of ticket to delete.
+
+        Returns:
+            True if ticket was deleted, False if not found.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+            if cursor.rowcount > 0:
+                self._pending_changes.append((ticket_id, "delete"))
+        return cursor.rowcount > 0
+
+    def get_ticket(self, ticket_id: int) -> Optional[Dict]:
+        """Get a specific ticket.
+
+        Args:
+            ticket_id: ID of ticket to retrieve.
+
+        Returns:
+            Ticket dictionary or None if not found.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tickets WHERE id = ?", (ticket_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _table_version(self) -> int:
+        """Read the version bumped by every write to the tickets table.
+
+        Must be called with the storage lock held.
+        """
+        return self._conn.execute(
+            "SELECT value FROM ticket_meta WHERE key = 'version'"
+        ).fetchone()[0]
+
+    def get_version(self) -> str:
+        """Get a token that changes whenever any ticket changes.
+
+        Returns:
+            Version token of all tickets, the same for every connection.
+        """
+        with self._lock:
+            return str(self._table_version())
+
+    def get_changes(
+        self, since: int, limit: Optional[int] = None
+    ) -> Tuple[int, Optional[List[Dict]]]:
+        """Get the ticket changes after a version of the changes feed.
+
+        Resets the feed first if other connections wrote tickets, their
+        changes are not known.
+
+        Args:
+            since: Latest feed version the client has seen, 0 if none.
+            limit: Maximum number of changes to return.
+
+        Returns:
+            The current feed version and the changes, or None instead of
+            the changes if the client must reload all tickets.
+        """
+        with self._lock:
+            version = self._table_version()
+            if self._foreign_writes or version != self._seen_version:
+                self._seen_version = version
+                self._foreign_writes = False
+                self.changes.reset()
+        return self.changes.since(since, limit)
+
+    def get_ticket_version(self, ticket_id: int) -> Optional[str]:
+        """Get the version token of a ticket without decoding it.
+
+        Args:
+            ticket_id: ID of the ticket.
+
+        Returns:
+            Version token, or None if the ticket wasn't found.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT json_extract(data, '$.version'), created_at "
+                "FROM tickets WHERE id = ?",
+                (ticket_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return ticket_version({"version": row[0] or 0, "created_at": row[1]})
+
+    def count(self) -> int:
+        """Get the number of stored tickets.
+
+        Returns:
+            Number of tickets.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+
+    def compact(self) -> int:
+        """Checkpoint the write-ahead log and reclaim free pages.
+
+        Returns:
+            Always 0, updates replace rows in place so there are no duplicates.
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+        return 0
+
+    def clear(self) -> None:
+        """Clear all tickets from storage."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tickets")
+            conn.execute("DELETE FROM ticket_meta WHERE key = 'next_id'")
+            # Changes from before the clear are superseded by the reset
+            self._pending_changes = []
+            self._pending_reset = True
+
+    def _next_id(self) -> int:
+        """Read the ID counter, never below the highest stored ID.
+
+        Must be called with the storage lock held.
+        """
+        row = self._conn.execute(
+            "SELECT value FROM ticket_meta WHERE key = 'next_id'"
+        ).fetchone()
+        max_id = self._conn.execute("SELECT MAX(id) FROM tickets").fetchone()[0]
+        next_id = row[0] if row else FIRST_TICKET_ID
+        return next_id if max_id is None else max(next_id, max_id + 1)
+
+    def get_next_id(self) -> int:
+        """Get the next available ticket ID without reserving it.
+
+        Returns:
+            Next ticket ID to use.
+        """
+        with self._lock:
+            return self._next_id()
+
+    def reserve_ids(self, count: int = 1) -> int:
+        """Atomically reserve a block of new ticket IDs.
+
+        Args:
+            count: Number of consecutive IDs to reserve.
+
+        Returns:
+            First ID of the reserved block.
+        """
+        with self._transaction() as conn:
+            first_id = self._next_id()
+            conn.execute(
+                "INSERT OR REPLACE INTO ticket_meta (key, value) VALUES ('next_id', ?)",
+                (first_id + count,),
+            )
+        return first_id
+
+    def query_tickets(
+        self,
+        query: Optional[str] = None,
+        status: Optional[Union[str, Sequence[str]]] = None,
+        priority: Optional[str] = None,
+        assignee_id: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        sla_breached: Optional[bool] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict]:
+        """Find tickets matching all given filters, newest first.
+
+        Projections are extracted from the JSON documents by SQLite, so
+        large fields like the history are never decoded in Python.
+
+        See BaseTicketStorage.query_tickets() for the meaning of each filter.
+
+        Returns:
+            List of matching tickets.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        clauses = []
+        params: list = []
+
+        if status:
+            statuses = status_values(status)
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+
+        for column, value in (
+            ("priority", priority),
+            ("assignee_id", assignee_id),
+            ("category", category),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        if created_after:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+
+        if created_before:
+            clauses.append("created_at <= ?")
+            params.append(created_before)
+
+        if cursor:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        if query:
+            text_clause, text_params, _ = _text_filter(query)
+            clauses.append(f"id IN (SELECT rowid FROM tickets_fts WHERE {text_clause})")
+            params.extend(text_params)
+
+        if tags:
+            placeholders = ", ".join("?" for _ in tags)
+            clauses.append(
+                "EXISTS (SELECT 1 FROM json_each(tickets.data, '$.tags') "
+                f"WHERE value IN ({placeholders}))"
+            )
+            params.extend(tags)
+
+        if sla_breached is not None:
+            clauses.append("json_extract(data, '$.sla_breach.resolution_breached') = ?")
+            params.append(1 if sla_breached else 0)
+
+        if fields is None:
+            sql = "SELECT data FROM tickets"
+        else:
+            fields = projection(fields)
+            columns = ", ".join("?, json_extract(data, ?)" for _ in fields)
+            sql = f"SELECT json_object({columns}) FROM tickets"
+            params = [
+                arg for field in fields for arg in (field, f'$."{field}"')
+            ] + params
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def search_tickets(
+        self, query: str, status: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Find tickets matching a text query, most relevant first.
+
+        All query words must occur in the subject, description or comments.
+        Results are ranked with bm25(), or newest first if every word is
+        too short for the trigram index.
+
+        Args:
+            query: Search text.
+            status: Filter by status.
+            limit: Maximum number of tickets to return.
+
+        Returns:
+            List of matching tickets.
+        """
+        text_clause, params, ranked = _text_filter(query)
+        sql = (
+            "SELECT tickets.data FROM tickets_fts "
+            "JOIN tickets ON tickets.id = tickets_fts.rowid "
+            f"WHERE {text_clause}"
+        )
+        if status:
+            sql += " AND tickets.status = ?"
+            params.append(status)
+        order = "bm25(tickets_fts), " if ranked else ""
+        sql += f" ORDER BY {order}tickets.created_at DESC, tickets.id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_stats(self) -> Dict:
+        """Get ticket counts for the statistics dashboard.
+
+        SQLite groups the tickets by every counted field at once, so only
+        one row per distinct combination reaches Python.
+
+        Returns:
+            Counts as returned by TicketStats.to_dict().
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, priority, category, assignee_id, "
+                "coalesce(json_extract(data, '$.sla_breach.resolution_breached'), 0), "
+                "COUNT(*) FROM tickets GROUP BY 1, 2, 3, 4, 5"
+            ).fetchall()
+
+        stats = TicketStats()
+        for status, priority, category, assignee_id, breached, count in rows:
+            stats.add_group(
+                status, priority, category, assignee_id, bool(breached), count
+            )
+        return stats.to_dict()
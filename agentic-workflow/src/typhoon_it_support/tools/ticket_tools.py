@@ -8,7 +8,7 @@ from typing import Dict, List, Optional
 import requests
 from langchain_core.tools import tool
 
-from .ticket_storage import get_storage
+from .ticket_storage import TicketMutator, get_storage
 
 
 class TicketPriority(str, Enum):
@@ -92,6 +92,11 @@ def _save_ticket(ticket: Dict) -> None:
     get_storage().save_ticket(ticket)
 
 
+def _update_ticket(ticket_id: int, mutator: TicketMutator) -> Optional[Dict]:
+    """Atomically mutate and save a ticket in storage."""
+    return get_storage().update_ticket(ticket_id, mutator)
+
+
 def _delete_ticket(ticket_id: int) -> bool:
     """Delete a ticket from storage."""
     return get_storage().delete_ticket(ticket_id)
@@ -102,6 +107,11 @@ def _get_next_ticket_id() -> int:
     return get_storage().get_next_id()
 
 
+def _reserve_ticket_id() -> int:
+    """Reserve a new ticket ID."""
+    return get_storage().reserve_ids()
+
+
 # Legacy compatibility - these are now backed by JSONL
 # Note: These are kept for backward compatibility with init_demo_tickets.py
 # but should be accessed as properties that return current state
@@ -123,7 +133,7 @@ class _TicketsAccessor:
 
     def __len__(self):
         """Get number of tickets."""
-        return len(_get_tickets())
+        return get_storage().count()
 
     def items(self):
         """Get all tickets as items."""
@@ -325,8 +335,8 @@ def create_ticket(
     if priority not in [p.value for p in TicketPriority]:
         priority = "normal"
 
-    # Get next ticket ID
-    ticket_id = _get_next_ticket_id()
+    # Reserve next ticket ID
+    ticket_id = _reserve_ticket_id()
     created_at = datetime.now().isoformat()
 
     # Calculate SLA targets
@@ -451,58 +461,57 @@ def update_ticket_status(
     if status not in [s.value for s in TicketStatus]:
         return f"❌ Invalid status '{status}'. Valid options: new, open, pending, solved, closed"
 
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
-        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
+    old_status = None
 
-    # Update ticket
-    # ticket already loaded above
-    old_status = ticket["status"]
-    now = datetime.now().isoformat()
-    ticket["status"] = status
-    ticket["updated_at"] = now
-
-    # Update SLA tracking
-    if status == "solved" or status == "closed":
-        if not ticket.get("resolved_at"):
-            ticket["resolved_at"] = now
-
-    # Update SLA breach status
-    ticket["sla_breach"] = _check_sla_breach(
-        ticket["created_at"],
-        ticket["priority"],
-        ticket.get("first_response_at"),
-        ticket.get("resolved_at"),
-    )
+    def apply_status(ticket: Dict) -> None:
+        nonlocal old_status
+        old_status = ticket["status"]
+        now = datetime.now().isoformat()
+        ticket["status"] = status
+        ticket["updated_at"] = now
 
-    # Add comment if provided
-    if comment:
-        # Track first response time
-        if not ticket.get("first_response_at") and len(ticket["comments"]) == 0:
-            ticket["first_response_at"] = now
+        # Update SLA tracking
+        if status == "solved" or status == "closed":
+            if not ticket.get("resolved_at"):
+                ticket["resolved_at"] = now
 
-        ticket["comments"].append(
+        # Update SLA breach status
+        ticket["sla_breach"] = _check_sla_breach(
+            ticket["created_at"],
+            ticket["priority"],
+            ticket.get("first_response_at"),
+            ticket.get("resolved_at"),
+        )
+
+        # Add comment if provided
+        if comment:
+            # Track first response time
+            if not ticket.get("first_response_at") and len(ticket["comments"]) == 0:
+                ticket["first_response_at"] = now
+
+            ticket["comments"].append(
+                {
+                    "author": "IT Support Agent",
+                    "body": comment,
+                    "public": True,
+                    "created_at": now,
+                }
+            )
+
+        # Add to history
+        ticket["history"].append(
             {
-                "author": "IT Support Agent",
-                "body": comment,
-                "public": True,
-                "created_at": now,
+                "timestamp": now,
+                "action": "status_changed",
+                "actor": "IT Support Agent",
+                "changes": {"status": {"old": old_status, "new": status}},
             }
         )
 
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": now,
-            "action": "status_changed",
-            "actor": "IT Support Agent",
-            "changes": {"status": {"old": old_status, "new": status}},
-        }
-    )
-
-    # Save updated ticket
-    _save_ticket(ticket)
+    # Update and save ticket in one step
+    ticket = _update_ticket(ticket_id, apply_status)
+    if not ticket:
+        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
     result = f"""✅ Ticket Status Updated!
 
@@ -536,55 +545,52 @@ def add_ticket_comment(ticket_id: int, comment: str, is_public: bool = True) ->
     Returns:
         Confirmation that the comment was added.
     """
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
-        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
-
-    # Add comment
-    # ticket already loaded above
     now = datetime.now().isoformat()
 
-    # Track first response time
-    if not ticket.get("first_response_at") and len(ticket["comments"]) == 0:
-        ticket["first_response_at"] = now
-        # Update SLA breach status
-        ticket["sla_breach"] = _check_sla_breach(
-            ticket["created_at"],
-            ticket["priority"],
-            ticket.get("first_response_at"),
-            ticket.get("resolved_at"),
+    def apply_comment(ticket: Dict) -> None:
+        # Track first response time
+        if not ticket.get("first_response_at") and len(ticket["comments"]) == 0:
+            ticket["first_response_at"] = now
+            # Update SLA breach status
+            ticket["sla_breach"] = _check_sla_breach(
+                ticket["created_at"],
+                ticket["priority"],
+                ticket.get("first_response_at"),
+                ticket.get("resolved_at"),
+            )
+
+        ticket["comments"].append(
+            {
+                "author": "IT Support Agent",
+                "body": comment,
+                "public": is_public,
+                "created_at": now,
+            }
         )
+        ticket["updated_at"] = now
 
-    ticket["comments"].append(
-        {
-            "author": "IT Support Agent",
-            "body": comment,
-            "public": is_public,
-            "created_at": now,
-        }
-    )
-    ticket["updated_at"] = now
-
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": now,
-            "action": "comment_added",
-            "actor": "IT Support Agent",
-            "changes": {
-                "comment": {
-                    "public": is_public,
-                    "preview": comment[:50] + "..." if len(comment) > 50 else comment,
-                }
-            },
-        }
-    )
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": now,
+                "action": "comment_added",
+                "actor": "IT Support Agent",
+                "changes": {
+                    "comment": {
+                        "public": is_public,
+                        "preview": (
+                            comment[:50] + "..." if len(comment) > 50 else comment
+                        ),
+                    }
+                },
+            }
+        )
 
-    visibility = "Public" if is_public else "Internal"
+    # Update and save ticket in one step
+    if not _update_ticket(ticket_id, apply_comment):
+        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
-    # Save updated ticket
-    _save_ticket(ticket)
+    visibility = "Public" if is_public else "Internal"
 
     result = f"""✅ Comment Added to Ticket!
 
@@ -620,53 +626,52 @@ def update_ticket_priority(ticket_id: int, priority: str) -> str:
     if priority not in [p.value for p in TicketPriority]:
         return f"❌ Invalid priority '{priority}'. Valid options: low, normal, high, urgent"
 
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
-        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
+    old_priority = None
 
-    # Update priority
-    # ticket already loaded above
-    old_priority = ticket["priority"]
-    now = datetime.now().isoformat()
-    ticket["priority"] = priority
-    ticket["updated_at"] = now
-
-    # Recalculate SLA targets based on new priority
-    sla_targets = _calculate_sla_targets(priority, ticket["created_at"])
-    ticket["sla_first_response_due"] = sla_targets["first_response_due"]
-    ticket["sla_resolution_due"] = sla_targets["resolution_due"]
-
-    # Update SLA breach status
-    ticket["sla_breach"] = _check_sla_breach(
-        ticket["created_at"],
-        priority,
-        ticket.get("first_response_at"),
-        ticket.get("resolved_at"),
-    )
+    def apply_priority(ticket: Dict) -> None:
+        nonlocal old_priority
+        old_priority = ticket["priority"]
+        now = datetime.now().isoformat()
+        ticket["priority"] = priority
+        ticket["updated_at"] = now
 
-    # Add automatic comment
-    ticket["comments"].append(
-        {
-            "author": "IT Support System",
-            "body": f"Priority changed from {old_priority.upper()} to {priority.upper()}",
-            "public": False,
-            "created_at": now,
-        }
-    )
+        # Recalculate SLA targets based on new priority
+        sla_targets = _calculate_sla_targets(priority, ticket["created_at"])
+        ticket["sla_first_response_due"] = sla_targets["first_response_due"]
+        ticket["sla_resolution_due"] = sla_targets["resolution_due"]
 
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": now,
-            "action": "priority_changed",
-            "actor": "IT Support System",
-            "changes": {"priority": {"old": old_priority, "new": priority}},
-        }
-    )
+        # Update SLA breach status
+        ticket["sla_breach"] = _check_sla_breach(
+            ticket["created_at"],
+            priority,
+            ticket.get("first_response_at"),
+            ticket.get("resolved_at"),
+        )
 
-    # Save updated ticket
-    _save_ticket(ticket)
+        # Add automatic comment
+        ticket["comments"].append(
+            {
+                "author": "IT Support System",
+                "body": f"Priority changed from {old_priority.upper()} to {priority.upper()}",
+                "public": False,
+                "created_at": now,
+            }
+        )
+
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": now,
+                "action": "priority_changed",
+                "actor": "IT Support System",
+                "changes": {"priority": {"old": old_priority, "new": priority}},
+            }
+        )
+
+    # Update and save ticket in one step
+    ticket = _update_ticket(ticket_id, apply_priority)
+    if not ticket:
+        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
     result = f"""✅ Ticket Priority Updated!
 
@@ -682,7 +687,7 @@ Priority change has been logged and relevant teams have been notified."""
 
 @tool
 def search_tickets(query: str, status: Optional[str] = None, limit: int = 5) -> str:
-    """Search for tickets by subject or description.
+    """Search for tickets by subject, description or comments.
 
     Use this tool to:
     - Find related tickets
@@ -695,25 +700,9 @@ def search_tickets(query: str, status: Optional[str] = None, limit: int = 5) ->
         limit: Maximum number of results to return (default: 5).
 
     Returns:
-        List of matching tickets.
+        List of matching tickets, most relevant first.
     """
-    query_lower = query.lower()
-    results = []
-
-    for ticket_id, ticket in _get_tickets().items():
-        # Filter by status if provided
-        if status and ticket["status"] != status:
-            continue
-
-        # Search in subject and description
-        if (
-            query_lower in ticket["subject"].lower()
-            or query_lower in ticket["description"].lower()
-        ):
-            results.append(ticket)
-
-        if len(results) >= limit:
-            break
+    results = get_storage().search_tickets(query, status=status, limit=limit)
 
     if not results:
         filter_text = f" with status '{status}'" if status else ""
@@ -748,23 +737,27 @@ def get_my_open_tickets(limit: int = 10) -> str:
     Returns:
         List of open tickets.
     """
-    open_tickets = [
-        ticket
-        for ticket in _get_tickets().values()
-        if ticket["status"] in ["new", "open", "pending"]
-    ]
-
-    if not open_tickets:
-        return "✅ No open tickets found. All tickets are either solved or closed."
+    storage = get_storage()
+    # Rank on the priority alone, only the listed tickets are read in full
+    candidates = storage.query_tickets(
+        status=["new", "open", "pending"], fields=["priority"]
+    )
 
     # Sort by priority (urgent first) and creation date (oldest first)
     priority_order = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
-    open_tickets.sort(
+    candidates.sort(
         key=lambda t: (priority_order.get(t["priority"], 2), t["created_at"])
     )
 
     # Limit results
-    open_tickets = open_tickets[:limit]
+    open_tickets = [
+        ticket
+        for ticket in (storage.get_ticket(c["id"]) for c in candidates[:limit])
+        if ticket is not None
+    ]
+
+    if not open_tickets:
+        return "✅ No open tickets found. All tickets are either solved or closed."
 
     # Format output
     output = f"**Open Tickets ({len(open_tickets)}):**\n\n"
@@ -796,39 +789,40 @@ def assign_ticket(ticket_id: int, assignee_id: str) -> str:
     Returns:
         Confirmation of the assignment.
     """
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
-        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
-
     # Find agent
     agent = next((a for a in AVAILABLE_AGENTS if a["id"] == assignee_id), None)
+    old_assignee = None
+
+    def apply_assignee(ticket: Dict) -> Optional[bool]:
+        nonlocal old_assignee
+        if not agent:
+            return False
+
+        old_assignee = ticket.get("assignee_name")
+        ticket["assignee_id"] = agent["id"]
+        ticket["assignee_name"] = agent["name"]
+        ticket["updated_at"] = datetime.now().isoformat()
+
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "action": "assigned",
+                "actor": "IT Support System",
+                "changes": {
+                    "assignee": {"old": old_assignee, "new": agent["name"]},
+                },
+            }
+        )
+
+    # Update and save ticket in one step
+    if not _update_ticket(ticket_id, apply_assignee):
+        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
+
     if not agent:
         available = ", ".join([a["id"] for a in AVAILABLE_AGENTS])
         return f"❌ Invalid assignee ID. Available agents: {available}"
 
-    # Assign ticket
-    # ticket already loaded above
-    old_assignee = ticket.get("assignee_name")
-    ticket["assignee_id"] = agent["id"]
-    ticket["assignee_name"] = agent["name"]
-    ticket["updated_at"] = datetime.now().isoformat()
-
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "action": "assigned",
-            "actor": "IT Support System",
-            "changes": {
-                "assignee": {"old": old_assignee, "new": agent["name"]},
-            },
-        }
-    )
-
-    # Save updated ticket
-    _save_ticket(ticket)
-
     result = f"""✅ Ticket Assigned Successfully!
 
 **Ticket ID**: #{ticket_id}
@@ -856,35 +850,36 @@ def add_tags_to_ticket(ticket_id: int, tags: List[str]) -> str:
     Returns:
         Confirmation with updated tags.
     """
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
+    new_tags = []
+
+    def apply_tags(ticket: Dict) -> Optional[bool]:
+        # Add tags (avoid duplicates)
+        existing_tags = set(ticket.get("tags", []))
+        new_tags.extend(tag.lower() for tag in tags if tag.lower() not in existing_tags)
+        if not new_tags:
+            return False
+
+        ticket["tags"].extend(new_tags)
+        ticket["updated_at"] = datetime.now().isoformat()
+
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "action": "tags_added",
+                "actor": "IT Support System",
+                "changes": {"tags_added": new_tags},
+            }
+        )
+
+    # Update and save ticket in one step
+    ticket = _update_ticket(ticket_id, apply_tags)
     if not ticket:
         return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
-    # Add tags (avoid duplicates)
-    # ticket already loaded above
-    existing_tags = set(ticket.get("tags", []))
-    new_tags = [tag.lower() for tag in tags if tag.lower() not in existing_tags]
-
     if not new_tags:
         return f"ℹ️ All tags already exist on ticket #{ticket_id}."
 
-    ticket["tags"].extend(new_tags)
-    ticket["updated_at"] = datetime.now().isoformat()
-
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "action": "tags_added",
-            "actor": "IT Support System",
-            "changes": {"tags_added": new_tags},
-        }
-    )
-
-    # Save updated ticket
-    _save_ticket(ticket)
-
     result = f"""✅ Tags Added Successfully!
 
 **Ticket ID**: #{ticket_id}
@@ -912,35 +907,37 @@ def set_ticket_category(ticket_id: int, category: str) -> str:
     Returns:
         Confirmation with the updated category.
     """
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
+    valid = category in [c.value for c in TicketCategory]
+    old_category = None
+
+    def apply_category(ticket: Dict) -> Optional[bool]:
+        nonlocal old_category
+        if not valid:
+            return False
+
+        old_category = ticket.get("category", "other")
+        ticket["category"] = category
+        ticket["updated_at"] = datetime.now().isoformat()
+
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "action": "category_changed",
+                "actor": "IT Support System",
+                "changes": {"category": {"old": old_category, "new": category}},
+            }
+        )
+
+    # Update and save ticket in one step
+    if not _update_ticket(ticket_id, apply_category):
         return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
     # Validate category
-    if category not in [c.value for c in TicketCategory]:
+    if not valid:
         valid_categories = ", ".join([c.value for c in TicketCategory])
         return f"❌ Invalid category. Valid options: {valid_categories}"
 
-    # Set category
-    # ticket already loaded above
-    old_category = ticket.get("category", "other")
-    ticket["category"] = category
-    ticket["updated_at"] = datetime.now().isoformat()
-
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "action": "category_changed",
-            "actor": "IT Support System",
-            "changes": {"category": {"old": old_category, "new": category}},
-        }
-    )
-
-    # Save updated ticket
-    _save_ticket(ticket)
-
     result = f"""✅ Category Updated Successfully!
 
 **Ticket ID**: #{ticket_id}
@@ -968,29 +965,27 @@ def set_ticket_due_date(ticket_id: int, due_date: str) -> str:
     Returns:
         Confirmation with the due date.
     """
-    # Check if ticket exists
-    ticket = _get_ticket(ticket_id)
-    if not ticket:
-        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
+    old_due_date = None
 
-    # Set due date
-    # ticket already loaded above
-    old_due_date = ticket.get("due_date")
-    ticket["due_date"] = due_date
-    ticket["updated_at"] = datetime.now().isoformat()
-
-    # Add to history
-    ticket["history"].append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "action": "due_date_set",
-            "actor": "IT Support System",
-            "changes": {"due_date": {"old": old_due_date, "new": due_date}},
-        }
-    )
+    def apply_due_date(ticket: Dict) -> None:
+        nonlocal old_due_date
+        old_due_date = ticket.get("due_date")
+        ticket["due_date"] = due_date
+        ticket["updated_at"] = datetime.now().isoformat()
 
-    # Save updated ticket
-    _save_ticket(ticket)
+        # Add to history
+        ticket["history"].append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "action": "due_date_set",
+                "actor": "IT Support System",
+                "changes": {"due_date": {"old": old_due_date, "new": due_date}},
+            }
+        )
+
+    # Update and save ticket in one step
+    if not _update_ticket(ticket_id, apply_due_date):
+        return f"❌ Ticket #{ticket_id} not found. Please verify the ticket ID and try again."
 
     result = f"""✅ Due Date Set Successfully!
 
@@ -0,0 +1,118 @@
+"""Tests for the async ticket storage facade."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.typhoon_it_support.tools.async_ticket_storage import AsyncTicketStorage
+from src.typhoon_it_support.tools.ticket_storage import get_storage, reset_storage
+
+
+def _ticket(ticket_id: int, status: str = "new") -> dict:
+    """Build a minimal ticket."""
+    return {
+        "id": ticket_id,
+        "subject": f"VPN drops {ticket_id}",
+        "description": "Connection lost every few minutes",
+        "status": status,
+        "priority": "normal",
+        "created_at": f"2025-01-01T00:00:{ticket_id % 60:02d}",
+        "tags": [],
+        "history": [],
+    }
+
+
+@pytest.fixture(autouse=True)
+def reset_tickets(tmp_path):
+    """Point the global storage at a temporary file."""
+    reset_storage(tmp_path / "test_tickets.jsonl")
+    yield
+    get_storage().clear()
+
+
+@pytest.fixture
+def storage():
+    """Provide a facade with two storage threads."""
+    facade = AsyncTicketStorage(max_workers=2)
+    yield facade
+    facade.close()
+
+
+class TestAsyncTicketStorage:
+    """Tests for AsyncTicketStorage."""
+
+    async def test_round_trip(self, storage):
+        """Calls reach the global storage and return its results."""
+        await storage.save_tickets([_ticket(1000), _ticket(1001, status="open")])
+
+        assert (await storage.get_ticket(1000))["subject"] == "VPN drops 1000"
+        assert await storage.count() == 2
+        tickets = await storage.query_tickets(status="open")
+        assert [t["id"] for t in tickets] == [1001]
+
+        def reopen(ticket):
+            ticket["status"] = "open"
+
+        ticket = await storage.update_ticket(1000, reopen)
+        assert ticket["status"] == "open"
+        assert get_storage().get_ticket(1000)["status"] == "open"
+
+        assert await storage.delete_ticket(1000)
+        assert await storage.get_ticket(1000) is None
+
+    async def test_follows_reset_storage(self, storage, tmp_path):
+        """The facade uses whichever storage is global at call time."""
+        await storage.save_ticket(_ticket(1000))
+        reset_storage(tmp_path / "other.jsonl")
+
+        assert await storage.get_ticket(1000) is None
+
+    async def test_runs_off_the_event_loop(self, storage):
+        """A blocked storage call doesn't block other coroutines."""
+        await storage.save_ticket(_ticket(1000))
+        release = threading.Event()
+        threads = []
+
+        def wait_for_release(ticket):
+            threads.append(threading.current_thread().name)
+            # Only the event loop sets this, so it times out if the loop is blocked
+            assert release.wait(timeout=5)
+            ticket["status"] = "open"
+
+        update = asyncio.create_task(storage.update_ticket(1000, wait_for_release))
+        while not threads:
+            await asyncio.sleep(0.01)
+        release.set()
+
+        assert (await update)["status"] == "open"
+        assert threads[0].startswith("ticket-io")
+
+    async def test_exceptions_propagate(self, storage):
+        """Errors raised on a storage thread are raised to the caller."""
+        await storage.save_ticket(_ticket(1000))
+
+        def fail(ticket):
+            raise ValueError("rejected")
+
+        with pytest.raises(ValueError, match="rejected"):
+            await storage.update_ticket(1000, fail)
+
+    async def test_pool_is_bounded(self, storage):
+        """Concurrent calls share the configured number of threads."""
+        threads = set()
+
+        def record_thread():
+            threads.add(threading.current_thread().name)
+            return threading.current_thread().name
+
+        await asyncio.gather(*(storage.run(record_thread) for _ in range(20)))
+
+        assert 1 <= len(threads) <= 2
+
+    async def test_close_and_reuse(self, storage):
+        """The pool starts again after close()."""
+        await storage.save_ticket(_ticket(1000))
+        storage.close()
+
+        assert (await storage.get_ticket(1000))["id"] == 1000
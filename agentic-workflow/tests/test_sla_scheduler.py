@@ -0,0 +1,192 @@
+"""Tests for the SLA breach scheduler."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.typhoon_it_support.tools.sla_scheduler import SLAScheduler
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+from src.typhoon_it_support.tools.ticket_storage_sqlite import SQLiteTicketStorage
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = START
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **delta: float) -> None:
+        self.now += timedelta(**delta)
+
+
+def _ticket(ticket_id: int, **fields) -> dict:
+    """Build a new ticket due for first response in 1h and resolution in 8h."""
+    ticket = {
+        "id": ticket_id,
+        "subject": f"Issue {ticket_id}",
+        "status": "new",
+        "priority": "high",
+        "created_at": START.isoformat(),
+        "first_response_at": None,
+        "resolved_at": None,
+        "sla_first_response_due": (START + timedelta(hours=1)).isoformat(),
+        "sla_resolution_due": (START + timedelta(hours=8)).isoformat(),
+        "sla_breach": {
+            "first_response_breached": False,
+            "resolution_breached": False,
+        },
+        "history": [],
+    }
+    ticket.update(fields)
+    return ticket
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Provide a storage instance backed by a temporary file."""
+    return TicketStorage(tmp_path / "tickets.jsonl")
+
+
+@pytest.fixture
+def clock():
+    """Provide a controllable clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(storage, clock):
+    """Provide a scheduler watching the storage."""
+    return SLAScheduler(storage, clock=clock)
+
+
+class TestSLAScheduler:
+    """Tests for SLAScheduler."""
+
+    def test_flags_breaches_when_due(self, storage, clock, scheduler):
+        """Flags flip once their deadline passes, not before."""
+        storage.save_ticket(_ticket(1000))
+
+        assert scheduler.run_pending() == 0
+        assert len(scheduler) == 2
+        assert scheduler.seconds_until_next() == scheduler.poll_interval
+
+        clock.advance(hours=1, seconds=1)
+        assert scheduler.run_pending() == 1
+        ticket = storage.get_ticket(1000)
+        assert ticket["sla_breach"] == {
+            "first_response_breached": True,
+            "resolution_breached": False,
+        }
+        assert ticket["history"][-1]["action"] == "sla_breached"
+
+        clock.advance(hours=8)
+        assert scheduler.run_pending() == 1
+        assert storage.get_ticket(1000)["sla_breach"]["resolution_breached"]
+        assert len(scheduler) == 0
+
+        # Breached tickets are found by the filter
+        assert [t["id"] for t in storage.query_tickets(sla_breached=True)] == [1000]
+
+    def test_overdue_tickets_are_flagged_at_startup(self, storage, clock, scheduler):
+        """Tickets whose deadline passed while nothing ran are caught up."""
+        clock.advance(days=1)
+        storage.save_tickets([_ticket(1000), _ticket(1001, status="solved")])
+
+        assert scheduler.run_pending() == 2
+        assert storage.get_ticket(1000)["sla_breach"] == {
+            "first_response_breached": True,
+            "resolution_breached": True,
+        }
+        assert not storage.get_ticket(1001)["sla_breach"]["resolution_breached"]
+
+    def test_follows_ticket_changes(self, storage, clock, scheduler):
+        """Met, moved and new deadlines are picked up from the changes feed."""
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        scheduler.run_pending()
+
+        def respond(ticket):
+            ticket["status"] = "open"
+            ticket["first_response_at"] = START.isoformat()
+
+        def extend(ticket):
+            ticket["sla_first_response_due"] = (START + timedelta(hours=3)).isoformat()
+
+        storage.update_ticket(1000, respond)
+        storage.update_ticket(1001, extend)
+        storage.save_ticket(_ticket(1002))
+
+        clock.advance(hours=2)
+        assert scheduler.run_pending() == 1
+        assert not storage.get_ticket(1000)["sla_breach"]["first_response_breached"]
+        assert not storage.get_ticket(1001)["sla_breach"]["first_response_breached"]
+        assert storage.get_ticket(1002)["sla_breach"]["first_response_breached"]
+
+        clock.advance(hours=2)
+        assert scheduler.run_pending() == 1
+        assert storage.get_ticket(1001)["sla_breach"]["first_response_breached"]
+
+    def test_follows_other_sqlite_workers(self, tmp_path, clock):
+        """Tickets written through another SQLite connection are scheduled."""
+        storage = SQLiteTicketStorage(tmp_path / "tickets.db")
+        other = SQLiteTicketStorage(tmp_path / "tickets.db")
+        scheduler = SLAScheduler(storage, clock=clock)
+        storage.save_ticket(_ticket(1000))
+        scheduler.run_pending()
+
+        other.save_ticket(_ticket(1001))
+        other.update_ticket(1000, lambda t: t.update(first_response_at=START.isoformat()))
+
+        clock.advance(hours=2)
+        assert scheduler.run_pending() == 1
+        assert other.get_ticket(1001)["sla_breach"]["first_response_breached"]
+        assert not other.get_ticket(1000)["sla_breach"]["first_response_breached"]
+
+    def test_sleeps_until_next_deadline(self, storage, clock, scheduler):
+        """The wait is capped by the next due time."""
+        storage.save_ticket(
+            _ticket(
+                1000,
+                sla_first_response_due=(START + timedelta(seconds=0.25)).isoformat(),
+            )
+        )
+        scheduler.run_pending()
+
+        assert scheduler.seconds_until_next() == pytest.approx(0.25)
+        clock.advance(seconds=1)
+        assert scheduler.seconds_until_next() == 0
+
+    def test_background_thread(self, storage):
+        """The thread flags a deadline shortly after it passes."""
+        due = datetime.now() + timedelta(seconds=0.2)
+        storage.save_ticket(_ticket(1000, sla_first_response_due=due.isoformat()))
+        scheduler = SLAScheduler(storage, poll_interval=0.05)
+        scheduler.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not storage.get_ticket(1000)["sla_breach"]["first_response_breached"]:
+                assert time.monotonic() < deadline
+                time.sleep(0.02)
+        finally:
+            scheduler.stop()
+
+        assert datetime.now() >= due
+
+    def test_one_leader_per_lock_file(self, storage, tmp_path):
+        """Only the scheduler holding the lock file runs the checks."""
+        lock_path = tmp_path / "sla.lock"
+        first = SLAScheduler(storage, lock_path=lock_path)
+        second = SLAScheduler(storage, lock_path=lock_path)
+
+        assert first.is_leader()
+        assert not second.is_leader()
+        assert first.is_leader()
+
+        first._release()
+        assert second.is_leader()
+        assert SLAScheduler(storage).is_leader()
@@ -1,10 +1,15 @@
 """Tests for ticket API endpoints - Real user scenarios and edge cases."""
 
 
+import asyncio
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
 from src.typhoon_it_support.api.server import app
+from src.typhoon_it_support.api.ticket_endpoints import stream_changes
+from src.typhoon_it_support.tools import ticket_export
 from src.typhoon_it_support.tools.ticket_storage import get_storage
 
 client = TestClient(app)
@@ -96,6 +101,57 @@ class TestRealUserAPIScenarios:
         assert data["total"] == 1
         assert data["tickets"][0]["status"] == "new"
 
+    def test_page_through_tickets(self):
+        """Scenario: Ticket board loads tickets page by page."""
+        for i in range(5):
+            client.post(
+                "/tickets", json={"subject": f"Issue {i}", "description": "Desc"}
+            )
+
+        seen = []
+        url = "/tickets?limit=2"
+        while url:
+            data = client.get(url).json()
+            seen.extend(t["id"] for t in data["tickets"])
+            url = data["next_cursor"] and f"/tickets?limit=2&cursor={data['next_cursor']}"
+
+        assert sorted(seen) == [1000, 1001, 1002, 1003, 1004]
+        assert len(seen) == 5
+
+        response = client.get("/tickets/search/advanced?cursor=garbage")
+        assert response.status_code == 400
+
+        response = client.get("/tickets/search/advanced?archived=true")
+        assert response.status_code == 400
+
+    def test_list_ticket_summaries(self):
+        """Scenario: Ticket board lists summaries and opens full tickets."""
+        for i in range(3):
+            client.post(
+                "/tickets", json={"subject": f"Issue {i}", "description": "Desc"}
+            )
+        client.patch("/tickets/1001", json={"comment": "Looking into it"})
+
+        data = client.get("/tickets?view=summary&limit=2").json()
+        summary = data["tickets"][1]
+        assert summary["subject"] == "Issue 1"
+        assert summary["status"] == "new"
+        assert "sla_breach" in summary
+        assert "history" not in summary
+        assert "description" not in summary
+
+        data = client.get(f"/tickets?view=summary&cursor={data['next_cursor']}").json()
+        assert [t["id"] for t in data["tickets"]] == [1000]
+
+        data = client.get("/tickets/search/advanced?query=issue&fields=subject").json()
+        for ticket in data["tickets"]:
+            assert set(ticket) == {"id", "created_at", "subject"}
+        assert data["total"] == 3
+
+        ticket = client.get("/tickets/1001").json()["ticket"]
+        assert ticket["description"] == "Desc"
+        assert ticket["history"]
+
     def test_get_ticket_details(self):
         """Scenario: User checks their ticket details."""
         # Create ticket
@@ -283,6 +339,53 @@ class TestRealUserAPIScenarios:
             assert ticket["status"] == "solved"
             assert "email-outage-resolved" in ticket["tags"]
 
+    def test_bulk_import_tickets(self):
+        """Scenario: Admin migrates tickets from the old helpdesk."""
+        records = [
+            {
+                "subject": f"Legacy issue {i}",
+                "description": "Migrated",
+                "priority": "high" if i % 2 else "low",
+                "status": "solved" if i % 3 == 0 else "open",
+                "category": "network",
+                "assignee_id": "agent_3",
+                "tags": ["Legacy"],
+                "requester_email": "user@example.com",
+                "requester_name": "User",
+                "created_at": "2025-01-01T09:00:00",
+                "first_response_at": "2025-01-01T09:30:00",
+            }
+            for i in range(2500)
+        ]
+        body = "\n".join(json.dumps(record) for record in records) + "\n"
+
+        response = client.post(
+            "/tickets/bulk/import",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2500
+        assert data["errors"] == []
+        assert data["ticket_ids"] == list(range(1000, 3500))
+
+        ticket = client.get("/tickets/1001").json()["ticket"]
+        assert ticket["subject"] == "Legacy issue 1"
+        assert ticket["assignee_name"] is not None
+        assert ticket["tags"] == ["legacy"]
+        assert ticket["sla_first_response_due"] == "2025-01-01T10:00:00"
+        assert ticket["sla_breach"] == {
+            "first_response_breached": False,
+            "resolution_breached": True,
+        }
+        assert ticket["history"][0]["action"] == "imported"
+
+        stats = client.get("/tickets/stats/summary").json()
+        assert stats["total"] == 2500
+        assert stats["by_category"] == {"network": 2500}
+
     def test_export_tickets_csv(self):
         """Scenario: Admin exports tickets for reporting."""
         # Create tickets
@@ -309,6 +412,59 @@ class TestRealUserAPIScenarios:
         assert "Subject" in csv_content
         assert "Issue 1" in csv_content or "Issue 2" in csv_content
 
+    def test_export_large_csv_in_pages(self):
+        """Scenario: Export spans several storage pages without gaps."""
+        storage = get_storage()
+        first_id = storage.reserve_ids(1200)
+        storage.save_tickets(
+            [
+                {
+                    "id": first_id + i,
+                    "subject": f"Bulk {i}",
+                    "description": "Imported",
+                    "status": "open" if i % 2 else "new",
+                    "priority": "low",
+                    "requester_name": "Importer",
+                    "requester_email": "importer@example.com",
+                    "created_at": f"2025-01-01T{i // 60:02d}:{i % 60:02d}:00",
+                    "updated_at": "2025-01-01T00:00:00",
+                }
+                for i in range(1200)
+            ]
+        )
+
+        response = client.get("/tickets/export/csv?status=open")
+
+        assert response.status_code == 200
+        ids = [int(line.split(",")[0]) for line in response.text.splitlines()[1:]]
+        assert ids == [first_id + i for i in range(1199, 0, -2)]
+
+    def test_export_tickets_arrow(self):
+        """Scenario: BI pipeline pulls tickets as an Arrow stream."""
+        pa = pytest.importorskip("pyarrow")
+        for i in range(3):
+            client.post(
+                "/tickets",
+                json={"subject": f"Issue {i + 1}", "description": "Desc"},
+            )
+
+        response = client.get("/tickets/export/arrow")
+
+        assert response.status_code == 200
+        content_type = response.headers["content-type"]
+        assert content_type == "application/vnd.apache.arrow.stream"
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 3
+        assert table.column("subject").to_pylist() == ["Issue 3", "Issue 2", "Issue 1"]
+
+    def test_export_arrow_without_pyarrow(self, monkeypatch):
+        """Scenario: Server without pyarrow says the export is unavailable."""
+        monkeypatch.setattr(ticket_export, "pa", None)
+
+        response = client.get("/tickets/export/arrow")
+
+        assert response.status_code == 501
+
     def test_get_ticket_statistics(self):
         """Scenario: Dashboard loads statistics."""
         # Create varied tickets
@@ -336,8 +492,65 @@ class TestRealUserAPIScenarios:
         assert "by_status" in data
         assert "by_priority" in data
         assert data["by_status"]["open"] >= 1
+        assert sum(data["open_by_assignee"].values()) == 3
+        assert data["status_by_priority"]["closed"] == {"low": 1}
         assert data["by_status"]["solved"] >= 1
 
+    def test_get_sla_statistics(self):
+        """Scenario: Service manager reviews SLA performance."""
+        records = [
+            {
+                "priority": "urgent",
+                "created_at": "2025-01-01T09:00:00",
+                "first_response_at": "2025-01-01T09:10:00",
+                "resolved_at": "2025-01-01T10:00:00",
+                "status": "solved",
+            },
+            {
+                "priority": "high",
+                "created_at": "2025-01-01T09:00:00",
+                "first_response_at": "2025-01-01T11:00:00",
+                "resolved_at": "2025-01-01T19:00:00",
+                "status": "solved",
+            },
+            {"priority": "normal"},
+        ]
+        body = "\n".join(
+            json.dumps(
+                {
+                    "subject": "SLA",
+                    "description": "Test",
+                    "requester_email": "user@example.com",
+                    "requester_name": "User",
+                    **record,
+                }
+            )
+            for record in records
+        )
+        imported = client.post("/tickets/bulk/import", content=body).json()
+
+        response = client.get("/tickets/stats/sla")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert data["first_response"]["responded"] == 2
+        assert data["first_response"]["breached"] == 1
+        assert data["first_response"]["percentile_minutes"]["p50"] == 65.0
+        assert data["resolution"]["resolved"] == 2
+        assert data["resolution"]["mttr_minutes"] == 330.0
+        assert data["resolution"]["breach_rate"] == round(1 / 3, 4)
+        assert data["open_breached"] == 0
+        assert data["by_priority"]["high"]["resolution_breach_rate"] == 1.0
+        assert data["by_priority"]["urgent"]["mttr_minutes"] == 60.0
+        assert data["by_priority"]["normal"]["mttr_minutes"] is None
+
+        # Later calls pick up changed tickets
+        client.delete(f"/tickets/{imported['ticket_ids'][1]}")
+        data = client.get("/tickets/stats/sla").json()
+        assert data["total"] == 2
+        assert data["resolution"]["breached"] == 0
+
     def test_get_available_agents(self):
         """Scenario: UI loads agent list for assignment."""
         response = client.get("/tickets/agents")
@@ -353,6 +566,125 @@ class TestRealUserAPIScenarios:
         assert "name" in agent
         assert "email" in agent
 
+    def test_board_refresh_with_etags(self, monkeypatch):
+        """Scenario: Polling board re-downloads only what changed."""
+        for i in range(2):
+            client.post(
+                "/tickets", json={"subject": f"Issue {i}", "description": "Desc"}
+            )
+
+        urls = [
+            "/tickets",
+            "/tickets/1000",
+            "/tickets/stats/summary",
+            "/tickets/agents",
+        ]
+        etags = {}
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == "no-cache"
+            etags[url] = response.headers["etag"]
+
+        # Unchanged data is neither loaded nor sent again
+        storage = get_storage()
+        for method in ("query_tickets", "get_ticket", "get_stats"):
+            monkeypatch.setattr(storage, method, lambda *a, **kw: pytest.fail())
+        for url in urls:
+            response = client.get(url, headers={"If-None-Match": etags[url]})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etags[url]
+        monkeypatch.undo()
+
+        client.patch("/tickets/1001", json={"status": "open"})
+
+        for url, status in (
+            ("/tickets", 200),
+            ("/tickets/1000", 304),
+            ("/tickets/stats/summary", 200),
+            ("/tickets/agents", 304),
+        ):
+            response = client.get(url, headers={"If-None-Match": etags[url]})
+            assert response.status_code == status
+
+        stale = f'"stale", {etags["/tickets/1000"]}'
+        response = client.get("/tickets/1001", headers={"If-None-Match": stale})
+        assert response.status_code == 200
+        assert response.json()["ticket"]["status"] == "open"
+
+    def test_poll_ticket_changes(self):
+        """Scenario: UI fetches only what changed since its last poll."""
+        version = client.get("/tickets/changes").json()["version"]
+
+        ticket_id = client.post(
+            "/tickets",
+            json={"subject": "Monitor flickers", "description": "Since this morning"},
+        ).json()["ticket"]["id"]
+        client.patch(f"/tickets/{ticket_id}", json={"status": "open"})
+
+        response = client.get(f"/tickets/changes?since={version}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reset"] is False
+        assert [(c["ticket_id"], c["op"]) for c in data["changes"]] == [
+            (ticket_id, "create"),
+            (ticket_id, "update"),
+        ]
+        assert data["version"] == data["changes"][-1]["version"]
+
+        # Nothing new since then
+        response = client.get(f"/tickets/changes?since={data['version']}")
+        assert response.json()["changes"] == []
+
+        # A version the server doesn't know makes the UI reload
+        feed_id, _, number = data["version"].rpartition(".")
+        for since in (f"{feed_id}.{int(number) + 100}", f"other.{number}", "5"):
+            response = client.get("/tickets/changes", params={"since": since})
+            data = response.json()
+            assert data["reset"] is True
+            assert data["changes"] == []
+            assert data["version"] == f"{feed_id}.{number}"
+
+    async def test_stream_ticket_changes(self):
+        """Scenario: UI receives live updates made by the agent."""
+        response = await stream_changes(since=None, last_event_id=None)
+        assert response.media_type == "text/event-stream"
+        events = response.body_iterator
+
+        first = asyncio.create_task(anext(events))
+        await asyncio.sleep(0.05)
+        get_storage().save_ticket(
+            {
+                "id": 4242,
+                "subject": "Created by the agent",
+                "status": "new",
+                "priority": "normal",
+                "created_at": "2025-01-01T00:00:00",
+            }
+        )
+
+        event = await asyncio.wait_for(first, timeout=5)
+        await events.aclose()
+        event_id, data = event.strip().split("\n")
+        change = json.loads(data.removeprefix("data: "))
+        assert change["type"] == "change"
+        assert (change["ticket_id"], change["op"]) == (4242, "create")
+        assert event_id == f"id: {change['version']}"
+
+    async def test_stream_from_another_worker(self):
+        """Scenario: UI reconnects with an event ID of another worker."""
+        response = await stream_changes(since=None, last_event_id="other.3")
+        events = response.body_iterator
+
+        event = await asyncio.wait_for(anext(events), timeout=5)
+        await events.aclose()
+        change = json.loads(event.strip().split("\n")[1].removeprefix("data: "))
+        assert change["type"] == "reset"
+        assert change["version"] == get_storage().changes.token(
+            get_storage().changes.version
+        )
+
 
 # ============= Edge Cases API Tests =============
 
@@ -408,6 +740,24 @@ class TestEdgeCasesAPI:
         )
         assert response.status_code == 400
 
+    def test_update_with_stale_version(self):
+        """Edge case: Update based on an outdated copy of the ticket."""
+        response = client.post(
+            "/tickets", json={"subject": "Test", "description": "Test"}
+        )
+        ticket_id = response.json()["ticket"]["id"]
+        version = response.json()["ticket"]["version"]
+
+        response = client.patch(
+            f"/tickets/{ticket_id}", json={"status": "open", "version": version}
+        )
+        assert response.status_code == 200
+
+        response = client.patch(
+            f"/tickets/{ticket_id}", json={"priority": "high", "version": version}
+        )
+        assert response.status_code == 409
+
     def test_set_invalid_priority(self):
         """Edge case: Invalid priority value."""
         response = client.post(
@@ -461,6 +811,63 @@ class TestEdgeCasesAPI:
         assert data["total"] == 3
         assert len(data["errors"]) == 2
 
+    def test_bulk_update_errors_in_request_order(self):
+        """Edge case: Errors are listed in the order of the ticket IDs."""
+        first, second = (
+            client.post("/tickets", json={"subject": "Test", "description": "Test"})
+            .json()["ticket"]["id"]
+            for _ in range(2)
+        )
+
+        response = client.post(
+            "/tickets/bulk/update",
+            json={"ticket_ids": [9999, first, 8888, second], "status": "bogus"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["errors"] == [
+            "Ticket #9999 not found",
+            f"Invalid status for ticket #{first}",
+            "Ticket #8888 not found",
+            f"Invalid status for ticket #{second}",
+        ]
+
+    def test_bulk_import_reports_bad_lines(self):
+        """Edge case: Invalid import lines are reported, the rest imported."""
+        valid = {
+            "subject": "Test",
+            "description": "Test",
+            "requester_email": "user@example.com",
+            "requester_name": "User",
+        }
+        body = "\n".join(
+            [
+                json.dumps(valid),
+                "{not json",
+                "",
+                json.dumps({**valid, "priority": "critical"}),
+                json.dumps({"subject": "No description"}),
+                json.dumps(valid),
+            ]
+        )
+
+        response = client.post("/tickets/bulk/import", content=body)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["ticket_ids"] == [1000, 1001]
+        assert [e["line"] for e in data["errors"]] == [2, 4, 5]
+        assert "Invalid priority" in data["errors"][1]["error"]
+        assert "description" in data["errors"][2]["error"]
+        assert client.get("/tickets/1001").json()["ticket"]["status"] == "new"
+
+    def test_bulk_import_empty_body(self):
+        """Edge case: Importing nothing succeeds without creating tickets."""
+        response = client.post("/tickets/bulk/import", content=b"")
+        assert response.status_code == 200
+        assert response.json()["imported"] == 0
+
     def test_search_with_no_results(self):
         """Edge case: Search returns no results."""
         response = client.get("/tickets/search/advanced?query=nonexistent_keyword")
@@ -473,6 +880,15 @@ class TestEdgeCasesAPI:
         response = client.get("/tickets?status=invalid_status")
         assert response.status_code == 400
 
+    def test_list_unknown_fields_or_view(self):
+        """Edge case: Unknown projection fields and views are rejected."""
+        response = client.get("/tickets?fields=subject,password")
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
+
+        response = client.get("/tickets/search/advanced?view=tiny")
+        assert response.status_code == 400
+
     def test_very_long_subject(self):
         """Edge case: Very long ticket subject."""
         long_subject = "A" * 1000
@@ -0,0 +1,166 @@
+"""Tests for archiving tickets into compressed segments."""
+
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from src.typhoon_it_support.tools import ticket_archive
+from src.typhoon_it_support.tools.ticket_archive import TicketArchive
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+
+
+def _ticket(ticket_id: int, status: str = "closed", days_ago: int = 100) -> dict:
+    """Build a ticket resolved the given number of days ago."""
+    resolved_at = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return {
+        "id": ticket_id,
+        "subject": f"Printer jam {ticket_id}",
+        "description": "Paper stuck in tray",
+        "status": status,
+        "priority": "normal",
+        "created_at": "2025-01-01T00:00:00",
+        "resolved_at": resolved_at if status in ("solved", "closed") else None,
+    }
+
+
+class TestTicketArchive:
+    """Tests for the segment store."""
+
+    def test_write_and_read_back(self, tmp_path):
+        """Tickets are readable by ID across several compressed members."""
+        archive = TicketArchive(tmp_path / "archive", block_size=4)
+        tickets = [_ticket(1000 + i) for i in range(10)]
+        archive.write_segment(tickets)
+
+        assert len(archive) == 10
+        assert archive.get(1007) == tickets[7]
+        assert archive.get(999) is None
+
+        # Segments stay ordinary gzip files
+        segment = next((tmp_path / "archive").glob("*.jsonl.gz"))
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == list(range(1000, 1010))
+
+    def test_newest_segment_wins(self, tmp_path):
+        """A ticket archived twice resolves to its latest copy."""
+        archive = TicketArchive(tmp_path)
+        archive.write_segment([_ticket(1000), _ticket(1001)])
+        archive.write_segment([dict(_ticket(1000), subject="Updated")])
+
+        assert archive.get(1000)["subject"] == "Updated"
+        assert sorted(t["id"] for t in archive.iter_tickets()) == [1000, 1001]
+
+    def test_segments_from_other_instances_are_found(self, tmp_path):
+        """A lookup miss picks up segments written elsewhere."""
+        reader = TicketArchive(tmp_path)
+        TicketArchive(tmp_path).write_segment([_ticket(1000)])
+
+        assert reader.get(1000)["id"] == 1000
+
+    def test_misses_list_the_directory_only_when_it_changed(
+        self, tmp_path, monkeypatch
+    ):
+        """Repeated misses don't rescan an unchanged directory."""
+        reader = TicketArchive(tmp_path)
+        writer = TicketArchive(tmp_path)
+        writer.write_segment([_ticket(1000)])
+        settled = time.time_ns() - 10 * ticket_archive._MTIME_SETTLE_NS
+        os.utime(tmp_path, ns=(settled, settled))
+
+        listings = []
+        listdir = os.listdir
+        monkeypatch.setattr(
+            ticket_archive.os,
+            "listdir",
+            lambda path: listings.append(path) or listdir(path),
+        )
+        assert reader.get(1000)["id"] == 1000
+        assert reader.get(999) is None
+        assert reader.get(999) is None
+        assert len(listings) == 1
+
+        writer.write_segment([_ticket(1001)])
+        listings.clear()
+        assert reader.get(1001)["id"] == 1001
+        assert len(listings) == 1
+
+    def test_incomplete_segment_is_ignored(self, tmp_path):
+        """A segment without an index, e.g. after a crash, is not loaded."""
+        (tmp_path / "segment-000001.jsonl.gz").write_bytes(b"partial")
+
+        archive = TicketArchive(tmp_path)
+        assert len(archive) == 0
+        assert archive.write_segment([_ticket(1000)]) == 1
+        assert archive.get(1000)["id"] == 1000
+
+    def test_search(self, tmp_path):
+        """Archived tickets can be searched on demand."""
+        archive = TicketArchive(tmp_path)
+        archive.write_segment(
+            [_ticket(1000), dict(_ticket(1001), subject="VPN ใช้งานไม่ได้")]
+        )
+
+        assert [t["id"] for t in archive.search("ใช้งาน")] == [1001]
+        assert archive.search("vpn", exclude={1001}) == []
+
+
+class TestStorageArchive:
+    """Tests for the retention job of the JSONL storage."""
+
+    def test_old_closed_tickets_are_archived(self, tmp_path):
+        """Only old solved and closed tickets leave the hot file."""
+        path = tmp_path / "tickets.jsonl"
+        storage = TicketStorage(path)
+        storage.save_tickets(
+            [
+                _ticket(1000),
+                _ticket(1001, status="solved"),
+                _ticket(1002, days_ago=5),
+                _ticket(1003, status="open"),
+            ]
+        )
+        size_before = path.stat().st_size
+
+        assert storage.archive_tickets(older_than_days=30) == 2
+        assert storage.archive_tickets(older_than_days=30) == 0
+        assert path.stat().st_size < size_before
+        assert sorted(storage.load_all_tickets()) == [1002, 1003]
+        assert storage.count() == 2
+
+        # Still readable by ID and searchable, also from a fresh instance
+        reopened = TicketStorage(path)
+        assert reopened.get_ticket(1001)["status"] == "solved"
+        assert sorted(t["id"] for t in reopened.search_archive("printer")) == [
+            1000,
+            1001,
+        ]
+        assert reopened.search_tickets("printer") != []
+        assert all(t["id"] >= 1002 for t in reopened.search_tickets("printer"))
+        assert reopened.get_next_id() == 1004
+
+    def test_resaved_ticket_overrides_archive(self, tmp_path):
+        """Saving an archived ticket again makes it active."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        storage.save_ticket(_ticket(1000))
+        storage.archive_tickets(older_than_days=30)
+
+        ticket = storage.get_ticket(1000)
+        ticket["status"] = "open"
+        storage.save_ticket(ticket)
+
+        assert storage.get_ticket(1000)["status"] == "open"
+        assert storage.search_archive("printer") == []
+
+    def test_clear_removes_archive(self, tmp_path):
+        """Clearing the storage also drops archived tickets."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        storage.save_ticket(_ticket(1000))
+        storage.archive_tickets(older_than_days=30)
+        other = TicketStorage(storage.file_path)
+        assert other.get_ticket(1000) is not None
+
+        storage.clear()
+        assert storage.get_ticket(1000) is None
+        assert other.get_ticket(1000) is None
@@ -0,0 +1,65 @@
+"""Tests for the ticket changes feed."""
+
+import asyncio
+
+from src.typhoon_it_support.tools.ticket_changes import TicketChangeFeed
+
+
+class TestTicketChangeFeed:
+    """Tests for TicketChangeFeed."""
+
+    def test_since(self):
+        """Changes after a version are returned in order."""
+        feed = TicketChangeFeed()
+        feed.publish([(1000, "create"), (1001, "create")])
+        feed.publish([(1000, "update")])
+
+        version, changes = feed.since(1)
+        assert version == 3
+        assert changes == [
+            {"version": 2, "ticket_id": 1001, "op": "create"},
+            {"version": 3, "ticket_id": 1000, "op": "update"},
+        ]
+        assert feed.since(3) == (3, [])
+        assert feed.since(0, limit=1)[1] == [
+            {"version": 1, "ticket_id": 1000, "op": "create"}
+        ]
+
+    def test_unknown_versions_require_reload(self):
+        """Versions evicted from the buffer or from the future can't be served."""
+        feed = TicketChangeFeed(capacity=3)
+        feed.publish([(1000 + i, "create") for i in range(5)])
+
+        assert feed.since(1) == (5, None)
+        assert [c["version"] for c in feed.since(2)[1]] == [3, 4, 5]
+        assert feed.since(6) == (5, None)
+
+    def test_reset(self):
+        """After a reset, only the new version is known."""
+        feed = TicketChangeFeed()
+        feed.publish([(1000, "create")])
+        feed.reset()
+
+        assert feed.since(1) == (2, None)
+        assert feed.since(2) == (2, [])
+
+    def test_tokens(self):
+        """Only tokens of the same feed parse back to versions."""
+        feed = TicketChangeFeed()
+
+        assert feed.parse(feed.token(42)) == 42
+        assert TicketChangeFeed().parse(feed.token(42)) is None
+        assert feed.parse("42") is None
+        assert feed.parse(f"{feed.feed_id}.-1") is None
+
+    async def test_wait(self):
+        """Waiters wake up on publish, also from other threads."""
+        feed = TicketChangeFeed()
+        assert await feed.wait(0, timeout=0.01) is False
+
+        waiter = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0.01)
+        await asyncio.to_thread(feed.publish, [(1000, "create")])
+
+        assert await waiter is True
+        assert await feed.wait(0, timeout=0.01) is True
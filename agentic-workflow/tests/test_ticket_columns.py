@@ -0,0 +1,193 @@
+"""Tests for the columnar SLA snapshot."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.typhoon_it_support.tools.ticket_columns import (
+    SLASnapshot,
+    TicketColumns,
+    to_datetime64,
+)
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+from src.typhoon_it_support.tools.ticket_storage_sqlite import SQLiteTicketStorage
+from src.typhoon_it_support.tools.ticket_tools import _check_sla_breach
+
+NOW = datetime(2025, 1, 2, 12, 0)
+CREATED = datetime(2025, 1, 2, 8, 0)
+
+
+def _ticket(ticket_id: int, priority: str = "normal", **fields) -> dict:
+    """Build a ticket with the fields read by TicketColumns."""
+    return {
+        "id": ticket_id,
+        "priority": priority,
+        "status": "open",
+        "created_at": CREATED.isoformat(),
+        "first_response_at": None,
+        "resolved_at": None,
+        **fields,
+    }
+
+
+def _at(minutes: int) -> str:
+    """Get the ISO time some minutes after CREATED."""
+    return (CREATED + timedelta(minutes=minutes)).isoformat()
+
+
+class TestTicketColumns:
+    """Tests for TicketColumns."""
+
+    def test_rows_are_replaced_and_reused(self):
+        """Re-adding replaces a row, removed rows are taken by new tickets."""
+        columns = TicketColumns(capacity=1)
+        for ticket_id in range(1, 4):
+            columns.add(_ticket(ticket_id))
+        columns.add(_ticket(2, priority="urgent"))
+        assert len(columns) == 3
+
+        columns.remove({"id": 1})
+        columns.remove({"id": 1})
+        columns.add(_ticket(4))
+
+        assert len(columns) == 3
+        assert sorted(columns.ids[columns.ids >= 0].tolist()) == [2, 3, 4]
+        assert columns.sla_stats(NOW)["by_priority"]["urgent"]["total"] == 1
+
+    def test_to_datetime64(self):
+        """Missing and malformed timestamps become NaT."""
+        assert to_datetime64("2025-01-02T08:00:00.5") == np.datetime64(
+            "2025-01-02T08:00:00.500000"
+        )
+        assert np.isnat(to_datetime64(None))
+        assert np.isnat(to_datetime64("yesterday"))
+
+    def test_breaches_match_per_ticket_check(self):
+        """Breaches are counted like _check_sla_breach() decides them."""
+        tickets = [
+            _ticket(1, "urgent", first_response_at=_at(10), resolved_at=_at(200)),
+            _ticket(2, "urgent", first_response_at=_at(20), resolved_at=_at(300)),
+            _ticket(3, "high", first_response_at=_at(30), resolved_at=_at(500)),
+            _ticket(4, "low", first_response_at=_at(400)),
+            _ticket(5, "unknown", first_response_at=_at(250), resolved_at=_at(60)),
+        ]
+        columns = TicketColumns()
+        for ticket in tickets:
+            columns.add(ticket)
+
+        stats = columns.sla_stats(NOW)
+
+        expected = [
+            _check_sla_breach(
+                datetime.fromisoformat(t["created_at"]),
+                t["priority"],
+                datetime.fromisoformat(t["first_response_at"]),
+                datetime.fromisoformat(t["resolved_at"] or NOW.isoformat()),
+            )
+            for t in tickets
+        ]
+        assert stats["total"] == 5
+        assert stats["first_response"]["breached"] == sum(
+            e["first_response_breached"] for e in expected
+        )
+        # Ticket 4 is unresolved and within its 48 hours at NOW
+        assert stats["resolution"]["breached"] == sum(
+            e["resolution_breached"] for e in expected[:3] + expected[4:]
+        )
+        assert stats["resolution"]["resolved"] == 4
+        assert stats["resolution"]["mttr_minutes"] == (200 + 300 + 500 + 60) / 4
+        assert stats["first_response"]["percentile_minutes"]["p50"] == 30.0
+        assert stats["by_priority"]["urgent"] == {
+            "total": 2,
+            "first_response_breach_rate": 0.5,
+            "resolution_breach_rate": 0.5,
+            "mttr_minutes": 250.0,
+        }
+        # Unknown priorities get the normal SLA
+        assert stats["by_priority"]["normal"]["total"] == 1
+
+    def test_open_breaches_and_missing_creation_time(self):
+        """Open tickets past a deadline are counted, undated ones ignored."""
+        columns = TicketColumns()
+        columns.add(_ticket(1, "urgent"))
+        columns.add(_ticket(2, "urgent", status="closed"))
+        columns.add(_ticket(3, created_at=None))
+
+        stats = columns.sla_stats(NOW)
+
+        assert stats["total"] == 2
+        assert stats["open_breached"] == 1
+        assert stats["first_response"]["percentile_minutes"] is None
+        assert stats["resolution"]["mttr_minutes"] is None
+
+    def test_empty(self):
+        """An empty snapshot has zero rates."""
+        stats = TicketColumns().sla_stats(NOW)
+        assert stats["total"] == 0
+        assert stats["first_response"]["breach_rate"] == 0.0
+        assert stats["by_priority"] == {}
+
+
+class TestSLASnapshot:
+    """Tests for SLASnapshot."""
+
+    def test_follows_changes(self, tmp_path, monkeypatch):
+        """Only changed tickets are reread after the first call."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        storage.save_tickets([_ticket(i, "urgent") for i in range(1, 4)])
+        snapshot = SLASnapshot(storage)
+        assert snapshot.sla_stats(NOW)["first_response"]["breached"] == 3
+        monkeypatch.setattr(
+            storage, "query_tickets", lambda **_: pytest.fail("Reloaded all tickets")
+        )
+
+        def respond(ticket):
+            ticket["first_response_at"] = _at(5)
+
+        storage.update_ticket(1, respond)
+        storage.delete_ticket(2)
+        storage.save_ticket(_ticket(4, "low"))
+        stats = snapshot.sla_stats(NOW)
+
+        assert len(snapshot) == 3
+        assert stats["first_response"]["breached"] == 1
+        assert stats["first_response"]["responded"] == 1
+
+    def test_archived_tickets_are_removed(self, tmp_path, monkeypatch):
+        """Tickets moved to the archive leave the snapshot."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        storage.save_tickets(
+            [
+                _ticket(1, "urgent", status="closed", resolved_at=_at(60)),
+                _ticket(2, "urgent"),
+            ]
+        )
+        snapshot = SLASnapshot(storage)
+        assert snapshot.sla_stats(NOW)["total"] == 2
+        monkeypatch.setattr(
+            storage, "query_tickets", lambda **_: pytest.fail("Reloaded all tickets")
+        )
+
+        assert storage.archive_tickets(older_than_days=30) == 1
+        stats = snapshot.sla_stats(NOW)
+
+        assert len(snapshot) == 1
+        assert stats["total"] == 1
+        assert stats["resolution"]["resolved"] == 0
+        assert stats["by_priority"]["urgent"]["total"] == 1
+
+    @pytest.mark.parametrize(
+        "backend, name",
+        [(TicketStorage, "tickets.jsonl"), (SQLiteTicketStorage, "tickets.db")],
+    )
+    def test_picks_up_other_processes(self, tmp_path, backend, name):
+        """Writes through another storage instance show up too."""
+        storage = backend(tmp_path / name)
+        storage.save_ticket(_ticket(1))
+        snapshot = SLASnapshot(storage)
+        assert snapshot.sla_stats(NOW)["total"] == 1
+
+        backend(tmp_path / name).save_ticket(_ticket(2))
+
+        assert snapshot.sla_stats(NOW)["total"] == 2
@@ -0,0 +1,100 @@
+"""Tests for encoding ticket exports."""
+
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from src.typhoon_it_support.tools import ticket_export
+from src.typhoon_it_support.tools.ticket_export import (
+    CSV_HEADER,
+    ArrowStreamEncoder,
+    csv_chunk,
+)
+
+
+def _ticket(ticket_id: int, **fields) -> dict:
+    """Build an exportable ticket."""
+    ticket = {
+        "id": ticket_id,
+        "subject": f"Keyboard, broken {ticket_id}",
+        "description": 'Says "hello"\nthen stops',
+        "status": "open",
+        "priority": "normal",
+        "category": "hardware",
+        "requester_name": "Somchai",
+        "requester_email": "somchai@example.com",
+        "created_at": "2025-01-01T09:00:00",
+        "updated_at": "2025-01-01T10:30:00.250000",
+        "resolved_at": None,
+        "tags": ["keyboard", "usb"],
+        "sla_breach": {"first_response_breached": True},
+        "version": 2,
+    }
+    ticket.update(fields)
+    return ticket
+
+
+class TestCsvExport:
+    """Tests for CSV chunks."""
+
+    def test_chunks_concatenate_to_one_csv(self):
+        """Header and pages of rows parse back as one file."""
+        text = (
+            csv_chunk([], header=True)
+            + csv_chunk([_ticket(1001), _ticket(1000)])
+            + csv_chunk([_ticket(999)])
+        )
+
+        rows = list(csv.reader(io.StringIO(text)))
+        assert rows[0] == CSV_HEADER
+        assert [row[0] for row in rows[1:]] == ["1001", "1000", "999"]
+        assert rows[1][1] == "Keyboard, broken 1001"
+        assert rows[1][-1] == 'Says "hello"\nthen stops'
+        assert rows[1][-2] == "keyboard, usb"
+
+
+class TestArrowExport:
+    """Tests for the Arrow IPC stream encoder."""
+
+    def test_batches_form_one_stream(self):
+        """Every page is a record batch with typed columns."""
+        pa = pytest.importorskip("pyarrow")
+        encoder = ArrowStreamEncoder()
+        data = (
+            encoder.write([_ticket(1001), _ticket(1000, status="new")])
+            + encoder.write([_ticket(999, assignee_id="agent_1", tags=[])])
+            + encoder.close()
+        )
+
+        reader = pa.ipc.open_stream(data)
+        batches = list(reader)
+        assert [batch.num_rows for batch in batches] == [2, 1]
+
+        table = pa.Table.from_batches(batches).to_pydict()
+        assert table["id"] == [1001, 1000, 999]
+        assert table["status"] == ["open", "new", "open"]
+        assert table["assignee_id"] == [None, None, "agent_1"]
+        assert table["updated_at"][0] == datetime(2025, 1, 1, 10, 30, 0, 250000)
+        assert table["resolved_at"] == [None, None, None]
+        assert table["sla_first_response_breached"] == [True, True, True]
+        assert table["sla_resolution_breached"] == [False, False, False]
+        assert table["tags"] == [["keyboard", "usb"], ["keyboard", "usb"], []]
+
+    def test_empty_export_is_a_valid_stream(self):
+        """An export without tickets still carries the schema."""
+        pa = pytest.importorskip("pyarrow")
+        encoder = ArrowStreamEncoder()
+
+        table = pa.ipc.open_stream(encoder.close()).read_all()
+        assert table.num_rows == 0
+        assert table.schema == encoder.schema
+
+    def test_requires_pyarrow(self, monkeypatch):
+        """Without pyarrow the encoder can't be created."""
+        monkeypatch.setattr(ticket_export, "pa", None)
+
+        assert ticket_export.arrow_available() is False
+        with pytest.raises(RuntimeError, match="pyarrow"):
+            ArrowStreamEncoder()
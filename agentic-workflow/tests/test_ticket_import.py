@@ -0,0 +1,172 @@
+"""Tests for bulk ticket import."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.typhoon_it_support.api.models import TicketImportRecord
+from src.typhoon_it_support.tools.ticket_import import (
+    build_tickets,
+    import_tickets,
+    ndjson_lines,
+    record_error,
+    sla_fields,
+)
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+from src.typhoon_it_support.tools.ticket_tools import (
+    _calculate_sla_targets,
+    _check_sla_breach,
+)
+
+NOW = datetime(2025, 1, 2, 12, 0)
+
+
+def _record(**fields) -> dict:
+    """Build a parsed import record."""
+    return TicketImportRecord(
+        subject="Printer jam",
+        description="Paper stuck in tray 2",
+        requester_email="user@example.com",
+        requester_name="User",
+        **fields,
+    ).model_dump()
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestNdjsonLines:
+    """Tests for ndjson_lines()."""
+
+    async def test_lines_split_across_chunks(self):
+        """Lines are reassembled whatever the chunk boundaries."""
+        lines = [
+            line
+            async for line in ndjson_lines(
+                _chunks(b'{"a": 1}\n{"b"', b": 2}\r\n\n", b'{"c": 3}')
+            )
+        ]
+        assert lines == [b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}']
+
+    async def test_empty_stream(self):
+        """An empty body has no lines."""
+        assert [line async for line in ndjson_lines(_chunks(b""))] == []
+
+
+class TestSlaFields:
+    """Tests for sla_fields()."""
+
+    def test_matches_per_ticket_calculation(self):
+        """Results equal _calculate_sla_targets() and _check_sla_breach()."""
+        created = datetime(2025, 1, 2, 9, 0, 0, 250)
+        cases = [
+            ("urgent", created, None, None),
+            ("high", created, created + timedelta(minutes=30), None),
+            ("normal", created, created + timedelta(hours=5), NOW),
+            ("low", NOW - timedelta(hours=1), None, None),
+            ("unknown", created, None, created + timedelta(hours=2)),
+        ]
+
+        results = sla_fields(*zip(*cases), now=NOW)
+
+        for (priority, created_at, responded, resolved), result in zip(cases, results):
+            targets = _calculate_sla_targets(priority, created_at)
+            assert result["sla_first_response_due"] == targets["first_response_due"]
+            assert result["sla_resolution_due"] == targets["resolution_due"]
+            # Unmet SLAs are checked against the current time
+            if responded and resolved:
+                assert result["sla_breach"] == _check_sla_breach(
+                    created_at, priority, responded, resolved
+                )
+        assert results[0]["sla_breach"] == {
+            "first_response_breached": True,
+            "resolution_breached": False,
+        }
+        assert results[3]["sla_breach"] == {
+            "first_response_breached": False,
+            "resolution_breached": False,
+        }
+        assert results[4]["sla_breach"]["resolution_breached"] is False
+
+    def test_empty_batch(self):
+        """No records give no results."""
+        assert sla_fields([], [], [], [], now=NOW) == []
+
+
+class TestRecords:
+    """Tests for record validation and ticket building."""
+
+    @pytest.mark.parametrize(
+        "fields, error",
+        [
+            ({}, None),
+            ({"priority": "critical"}, "Invalid priority"),
+            ({"status": "archived"}, "Invalid status"),
+            ({"category": "coffee"}, "Invalid category"),
+            ({"assignee_id": "agent_99"}, "Invalid assignee"),
+        ],
+    )
+    def test_record_error(self, fields, error):
+        """Values outside the known choices are rejected."""
+        message = record_error(_record(**fields))
+        if error is None:
+            assert message is None
+        else:
+            assert message.startswith(error)
+
+    def test_build_tickets(self):
+        """Records become complete tickets with consecutive IDs."""
+        records = [
+            _record(),
+            _record(
+                priority="urgent",
+                status="solved",
+                assignee_id="agent_2",
+                tags=["Printer", "printer", "Floor-3"],
+                created_at=datetime(2025, 1, 1, 2, 0, tzinfo=timezone.utc),
+                resolved_at=datetime(2025, 1, 1, 3, 0, tzinfo=timezone.utc),
+            ),
+        ]
+
+        first, second = build_tickets(records, 2000, now=NOW)
+
+        assert first["id"] == 2000
+        assert first["created_at"] == first["updated_at"] == NOW.isoformat()
+        assert first["status"] == "new"
+        assert first["assignee_id"] is None
+        assert first["history"][0]["action"] == "imported"
+
+        assert second["id"] == 2001
+        assert second["assignee_name"] is not None
+        assert second["tags"] == ["printer", "floor-3"]
+        # Zoned timestamps are stored as naive local time
+        created = datetime.fromisoformat(second["created_at"])
+        assert created == datetime(
+            2025, 1, 1, 2, 0, tzinfo=timezone.utc
+        ).astimezone().replace(tzinfo=None)
+        assert second["sla_breach"]["resolution_breached"] is False
+
+
+class TestImportTickets:
+    """Tests for import_tickets()."""
+
+    def test_writes_batch(self, tmp_path):
+        """A batch gets a block of IDs and is readable afterwards."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        storage.save_ticket({"id": storage.reserve_ids(), "subject": "Existing"})
+
+        ids = import_tickets([_record() for _ in range(3)], storage)
+
+        assert ids == [1001, 1002, 1003]
+        assert storage.count() == 4
+        assert storage.reserve_ids() == 1004
+        reloaded = TicketStorage(tmp_path / "tickets.jsonl")
+        assert reloaded.get_ticket(1003)["subject"] == "Printer jam"
+
+    def test_empty_batch(self, tmp_path):
+        """Nothing is reserved for an empty batch."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl")
+        assert import_tickets([], storage) == []
+        assert storage.reserve_ids() == 1000
@@ -0,0 +1,45 @@
+"""Tests for the array-backed ticket offset index."""
+
+from src.typhoon_it_support.tools.ticket_offset_index import (
+    MAX_ID_GAP,
+    TicketOffsetIndex,
+)
+
+
+class TestTicketOffsetIndex:
+    """Tests for setting, looking up and moving record locations."""
+
+    def test_set_get_discard(self):
+        """Locations are stored per ID and can be forgotten."""
+        index = TicketOffsetIndex()
+        assert index.set(1000, 0, 120)
+        assert index.set(1001, 121, 80)
+        index.set(1000, 202, 130)
+
+        assert index.get(1000) == (202, 130)
+        assert index.get(1001) == (121, 80)
+        assert index.get(999) is None
+        assert index.get(5000) is None
+        assert len(index) == 2
+
+        index.discard(1001)
+        index.discard(1001)
+        assert index.get(1001) is None
+        assert len(index) == 1
+
+    def test_huge_ids_are_not_indexed(self):
+        """IDs far beyond the indexed range are rejected."""
+        index = TicketOffsetIndex()
+        assert not index.set(MAX_ID_GAP + 5, 0, 10)
+        assert not index.set(-1, 0, 10)
+        assert index.get(MAX_ID_GAP + 5) is None
+
+    def test_shift(self):
+        """Only records at or after the start offset move."""
+        index = TicketOffsetIndex()
+        index.set(1000, 0, 10)
+        index.set(1001, 100, 10)
+        index.set(1002, 200, 10)
+
+        index.shift(100, -50)
+        assert [index.get(i)[0] for i in (1000, 1001, 1002)] == [0, 50, 150]
@@ -0,0 +1,112 @@
+"""Tests for compact ticket records and the record codec."""
+
+import json
+
+import pytest
+
+from src.typhoon_it_support.tools import ticket_record
+from src.typhoon_it_support.tools.ticket_record import Ticket, decode, encode
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+
+
+def _ticket_dict(ticket_id: int = 1000) -> dict:
+    """Build a ticket dictionary with nested fields."""
+    return {
+        "id": ticket_id,
+        "subject": "รหัสผ่านหมดอายุ",
+        "status": "new",
+        "priority": "high",
+        "category": "account",
+        "created_at": "2025-01-01T00:00:00",
+        "assignee_id": None,
+        "tags": ["password"],
+        "sla_breach": {"resolution_breached": False},
+        "history": [{"action": "created", "changes": {"status": "new"}}],
+    }
+
+
+class TestTicket:
+    """Tests for the Ticket record."""
+
+    def test_round_trip(self):
+        """Converting to a record and back gives the same dictionary."""
+        data = _ticket_dict()
+        ticket = Ticket.from_dict(data)
+
+        assert ticket.to_dict() == data
+        assert "description" not in ticket.to_dict()
+        assert ticket.assignee_id is None
+
+    def test_unknown_keys_are_kept(self):
+        """Keys other than the known fields survive the round trip."""
+        data = dict(_ticket_dict(), custom_field=1, extra="value")
+        ticket = Ticket.from_dict(data)
+
+        assert ticket.to_dict() == data
+        assert ticket["custom_field"] == 1
+        assert ticket.get("extra") == "value"
+
+    def test_dict_style_access(self):
+        """Records can be read like the dictionaries they replace."""
+        ticket = Ticket.from_dict(_ticket_dict())
+
+        assert ticket["status"] == "new"
+        assert ticket.get("description") is None
+        assert ticket.get("description", "") == ""
+        assert "tags" in ticket
+        assert "description" not in ticket
+        assert dict(ticket) == _ticket_dict()
+        with pytest.raises(KeyError):
+            ticket["description"]
+
+    def test_enum_values_are_interned(self):
+        """Status, priority and category values are shared between records."""
+        first = Ticket.from_dict(decode(encode(_ticket_dict(1000))))
+        second = Ticket.from_dict(decode(encode(_ticket_dict(1001))))
+
+        assert first.status is second.status
+        assert first.priority is second.priority
+        assert first.category is second.category
+
+    def test_missing_id_is_rejected(self):
+        """A ticket without an ID can't be built."""
+        with pytest.raises(TypeError):
+            Ticket.from_dict({"subject": "No ID"})
+
+
+class TestCodec:
+    """Tests for encoding and decoding records."""
+
+    @pytest.fixture(params=["orjson", "json"])
+    def codec(self, request, monkeypatch):
+        """Run a test with and without orjson."""
+        if request.param == "json":
+            monkeypatch.setattr(ticket_record, "orjson", None)
+        elif ticket_record.orjson is None:
+            pytest.skip("orjson is not installed")
+
+    def test_round_trip(self, codec):
+        """Encoded records decode to the same value and are valid JSON."""
+        data = _ticket_dict()
+        encoded = encode(data)
+
+        assert isinstance(encoded, bytes)
+        assert b"\n" not in encoded
+        assert decode(encoded) == data
+        assert json.loads(encoded) == data
+
+    def test_invalid_json(self, codec):
+        """Malformed input raises ValueError."""
+        with pytest.raises(ValueError):
+            decode(b'{"id": 10')
+
+    def test_storage_reads_files_written_by_json_module(self, codec, tmp_path):
+        """Existing files with spaced JSON and escaped Unicode still load."""
+        path = tmp_path / "tickets.jsonl"
+        path.write_text(json.dumps(_ticket_dict()) + "\n")
+
+        storage = TicketStorage(path)
+        assert storage.get_ticket(1000) == _ticket_dict()
+
+        storage.update_ticket(1000, lambda t: t.update(status="open"))
+        assert TicketStorage(path).get_ticket(1000)["status"] == "open"
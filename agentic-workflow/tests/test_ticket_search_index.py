@@ -0,0 +1,187 @@
+"""Tests for the full-text ticket search index."""
+
+import random
+
+import pytest
+
+from src.typhoon_it_support.tools.ticket_search_index import (
+    TicketSearchIndex,
+    ticket_text,
+    tokenize,
+)
+from src.typhoon_it_support.tools.ticket_storage import TicketStorage
+
+
+class TestTokenize:
+    """Tests for the tokenizer."""
+
+    def test_latin_words_are_lowercased(self):
+        """Non-Thai text is split into lowercase words."""
+        assert tokenize("VPN won't connect, printer-01!") == [
+            "vpn",
+            "won",
+            "t",
+            "connect",
+            "printer",
+            "01",
+        ]
+
+    def test_thai_is_split_into_bigrams(self):
+        """Thai runs become overlapping character bigrams."""
+        assert tokenize("รหัสผ่าน") == ["รห", "หั", "ัส", "สผ", "ผ่", "่า", "าน"]
+        assert tokenize("Email ได้") == ["email", "ได", "ด้"]
+
+    def test_ticket_text_includes_comments(self):
+        """Subject, description and comment bodies are searchable."""
+        ticket = {
+            "subject": "Subject",
+            "description": "Description",
+            "comments": [{"body": "Comment"}],
+        }
+        assert ticket_text(ticket) == "Subject\nDescription\nComment"
+
+
+class TestTicketSearchIndex:
+    """Tests for indexing and BM25 retrieval."""
+
+    def _index(self, docs):
+        index = TicketSearchIndex()
+        for ticket_id, text in docs.items():
+            index.add(ticket_id, text)
+        return index
+
+    def test_all_terms_must_match(self):
+        """Queries are conjunctive."""
+        index = self._index({1: "vpn down", 2: "vpn slow", 3: "printer down"})
+
+        assert {doc for doc, _ in index.search("vpn down")} == {1}
+        assert index.search("vpn missing") == []
+        assert index.search("") == []
+
+    def test_prefix_matches(self):
+        """A query word matches longer index terms it starts."""
+        index = self._index({1: "printer jammed", 2: "print server"})
+
+        assert {doc for doc, _ in index.search("print")} == {1, 2}
+        assert {doc for doc, _ in index.search("printer")} == {1}
+
+    def test_thai_substring_is_found(self):
+        """Thai words are found inside unsegmented text."""
+        index = self._index(
+            {1: "ไม่สามารถเข้าสู่ระบบได้", 2: "ลืมรหัสผ่านอีเมล", 3: "เครื่องพิมพ์เสีย"}
+        )
+
+        assert [doc for doc, _ in index.search("รหัสผ่าน")] == [2]
+        assert [doc for doc, _ in index.search("เข้าสู่ระบบ")] == [1]
+
+    def test_bm25_ranking_and_limit(self):
+        """Rare terms, frequent occurrences and short tickets rank first."""
+        index = self._index(
+            {
+                1: "network",
+                2: "network outage outage",
+                3: "network outage",
+                4: "network slow",
+            }
+        )
+
+        ranked = [doc for doc, _ in index.search("network outage")]
+        assert ranked == [2, 3]
+        assert [doc for doc, _ in index.search("network", limit=1)] == [1]
+
+    def test_limit_matches_full_ranking(self):
+        """Pruned top-k results equal the head of the full ranking."""
+        rng = random.Random(7)
+        words = ["vpn", "vpns", "down", "slow", "printer", "email"]
+        index = self._index(
+            {
+                doc: " ".join(rng.choices(words, k=rng.randint(1, 12)))
+                for doc in range(300)
+            }
+        )
+        index.remove(5)
+
+        for query in ("vpn", "vpn down", "printer email", "slow"):
+            ranked = index.search(query)
+            for limit in (0, 1, 3, 10):
+                assert index.search(query, limit=limit) == ranked[:limit]
+
+    def test_limit_stops_scoring_early(self):
+        """Long tickets that can't make the top k are not scored."""
+        index = self._index({1: "vpn", 2: "vpn down"})
+        for doc in range(3, 103):
+            index.add(doc, "vpn " + "filler " * 50)
+
+        class CountingPostings(dict):
+            lookups = 0
+
+            def get(self, *args):
+                CountingPostings.lookups += 1
+                return super().get(*args)
+
+        index._postings["vpn"] = CountingPostings(index._postings["vpn"])
+
+        assert [doc for doc, _ in index.search("vpn", limit=2)] == [1, 2]
+        assert CountingPostings.lookups < 10
+
+    def test_candidates_restrict_results(self):
+        """Only candidate IDs are returned."""
+        index = self._index({1: "vpn", 2: "vpn", 3: "vpn"})
+
+        assert {doc for doc, _ in index.search("vpn", candidates={1, 3})} == {1, 3}
+        assert index.search("vpn", candidates=set()) == []
+
+    def test_match_skips_ranking(self, monkeypatch):
+        """match() finds the same tickets as search() without scoring them."""
+        index = self._index({1: "vpn down", 2: "vpn slow", 3: "printer down"})
+        monkeypatch.setattr(index, "_rank", lambda *_: pytest.fail("Ranked"))
+
+        assert index.match("vpn down") == {1}
+        assert index.match("vp", candidates={2, 3}) == {2}
+        assert index.match("vpn missing") == set()
+        assert index.match("") == set()
+
+    def test_update_and_remove(self):
+        """Re-adding replaces old terms and removing forgets the ticket."""
+        index = self._index({1: "vpn", 2: "email"})
+        index.add(1, "printer")
+        index.remove(2)
+
+        assert index.search("vpn") == []
+        assert index.search("email") == []
+        assert [doc for doc, _ in index.search("printer")] == [1]
+        assert len(index) == 1
+        assert index._terms == ["printer"]
+
+
+class TestStorageSearch:
+    """Tests for search through the JSONL storage."""
+
+    def test_search_follows_saves_and_deletes(self, tmp_path):
+        """The index tracks saves, comment patches and deletes."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl", write_mode="delta")
+        for ticket_id, subject in [(1000, "VPN ใช้งานไม่ได้"), (1001, "Printer jam")]:
+            storage.save_ticket(
+                {
+                    "id": ticket_id,
+                    "subject": subject,
+                    "description": "",
+                    "status": "new",
+                    "priority": "normal",
+                    "created_at": "2025-01-01T00:00:00",
+                    "comments": [],
+                }
+            )
+
+        storage.update_ticket(
+            1001, lambda t: t["comments"].append({"body": "replaced toner"})
+        )
+        assert [t["id"] for t in storage.search_tickets("toner")] == [1001]
+        assert [t["id"] for t in storage.search_tickets("ใช้งาน")] == [1000]
+        assert storage.search_tickets("vpn", status="closed") == []
+
+        storage.delete_ticket(1000)
+        assert storage.search_tickets("vpn") == []
+
+        reopened = TicketStorage(storage.file_path)
+        assert [t["id"] for t in reopened.search_tickets("toner")] == [1001]
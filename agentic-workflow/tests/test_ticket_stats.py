@@ -0,0 +1,63 @@
+"""Tests for the ticket statistics counters."""
+
+from src.typhoon_it_support.tools.ticket_stats import TicketStats
+
+
+def _ticket(status: str, priority: str = "normal", **fields) -> dict:
+    """Build a ticket with the counted fields."""
+    return {"status": status, "priority": priority, **fields}
+
+
+class TestTicketStats:
+    """Tests for TicketStats."""
+
+    def test_add(self):
+        """Tickets are counted in every breakdown."""
+        stats = TicketStats()
+        stats.add(_ticket("new", "high", category="network"))
+        stats.add(_ticket("open", assignee_id="agent_1"))
+        stats.add(
+            _ticket(
+                "solved",
+                "high",
+                assignee_id="agent_1",
+                sla_breach={"resolution_breached": True},
+            )
+        )
+
+        assert stats.to_dict() == {
+            "total": 3,
+            "by_status": {"new": 1, "open": 1, "solved": 1},
+            "by_priority": {"high": 2, "normal": 1},
+            "by_category": {"network": 1},
+            "by_assignee": {"unassigned": 1, "agent_1": 2},
+            "open_by_assignee": {"unassigned": 1, "agent_1": 1},
+            "status_by_priority": {
+                "new": {"high": 1},
+                "open": {"normal": 1},
+                "solved": {"high": 1},
+            },
+            "sla_breached": 1,
+        }
+
+    def test_remove_drops_empty_entries(self):
+        """Removing every ticket leaves no zero counts behind."""
+        stats = TicketStats()
+        ticket = _ticket(
+            "open", assignee_id="agent_1", sla_breach={"resolution_breached": True}
+        )
+        stats.add(ticket)
+        stats.remove(ticket)
+
+        assert stats.to_dict() == TicketStats().to_dict()
+        assert stats.to_dict()["status_by_priority"] == {}
+
+    def test_add_group(self):
+        """Pre-aggregated groups count like that many tickets."""
+        stats = TicketStats()
+        stats.add_group("pending", "low", None, None, False, 4)
+
+        data = stats.to_dict()
+        assert data["total"] == 4
+        assert data["open_by_assignee"] == {"unassigned": 4}
+        assert data["by_category"] == {}
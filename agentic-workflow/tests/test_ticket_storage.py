@@ -0,0 +1,1104 @@
+"""Tests for the JSONL ticket storage layer."""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.typhoon_it_support.api.init_demo_tickets import initialize_demo_tickets
+from src.typhoon_it_support.tools.ticket_storage import (
+    SUMMARY_FIELDS,
+    TicketStorage,
+    TicketVersionConflictError,
+    encode_cursor,
+    next_cursor,
+    reset_storage,
+)
+from src.typhoon_it_support.tools.ticket_storage_sqlite import SQLiteTicketStorage
+
+
+def _ticket(ticket_id: int, **fields) -> dict:
+    """Build a minimal ticket dictionary."""
+    ticket = {
+        "id": ticket_id,
+        "subject": f"Issue {ticket_id}",
+        "description": "Description",
+        "status": "new",
+        "priority": "normal",
+        "created_at": f"2025-01-01T00:00:{ticket_id % 60:02d}",
+        "comments": [],
+        "history": [],
+    }
+    ticket.update(fields)
+    return ticket
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Provide a storage instance backed by a temporary file."""
+    return TicketStorage(tmp_path / "tickets.jsonl")
+
+
+class TestResidentCache:
+    """Tests for the in-memory ticket cache."""
+
+    def test_reads_reflect_own_writes(self, storage):
+        """Saved tickets are visible without re-reading the file."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1000, status="open"))
+
+        assert storage.get_ticket(1000)["status"] == "open"
+        assert storage.count() == 1
+        assert storage.get_next_id() == 1001
+
+    def test_get_ticket_returns_copy(self, storage):
+        """Mutating a returned ticket does not change the cache."""
+        storage.save_ticket(_ticket(1000))
+
+        ticket = storage.get_ticket(1000)
+        ticket["status"] = "closed"
+        ticket["comments"].append({"body": "unsaved"})
+
+        assert storage.get_ticket(1000)["status"] == "new"
+        assert storage.get_ticket(1000)["comments"] == []
+
+    def test_external_write_is_picked_up(self, storage):
+        """Changes written by another writer invalidate the cache."""
+        storage.save_ticket(_ticket(1000))
+
+        with open(storage.file_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_ticket(1001)) + "\n")
+
+        assert storage.get_ticket(1001) is not None
+        assert storage.count() == 2
+
+    def test_other_instance_sees_existing_data(self, storage):
+        """A fresh instance loads tickets already on disk."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1001))
+        storage.delete_ticket(1001)
+
+        reopened = TicketStorage(storage.file_path)
+        assert list(reopened.load_all_tickets()) == [1000]
+        assert reopened.get_next_id() == 1002
+
+    def test_compact_removes_duplicates(self, storage):
+        """Compaction keeps one line per ticket."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1000, status="open"))
+        storage.save_ticket(_ticket(1001))
+
+        assert storage.compact() == 1
+        assert storage.get_ticket(1000)["status"] == "open"
+        assert TicketStorage(storage.file_path).count() == 2
+
+
+class TestIdCounter:
+    """Tests for the persistent ticket ID counter."""
+
+    def test_counter_survives_restart_and_compaction(self, storage):
+        """Deleted IDs are not handed out again after compaction."""
+        first_id = storage.reserve_ids()
+        storage.save_ticket(_ticket(first_id))
+        storage.delete_ticket(first_id)
+        storage.compact()
+
+        assert TicketStorage(storage.file_path).reserve_ids() == first_id + 1
+
+    def test_counter_covers_existing_ids(self, storage):
+        """Files written before the counter existed continue after their max ID."""
+        with open(storage.file_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_ticket(1500)) + "\n")
+
+        assert TicketStorage(storage.file_path).reserve_ids() == 1501
+
+
+def _create_tickets_in_process(file_path, count):
+    """Create tickets from a separate worker process."""
+    storage = TicketStorage(file_path)
+    for _ in range(count):
+        ticket_id = storage.reserve_ids()
+        storage.save_ticket(_ticket(ticket_id))
+        storage.update_ticket(ticket_id, lambda t: t.update(status="open"))
+
+
+def _seed_demo_in_process(file_path):
+    """Seed the demo tickets at startup, like an API worker."""
+    reset_storage(file_path)
+    initialize_demo_tickets(only_if_empty=True)
+
+
+class TestMultiProcess:
+    """Tests for sharing one file between several processes."""
+
+    def test_other_instance_reservations_are_seen(self, storage):
+        """IDs reserved elsewhere are never handed out again."""
+        other = TicketStorage(storage.file_path)
+
+        ids = [storage.reserve_ids(), other.reserve_ids(), storage.reserve_ids()]
+
+        assert ids == [1000, 1001, 1002]
+
+    def test_rewrite_by_other_instance_triggers_rescan(self, storage):
+        """A clear and refill elsewhere is not mistaken for an append."""
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        assert storage.count() == 2
+
+        other = TicketStorage(storage.file_path)
+        other.clear()
+        other.save_tickets([_ticket(2000 + i, subject="Refilled") for i in range(5)])
+
+        tickets = storage.load_all_tickets()
+        assert sorted(tickets) == [2000, 2001, 2002, 2003, 2004]
+        assert storage.reserve_ids() == 2005
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_concurrent_worker_processes(self, storage):
+        """Writers in several processes neither collide nor corrupt the file."""
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(
+                target=_create_tickets_in_process, args=(storage.file_path, 25)
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        tickets = storage.load_all_tickets()
+        assert sorted(tickets) == list(range(1000, 1100))
+        assert all(t["status"] == "open" for t in tickets.values())
+        assert storage.reserve_ids() == 1100
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_workers_seed_demo_once(self, storage):
+        """Workers starting together seed the demo tickets exactly once."""
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_seed_demo_in_process, args=(storage.file_path,))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        seeded = storage.load_all_tickets()
+        assert sorted(seeded) == list(range(1000, 1000 + len(seeded)))
+        assert storage.reserve_ids() == 1000 + len(seeded)
+
+
+class TestTailFollow:
+    """Tests for incremental loading of appended lines."""
+
+    def test_only_appended_bytes_are_read(self, storage):
+        """Lines before the consumed offset are not parsed again."""
+        storage.save_ticket(_ticket(1000))
+        offset = storage._offset
+
+        with open(storage.file_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_ticket(1001)) + "\n")
+
+        assert storage.count() == 2
+        assert storage._offset > offset
+        assert storage._line_count == 2
+
+    def test_partial_line_waits_for_completion(self, storage):
+        """A line still being written is picked up once it is complete."""
+        line = json.dumps(_ticket(1000))
+        with open(storage.file_path, "a", encoding="utf-8") as f:
+            f.write(line[:10])
+
+        assert storage.count() == 0
+
+        with open(storage.file_path, "a", encoding="utf-8") as f:
+            f.write(line[10:] + "\n")
+
+        assert storage.get_ticket(1000) is not None
+
+    def test_replaced_file_is_rescanned(self, storage):
+        """A compaction by another writer triggers a full rescan."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1001))
+
+        other = TicketStorage(storage.file_path)
+        other.delete_ticket(1000)
+        other.compact()
+
+        assert list(storage.load_all_tickets()) == [1001]
+
+    def test_truncated_file_is_rescanned(self, storage):
+        """A cleared file triggers a full rescan."""
+        storage.save_ticket(_ticket(1000))
+
+        TicketStorage(storage.file_path).clear()
+
+        assert storage.count() == 0
+
+
+class TestChangeFeed:
+    """Tests for publishing applied records to the changes feed."""
+
+    def test_other_instance_changes_are_published(self, storage):
+        """Records appended by another writer show up as changes."""
+        version, _ = storage.get_changes(0)
+        other = TicketStorage(storage.file_path)
+        other.save_ticket(_ticket(1000))
+        other.update_ticket(1000, lambda t: t.update(status="open"))
+
+        _, changes = storage.get_changes(version)
+        assert [(c["ticket_id"], c["op"]) for c in changes] == [
+            (1000, "create"),
+            (1000, "update"),
+        ]
+
+    def test_compaction_publishes_nothing(self, storage):
+        """Rewriting the file doesn't change any ticket."""
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        storage.delete_ticket(1000)
+        version = storage.changes.version
+
+        storage.compact()
+
+        assert storage.get_changes(version) == (version, [])
+
+    def test_rescan_resets_instead_of_replaying(self, storage):
+        """A rewrite by another writer makes clients reload."""
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        version = storage.changes.version
+
+        other = TicketStorage(storage.file_path)
+        other.delete_ticket(1000)
+        other.compact()
+
+        current, changes = storage.get_changes(version)
+        assert changes is None
+        assert storage.get_changes(current) == (current, [])
+
+
+class TestSQLiteChangeFeed:
+    """Tests for the changes feed of the SQLite backend."""
+
+    def test_changes_wait_for_commit(self, tmp_path):
+        """Deletes and resets are published when the transaction commits."""
+        storage = SQLiteTicketStorage(tmp_path / "tickets.db")
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        version = storage.changes.version
+
+        with pytest.raises(ValueError):
+            with storage.exclusive():
+                storage.delete_ticket(1000)
+                storage.clear()
+                raise ValueError("boom")
+        assert storage.get_changes(version) == (version, [])
+        assert storage.count() == 2
+
+        with storage.exclusive():
+            storage.delete_ticket(1000)
+            storage.clear()
+            storage.save_ticket(_ticket(1002))
+            assert storage.changes.version == version
+        current, changes = storage.get_changes(version)
+
+        assert changes is None
+        assert storage.get_changes(current - 1)[1] == [
+            {"version": current, "ticket_id": 1002, "op": "create"}
+        ]
+
+    def test_existing_tickets_are_indexed_for_search(self, tmp_path):
+        """Opening a database from before the search index fills it."""
+        storage = SQLiteTicketStorage(tmp_path / "tickets.db")
+        storage.save_ticket(_ticket(1000, subject="VPN down"))
+        storage._conn.execute("DROP TABLE tickets_fts")
+        storage._conn.close()
+
+        reopened = SQLiteTicketStorage(tmp_path / "tickets.db")
+        assert [t["id"] for t in reopened.search_tickets("vpn")] == [1000]
+
+    def test_other_connections_reset_the_feed(self, tmp_path):
+        """Writes by another connection make clients reload."""
+        storage = SQLiteTicketStorage(tmp_path / "tickets.db")
+        other = SQLiteTicketStorage(tmp_path / "tickets.db")
+        storage.save_ticket(_ticket(1000))
+        version, _ = storage.get_changes(0)
+
+        other.save_ticket(_ticket(1001))
+        storage.update_ticket(1000, lambda t: t.update(status="open"))
+        current, changes = storage.get_changes(version)
+        assert changes is None
+
+        # Own writes alone keep the feed going
+        storage.delete_ticket(1000)
+        assert storage.get_changes(current)[1] == [
+            {"version": current + 1, "ticket_id": 1000, "op": "delete"}
+        ]
+
+
+class TestTombstonesAndCompaction:
+    """Tests for tombstone deletes and automatic compaction."""
+
+    def test_delete_appends_tombstone(self, storage):
+        """Deleting appends a record instead of rewriting the file."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1001))
+        inode = storage.file_path.stat().st_ino
+
+        assert storage.delete_ticket(1000) is True
+
+        with open(storage.file_path, encoding="utf-8") as f:
+            last = json.loads(f.readlines()[-1])
+        assert last["id"] == 1000
+        assert last["op"] == "delete"
+        assert storage.file_path.stat().st_ino == inode
+        assert TicketStorage(storage.file_path).get_ticket(1000) is None
+
+    def test_compaction_runs_in_background(self, tmp_path):
+        """Passing the dead-line ratio compacts the file in a thread."""
+        storage = TicketStorage(
+            tmp_path / "tickets.jsonl", compact_dead_ratio=0.5, compact_min_lines=10
+        )
+        for i in range(6):
+            storage.save_ticket(_ticket(1000 + i))
+        for i in range(4):
+            storage.delete_ticket(1000 + i)
+
+        storage._compaction_thread.join()
+
+        with open(storage.file_path, encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == [1004, 1005]
+        assert not storage.file_path.with_name("tickets.jsonl.compact").exists()
+        assert storage.count() == 2
+
+    def test_compact_keeps_concurrent_appends(self, storage):
+        """Lines appended while the snapshot is written survive the swap."""
+        storage.save_ticket(_ticket(1000))
+        storage.save_ticket(_ticket(1000, status="open"))
+
+        original_refresh = storage._refresh
+        calls = []
+
+        def refresh_with_append():
+            original_refresh()
+            calls.append(True)
+            if len(calls) == 2:
+                with open(storage.file_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(_ticket(1001)) + "\n")
+                original_refresh()
+
+        storage._refresh = refresh_with_append
+        assert storage.compact() == 1
+        storage._refresh = original_refresh
+
+        reopened = TicketStorage(storage.file_path)
+        assert sorted(reopened.load_all_tickets()) == [1000, 1001]
+        assert reopened.get_ticket(1000)["status"] == "open"
+
+
+class TestDeltaWriteMode:
+    """Tests for appending patch records instead of whole tickets."""
+
+    @pytest.fixture
+    def delta_storage(self, tmp_path):
+        """Provide a storage instance writing patch records."""
+        return TicketStorage(
+            tmp_path / "tickets.jsonl", write_mode="delta", snapshot_interval=3
+        )
+
+    def _records(self, storage):
+        with open(storage.file_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_interleaved_writer_does_not_replay_patches(self, delta_storage):
+        """Appended patches apply once when another writer slipped in."""
+        delta_storage.save_ticket(_ticket(1000))
+        original_append = delta_storage._append
+
+        def append_after_other_writer(lines):
+            with open(delta_storage.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(_ticket(1001)) + "\n")
+            return original_append(lines)
+
+        delta_storage._append = append_after_other_writer
+        delta_storage.update_ticket(
+            1000, lambda t: t["comments"].append({"body": "Rebooted"})
+        )
+        delta_storage._append = original_append
+
+        assert delta_storage.get_ticket(1000)["comments"] == [{"body": "Rebooted"}]
+        assert delta_storage.get_ticket(1001) is not None
+        assert delta_storage._line_count == 3
+
+    def test_update_appends_patch(self, delta_storage):
+        """Only changed fields and appended list items are written."""
+        ticket = _ticket(1000, history=[{"action": "created"}] * 20)
+        delta_storage.save_ticket(ticket)
+
+        ticket["status"] = "open"
+        ticket["history"].append({"action": "status_changed"})
+        delta_storage.save_ticket(ticket)
+
+        patch = self._records(delta_storage)[-1]
+        assert patch["op"] == "patch"
+        assert patch["changes"] == {"status": "open", "version": 2}
+        assert patch["append"] == {"history": [{"action": "status_changed"}]}
+        assert delta_storage.get_ticket(1000) == ticket
+
+    def test_patches_fold_on_reload(self, delta_storage):
+        """A fresh instance replays patches into the current state."""
+        ticket = _ticket(1000)
+        delta_storage.save_ticket(ticket)
+        for i in range(5):
+            ticket["comments"].append({"body": f"comment {i}"})
+            if i == 2:
+                del ticket["description"]
+            delta_storage.save_ticket(ticket)
+
+        reopened = TicketStorage(delta_storage.file_path)
+        assert reopened.get_ticket(1000) == ticket
+
+    def test_snapshot_every_interval(self, delta_storage):
+        """A full snapshot is written after snapshot_interval patches."""
+        ticket = _ticket(1000)
+        delta_storage.save_ticket(ticket)
+        for i in range(4):
+            ticket["subject"] = f"Edit {i}"
+            delta_storage.save_ticket(ticket)
+
+        ops = [record.get("op") for record in self._records(delta_storage)]
+        assert ops == [None, "patch", "patch", "patch", None]
+
+    def test_unchanged_ticket_is_not_written(self, delta_storage):
+        """Saving an unchanged ticket appends nothing."""
+        delta_storage.save_ticket(_ticket(1000))
+        delta_storage.save_ticket(_ticket(1000))
+
+        assert len(self._records(delta_storage)) == 1
+
+
+class TestSecondaryIndexes:
+    """Tests for the status/priority/assignee/category/tag indexes."""
+
+    def test_indexes_follow_updates_and_deletes(self, storage):
+        """Index entries move with the ticket and vanish on delete."""
+        storage.save_ticket(_ticket(1000, tags=["vpn"]))
+        storage.save_ticket(_ticket(1000, status="open", tags=["vpn", "urgent"]))
+
+        assert "new" not in storage._indexes["status"]
+        assert storage._indexes["status"]["open"] == {1000}
+        assert storage._indexes["tags"]["urgent"] == {1000}
+
+        storage.delete_ticket(1000)
+        assert not any(storage._indexes.values())
+
+    def test_indexed_query_matches_scan(self, storage):
+        """Intersected index lookups return what a full scan would."""
+        statuses = ["new", "open", "pending"]
+        priorities = ["low", "normal", "high"]
+        storage.save_tickets(
+            [
+                _ticket(
+                    1000 + i,
+                    status=statuses[i % 3],
+                    priority=priorities[i % 2],
+                    assignee_id=f"agent_{i % 4}",
+                    tags=["even"] if i % 2 == 0 else [],
+                )
+                for i in range(60)
+            ]
+        )
+        storage.update_ticket(1000, lambda t: t.update(status="closed"))
+
+        results = storage.query_tickets(
+            status="open", priority="normal", assignee_id="agent_1"
+        )
+        expected = [
+            t
+            for t in storage.load_all_tickets().values()
+            if (t["status"], t["priority"], t["assignee_id"])
+            == ("open", "normal", "agent_1")
+        ]
+        assert len(results) == 5
+        assert {t["id"] for t in results} == {t["id"] for t in expected}
+        assert len(storage.query_tickets(tags=["even"], status="new")) == 9
+        assert storage.query_tickets(status="closed")[0]["id"] == 1000
+        assert storage.query_tickets(category="missing") == []
+
+
+class TestCrashRecovery:
+    """Tests for checksums and torn-write recovery."""
+
+    def test_torn_last_record_is_truncated(self, tmp_path):
+        """A partial record left by a crash is dropped on the next open."""
+        path = tmp_path / "tickets.jsonl"
+        TicketStorage(path).save_tickets([_ticket(1000), _ticket(1001)])
+        intact_size = path.stat().st_size
+        with open(path, "ab") as f:
+            f.write(b'{"id": 1002, "subject": "half wri')
+
+        reopened = TicketStorage(path)
+        assert path.stat().st_size == intact_size
+        assert sorted(reopened.load_all_tickets()) == [1000, 1001]
+
+        reopened.save_ticket(_ticket(1002))
+        assert sorted(TicketStorage(path).load_all_tickets()) == [1000, 1001, 1002]
+
+    def test_corrupt_record_is_skipped(self, tmp_path):
+        """A record failing its checksum is skipped instead of loaded."""
+        path = tmp_path / "tickets.jsonl"
+        TicketStorage(path).save_tickets([_ticket(1000), _ticket(1001)])
+        lines = path.read_bytes().splitlines(keepends=True)
+        path.write_bytes(lines[0].replace(b"Issue", b"Issie") + lines[1])
+
+        reopened = TicketStorage(path)
+        assert sorted(reopened.load_all_tickets()) == [1001]
+        assert reopened.skipped_records == 1
+
+    def test_records_without_checksum_are_loaded(self, tmp_path):
+        """Files written before checksums were added still load."""
+        path = tmp_path / "tickets.jsonl"
+        path.write_text(json.dumps(_ticket(1000)) + "\nnot json\n")
+
+        storage = TicketStorage(path)
+        assert storage.get_ticket(1000)["subject"] == _ticket(1000)["subject"]
+        assert storage.skipped_records == 1
+
+
+class TestLeanCache:
+    """Tests for caching tickets with just their resident fields."""
+
+    def test_tickets_are_read_from_their_record(self, tmp_path):
+        """Loaded and saved tickets keep only resident fields in memory."""
+        path = tmp_path / "tickets.jsonl"
+        TicketStorage(path).save_ticket(_ticket(1000))
+
+        storage = TicketStorage(path)
+        storage.save_ticket(_ticket(1001))
+        for ticket_id in (1000, 1001):
+            assert "description" not in storage._tickets[ticket_id]
+            assert storage.get_ticket(ticket_id)["description"] == "Description"
+        assert len(storage._locations) == 2
+
+        ticket = storage.get_ticket(1000)
+        ticket["description"] = "Changed"
+        assert storage.get_ticket(1000)["description"] == "Description"
+
+    def test_patched_tickets_are_cached_in_full(self, tmp_path):
+        """In delta mode patched tickets stay whole until compacted."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl", write_mode="delta")
+        storage.save_tickets([_ticket(1000), _ticket(1001)])
+        storage.update_ticket(1000, lambda t: t.update(description="Patched"))
+
+        assert storage._tickets[1000]["description"] == "Patched"
+        assert storage._locations.get(1000) is None
+
+        storage.compact()
+        assert "description" not in storage._tickets[1000]
+        assert storage.get_ticket(1000)["description"] == "Patched"
+        assert storage.get_ticket(1001)["description"] == "Description"
+
+    def test_summaries_are_served_from_memory(self, tmp_path, monkeypatch):
+        """Summary projections don't read records, others do."""
+        path = tmp_path / "tickets.jsonl"
+        TicketStorage(path).save_tickets([_ticket(1000), _ticket(1001)])
+        storage = TicketStorage(path)
+        reads = []
+        read_record = storage._read_record
+        monkeypatch.setattr(
+            storage, "_read_record", lambda *loc: reads.append(loc) or read_record(*loc)
+        )
+
+        summaries = storage.query_tickets(fields=SUMMARY_FIELDS)
+        assert [t["subject"] for t in summaries] == ["Issue 1001", "Issue 1000"]
+        assert reads == []
+
+        assert storage.query_tickets(fields=["description"], limit=1) == [
+            {
+                "id": 1001,
+                "created_at": "2025-01-01T00:00:41",
+                "description": "Description",
+            }
+        ]
+        assert len(reads) == 1
+
+    def test_locations_survive_compaction_by_other_instance(self, tmp_path):
+        """Records are re-read from the new file after a rewrite elsewhere."""
+        path = tmp_path / "tickets.jsonl"
+        storage = TicketStorage(path)
+        storage.save_tickets([_ticket(1000 + i) for i in range(20)])
+        for i in range(20):
+            storage.save_ticket(_ticket(1000 + i, description=f"Version {i}"))
+
+        other = TicketStorage(path)
+        other.save_ticket(_ticket(1020))
+        other.compact()
+        other.save_ticket(_ticket(1005, description="Latest"))
+
+        assert storage.get_ticket(1005)["description"] == "Latest"
+        assert storage.get_ticket(1019)["description"] == "Version 19"
+        assert storage.get_ticket(1020)["description"] == "Description"
+        assert len(storage.query_tickets(query="Version")) == 19
+
+    def test_writes_during_compaction_are_located(self, tmp_path, monkeypatch):
+        """Records appended while compacting are found at their new offset."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl", write_mode="delta")
+        storage.save_tickets([_ticket(1000 + i) for i in range(10)])
+        storage.update_ticket(1001, lambda t: t.update(description="Patched"))
+
+        mkstemp = tempfile.mkstemp
+
+        def write_then_mkstemp(*args, **kwargs):
+            storage.save_ticket(_ticket(1002, description="During compaction"))
+            storage.save_ticket(_ticket(1010))
+            return mkstemp(*args, **kwargs)
+
+        monkeypatch.setattr(tempfile, "mkstemp", write_then_mkstemp)
+        storage.compact()
+        monkeypatch.undo()
+        assert storage._locations.get(1010) is not None
+
+        expected = {1001: "Patched", 1002: "During compaction", 1010: "Description"}
+        for reader in (storage, TicketStorage(storage.file_path)):
+            for ticket_id in range(1000, 1011):
+                assert reader.get_ticket(ticket_id)["description"] == expected.get(
+                    ticket_id, "Description"
+                )
+
+
+class TestBatchWrites:
+    """Tests for group-committed batch writes."""
+
+    @pytest.fixture
+    def fsyncs(self, monkeypatch):
+        """Record fsync() calls, ignoring background threads of other tests."""
+        calls = []
+        test_thread = threading.get_ident()
+        real_fsync = os.fsync
+
+        def fsync(fd):
+            if threading.get_ident() == test_thread:
+                calls.append(fd)
+            else:
+                real_fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", fsync)
+        return calls
+
+    def test_batch_is_fsynced_once(self, tmp_path, fsyncs):
+        """A batch of saves is appended and flushed in one go."""
+        storage = TicketStorage(tmp_path / "tickets.jsonl", fsync="batch")
+
+        storage.save_tickets([_ticket(1000 + i) for i in range(50)])
+        storage.update_tickets(list(range(1000, 1050)), lambda t: None)
+
+        assert len(fsyncs) == 2
+        assert len(storage.file_path.read_text().splitlines()) == 100
+
+    def test_write_policy_fsyncs_every_record(self, tmp_path, fsyncs):
+        """The "write" policy flushes each record and "none" never does."""
+        TicketStorage(tmp_path / "a.jsonl", fsync="write").save_tickets(
+            [_ticket(1000 + i) for i in range(5)]
+        )
+        assert len(fsyncs) == 5
+
+        TicketStorage(tmp_path / "b.jsonl").save_tickets([_ticket(1000)])
+        assert len(fsyncs) == 5
+
+        with pytest.raises(ValueError):
+            TicketStorage(tmp_path / "c.jsonl", fsync="sometimes")
+
+    def test_failed_batch_is_not_cached(self, storage):
+        """Tickets staged by a failed batch disappear from the cache."""
+        storage.save_ticket(_ticket(1000))
+
+        def fail_on_second(ticket):
+            if ticket["id"] == 1001:
+                raise ValueError("boom")
+            ticket["status"] = "open"
+
+        storage.save_ticket(_ticket(1001))
+        with pytest.raises(ValueError):
+            storage.update_tickets([1000, 1001], fail_on_second)
+
+        assert storage.get_ticket(1000)["status"] == "new"
+        assert len(storage.file_path.read_text().splitlines()) == 2
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def any_storage(request, tmp_path):
+    """Provide each storage backend in turn."""
+    if request.param == "sqlite":
+        return SQLiteTicketStorage(tmp_path / "tickets.db")
+    return TicketStorage(tmp_path / "tickets.jsonl")
+
+
+class TestBackends:
+    """Behaviour shared by every storage backend."""
+
+    def test_crud_roundtrip(self, any_storage):
+        """Tickets can be saved, updated, read and deleted."""
+        assert any_storage.get_next_id() == 1000
+
+        any_storage.save_ticket(_ticket(1000))
+        any_storage.save_ticket(_ticket(1000, status="open"))
+        any_storage.save_ticket(_ticket(1001))
+
+        assert any_storage.get_ticket(1000)["status"] == "open"
+        assert any_storage.count() == 2
+        assert any_storage.get_next_id() == 1002
+        assert any_storage.delete_ticket(1001) is True
+        assert any_storage.delete_ticket(1001) is False
+        assert list(any_storage.load_all_tickets()) == [1000]
+
+        any_storage.clear()
+        assert any_storage.count() == 0
+        assert any_storage.get_next_id() == 1000
+
+    def test_reserve_ids(self, any_storage):
+        """Reservations hand out consecutive, never reused blocks."""
+        assert any_storage.reserve_ids() == 1000
+        assert any_storage.reserve_ids(10) == 1001
+        assert any_storage.get_next_id() == 1011
+
+        any_storage.save_ticket(_ticket(1011))
+        any_storage.delete_ticket(1011)
+        assert any_storage.reserve_ids() == 1012
+
+    def test_exclusive(self, any_storage):
+        """Other threads can't write while an exclusive block runs."""
+        written = threading.Event()
+
+        def write():
+            any_storage.save_ticket(_ticket(2000))
+            written.set()
+
+        with any_storage.exclusive():
+            any_storage.clear()
+            first_id = any_storage.reserve_ids(2)
+            writer = threading.Thread(target=write)
+            writer.start()
+            any_storage.save_tickets([_ticket(first_id), _ticket(first_id + 1)])
+            assert not written.wait(0.2)
+            assert any_storage.count() == 2
+        writer.join(timeout=10)
+
+        assert written.is_set()
+        assert sorted(any_storage.load_all_tickets()) == [1000, 1001, 2000]
+
+    def test_concurrent_reservations_are_unique(self, any_storage):
+        """Threads creating tickets at once never share an ID."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: any_storage.reserve_ids(), range(200)))
+
+        assert sorted(ids) == list(range(1000, 1200))
+
+    def test_update_ticket(self, any_storage):
+        """Updates bump the version and honour expected_version."""
+        any_storage.save_ticket(_ticket(1000))
+        assert any_storage.get_ticket(1000)["version"] == 1
+
+        def reopen(ticket):
+            ticket["status"] = "open"
+
+        updated = any_storage.update_ticket(1000, reopen, expected_version=1)
+        assert updated["status"] == "open"
+        assert updated["version"] == 2
+        assert any_storage.get_ticket(1000) == updated
+
+        with pytest.raises(TicketVersionConflictError):
+            any_storage.update_ticket(1000, reopen, expected_version=1)
+        assert any_storage.update_ticket(1000, lambda t: False)["version"] == 2
+        assert any_storage.update_ticket(1999, reopen) is None
+
+    def test_concurrent_updates_are_not_lost(self, any_storage):
+        """Parallel read-modify-write cycles all land."""
+        any_storage.save_ticket(_ticket(1000))
+
+        def add_comment(i):
+            any_storage.update_ticket(1000, lambda t: t["comments"].append(i))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(add_comment, range(50)))
+
+        ticket = any_storage.get_ticket(1000)
+        assert sorted(ticket["comments"]) == list(range(50))
+        assert ticket["version"] == 51
+
+    def test_save_tickets_batch(self, any_storage):
+        """A batch saves every ticket, including repeated ones."""
+        tickets = [_ticket(1000 + i) for i in range(100)]
+        any_storage.save_tickets(tickets + [_ticket(1000, status="open")])
+
+        assert any_storage.count() == 100
+        assert any_storage.get_ticket(1000)["status"] == "open"
+        assert any_storage.get_ticket(1000)["version"] == 2
+        assert any_storage.get_next_id() == 1100
+
+    def test_update_tickets_batch(self, any_storage):
+        """Batch updates report missing IDs and are all-or-nothing."""
+        any_storage.save_tickets([_ticket(1000), _ticket(1001), _ticket(1002)])
+
+        def reopen(ticket):
+            if ticket["id"] == 1001:
+                return False
+            ticket["status"] = "open"
+
+        results = any_storage.update_tickets([1000, 1001, 1999, 1002], reopen)
+        assert [r and r["status"] for r in results] == ["open", "new", None, "open"]
+        assert any_storage.get_ticket(1002)["status"] == "open"
+        assert any_storage.get_ticket(1001)["version"] == 1
+
+        def close_or_fail(ticket):
+            if ticket["id"] == 1002:
+                raise ValueError("boom")
+            ticket["status"] = "closed"
+
+        with pytest.raises(ValueError):
+            any_storage.update_tickets([1000, 1002], close_or_fail)
+        assert any_storage.get_ticket(1000)["status"] == "open"
+
+    def test_query_tickets(self, any_storage):
+        """Filters, ordering and limit are applied together."""
+        any_storage.save_ticket(
+            _ticket(1000, subject="VPN down", tags=["vpn"], priority="high")
+        )
+        any_storage.save_ticket(_ticket(1001, subject="Printer jam", tags=["printer"]))
+        any_storage.save_ticket(
+            _ticket(
+                1002,
+                subject="VPN slow",
+                tags=["vpn", "network"],
+                sla_breach={"resolution_breached": True},
+            )
+        )
+
+        ids = [t["id"] for t in any_storage.query_tickets(query="vpn")]
+        assert ids == [1002, 1000]
+
+        ids = [t["id"] for t in any_storage.query_tickets(tags=["network", "printer"])]
+        assert ids == [1002, 1001]
+
+        ids = [t["id"] for t in any_storage.query_tickets(sla_breached=True)]
+        assert ids == [1002]
+
+        ids = [t["id"] for t in any_storage.query_tickets(priority="high", limit=5)]
+        assert ids == [1000]
+
+        any_storage.save_ticket(_ticket(1003, status="pending"))
+        ids = [t["id"] for t in any_storage.query_tickets(status=["pending", "solved"])]
+        assert ids == [1003]
+        ids = [t["id"] for t in any_storage.query_tickets(status=("new", "pending"))]
+        assert ids == [1003, 1002, 1001, 1000]
+
+        assert len(any_storage.query_tickets(limit=2)) == 2
+        assert (
+            any_storage.query_tickets(created_before="2025-01-01T00:00:40")[0]["id"]
+            == 1000
+        )
+
+    def test_query_projection(self, any_storage):
+        """Projections have exactly the requested fields plus id and created_at."""
+        any_storage.save_ticket(
+            _ticket(
+                1000,
+                assignee_id="agent_1",
+                tags=["vpn"],
+                sla_breach={"resolution_breached": True},
+            )
+        )
+        any_storage.save_ticket(_ticket(1001))
+
+        summaries = any_storage.query_tickets(fields=SUMMARY_FIELDS)
+        assert [set(t) for t in summaries] == [set(SUMMARY_FIELDS)] * 2
+        assert summaries[1]["sla_breach"] == {"resolution_breached": True}
+        assert summaries[1]["tags"] == ["vpn"]
+        assert summaries[0]["assignee_name"] is None
+
+        page = any_storage.query_tickets(
+            assignee_id="agent_1", fields=["subject", "subject"]
+        )
+        assert page == [
+            {"id": 1000, "created_at": "2025-01-01T00:00:40", "subject": "Issue 1000"}
+        ]
+        page = any_storage.query_tickets(fields=[], limit=1)
+        assert page == [{"id": 1001, "created_at": "2025-01-01T00:00:41"}]
+        page = any_storage.query_tickets(fields=[], cursor=next_cursor(page, 1))
+        assert page == [{"id": 1000, "created_at": "2025-01-01T00:00:40"}]
+
+    def test_cursor_pagination(self, any_storage):
+        """Pages follow each other without gaps, even on equal timestamps."""
+        any_storage.save_tickets(
+            [
+                _ticket(1000 + i, created_at=f"2025-01-01T00:00:{i // 3:02d}")
+                for i in range(30)
+            ]
+        )
+        any_storage.update_ticket(1005, lambda t: t.update(status="open"))
+
+        pages = []
+        cursor = None
+        while True:
+            page = any_storage.query_tickets(limit=7, cursor=cursor)
+            pages.append([t["id"] for t in page])
+            cursor = next_cursor(page, 7)
+            if cursor is None:
+                break
+
+        assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+        assert sum(pages, []) == list(range(1029, 999, -1))
+
+        page = any_storage.query_tickets(
+            created_after="2025-01-01T00:00:02",
+            created_before="2025-01-01T00:00:05",
+            limit=5,
+        )
+        assert [t["id"] for t in page] == [1017, 1016, 1015, 1014, 1013]
+        page = any_storage.query_tickets(
+            created_after="2025-01-01T00:00:02",
+            created_before="2025-01-01T00:00:05",
+            cursor=next_cursor(page, 5),
+        )
+        assert [t["id"] for t in page] == [1012, 1011, 1010, 1009, 1008, 1007, 1006]
+
+        page = any_storage.query_tickets(
+            status="new", limit=3, cursor=encode_cursor(any_storage.get_ticket(1007))
+        )
+        assert [t["id"] for t in page] == [1006, 1004, 1003]
+
+        with pytest.raises(ValueError):
+            any_storage.query_tickets(cursor="not-a-cursor")
+
+    def test_search_tickets(self, any_storage):
+        """Every backend searches comments and Thai text and ranks matches."""
+        any_storage.save_tickets(
+            [
+                _ticket(1000, subject="VPN down", description="VPN VPN"),
+                _ticket(1001, subject="VPN slow"),
+                _ticket(1002, subject="อีเมลใช้งานไม่ได้", status="open"),
+                _ticket(1003, subject="Printer", comments=[{"body": "Jammed on A4"}]),
+            ]
+        )
+        any_storage.update_ticket(
+            1001, lambda t: t["comments"].append({"body": "Resolved by IT"})
+        )
+
+        def ids(query, **filters):
+            return [t["id"] for t in any_storage.search_tickets(query, **filters)]
+
+        assert ids("vpn") == [1000, 1001]
+        assert ids("vpn", limit=1) == [1000]
+        assert ids("jammed a4") == [1003]
+        assert ids("vpn it") == [1001]
+        assert ids("ใช้งาน", status="open") == [1002]
+        assert ids("ใช้งาน", status="new") == []
+        assert ids("vpn missing") == []
+        assert ids("!!") == []
+        assert [t["id"] for t in any_storage.query_tickets(query="jammed")] == [1003]
+
+        any_storage.delete_ticket(1003)
+        assert ids("jammed") == []
+
+    def test_changes_feed(self, any_storage):
+        """Committed writes are published in order, failed ones are not."""
+        version = any_storage.changes.version
+        any_storage.save_tickets([_ticket(1000), _ticket(1001)])
+        any_storage.update_ticket(1000, lambda t: t.update(status="open"))
+        any_storage.delete_ticket(1001)
+
+        def fail(ticket):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            any_storage.update_tickets([1000], fail)
+
+        current, changes = any_storage.get_changes(version)
+        assert [(c["ticket_id"], c["op"]) for c in changes] == [
+            (1000, "create"),
+            (1001, "create"),
+            (1000, "update"),
+            (1001, "delete"),
+        ]
+        assert current == changes[-1]["version"]
+        assert any_storage.get_changes(version, limit=1)[1] == changes[:1]
+
+        any_storage.clear()
+        assert any_storage.get_changes(current)[1] is None
+
+    def test_get_stats(self, any_storage):
+        """Stats count tickets by status and priority."""
+        any_storage.save_ticket(_ticket(1000, priority="high"))
+        any_storage.save_ticket(_ticket(1001, status="open"))
+
+        assert any_storage.get_stats() == {
+            "total": 2,
+            "by_status": {"new": 1, "open": 1},
+            "by_priority": {"high": 1, "normal": 1},
+            "by_category": {},
+            "by_assignee": {"unassigned": 2},
+            "open_by_assignee": {"unassigned": 2},
+            "status_by_priority": {"new": {"high": 1}, "open": {"normal": 1}},
+            "sla_breached": 0,
+        }
+
+    def test_get_stats_follows_writes(self, any_storage):
+        """Stats match a recount after updates, deletes and batches."""
+        any_storage.save_tickets(
+            [
+                _ticket(1000 + i, priority=("low", "high")[i % 2], category="network")
+                for i in range(10)
+            ]
+        )
+
+        def assign(ticket):
+            ticket["assignee_id"] = "agent_1"
+            ticket["status"] = "solved" if ticket["id"] % 3 else "open"
+            ticket["sla_breach"] = {"resolution_breached": ticket["id"] == 1003}
+
+        any_storage.update_tickets([1001, 1002, 1003, 1004], assign)
+        any_storage.delete_ticket(1000)
+        any_storage.save_ticket(_ticket(1005, category="hardware"))
+
+        stats = any_storage.get_stats()
+        assert stats["total"] == 9
+        assert stats["by_status"] == {"new": 5, "open": 1, "solved": 3}
+        assert stats["by_category"] == {"network": 8, "hardware": 1}
+        assert stats["by_assignee"] == {"agent_1": 4, "unassigned": 5}
+        assert stats["open_by_assignee"] == {"agent_1": 1, "unassigned": 5}
+        assert stats["status_by_priority"]["solved"] == {"high": 2, "low": 1}
+        assert stats["sla_breached"] == 1
+
+    def test_versions(self, any_storage):
+        """Versions change with every write and are shared by all instances."""
+        other = type(any_storage)(
+            getattr(any_storage, "file_path", None) or any_storage.db_path
+        )
+        any_storage.save_tickets([_ticket(1000), _ticket(1001)])
+        version = any_storage.get_version()
+        ticket_version = any_storage.get_ticket_version(1000)
+
+        assert any_storage.get_version() == version
+        assert other.get_version() == version
+        assert other.get_ticket_version(1000) == ticket_version
+        assert any_storage.get_ticket_version(9999) is None
+
+        # Unchanged tickets keep their version when others change
+        other.update_ticket(1001, lambda t: t.update(status="open"))
+        assert any_storage.get_version() != version
+        assert any_storage.get_ticket_version(1000) == ticket_version
+        assert any_storage.get_ticket_version(1001) != ticket_version
+
+        version = any_storage.get_version()
+        any_storage.delete_ticket(1001)
+        assert any_storage.get_version() != version
+
+        # A new ticket reusing an ID after clear() gets a new version
+        any_storage.clear()
+        any_storage.save_ticket(_ticket(1000, created_at="2025-02-01T00:00:00"))
+        assert any_storage.get_ticket_version(1000) != ticket_version
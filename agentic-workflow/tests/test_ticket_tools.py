@@ -535,6 +535,12 @@ class TestGetMyOpenTickets:
 
         assert urgent_pos < normal_pos < low_pos
 
+        result = get_my_open_tickets.invoke({"limit": 1})
+
+        assert "Open Tickets (1)" in result
+        assert "Urgent Priority" in result
+        assert "Normal Priority" not in result
+
 
 class TestAssignTicket:
     """Tests for assigning tickets to agents."""